@@ -0,0 +1,111 @@
+"""
+Arquiva os tickets fechados há mais de TICKET_ARCHIVE_AFTER_DAYS dias (ou --days).
+
+Cada lote de tickets é copiado, com os seus logs, CCS e anexos, para as tabelas de arquivo
+(migração 0005) e removido das tabelas ativas, numa única transação. Os tickets com equipamentos
+ou fornecedores associados ficam na tabela ativa. Os ficheiros dos anexos não são movidos.
+
+Os tickets arquivados continuam disponíveis nos detalhes, logs e anexos pelo uid, e nas listagens
+com filtros de created_at anteriores ao arquivo (ver app/utils/helpers/tickets/ticket_archive.py).
+Cada lote atualiza a versão do arquivo (tabela ticket_entity_versions), que faz parte do ETag da listagem:
+os clientes deixam logo de receber 304 com os tickets arquivados. Os outros processos da API usam as novas
+datas do arquivo nos filtros depois de TICKET_ARCHIVE_BOUNDARY_TTL segundos.
+
+Uso (na raiz do projeto):
+  python -m app.commands.archive_tickets [--days 365] [--batch-size 500] [--dry-run]
+"""
+from dotenv import load_dotenv
+
+# As variáveis do .env têm de estar carregadas antes de importar a configuração da base de dados
+load_dotenv(dotenv_path='.env.dev')
+
+from app.database.models.helpdesk import Tickets, TicketEquipments, TicketSuppliers
+from app.utils.helpers.tickets.ticket_archive import TICKET_ARCHIVE_AFTER_DAYS
+from app.utils.helpers.tickets.ticket_versions import _bump_entity_version, TICKET_ARCHIVE_VERSION_NAME
+from config import DATABASE_CONFIG
+from datetime import datetime, timedelta, timezone
+from tortoise import Tortoise, run_async
+from tortoise.expressions import Subquery
+from tortoise.transactions import in_transaction
+import argparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tabelas movidas com o ticket: (tabela ativa, tabela de arquivo, coluna com o id do ticket)
+ARCHIVED_TICKET_RELATIONS: tuple[tuple[str, str, str], ...] = (
+  ("ticket_logs", "ticket_logs_archive", "target_id"),
+  ("tickets_ccs", "tickets_ccs_archive", "ticket_id"),
+  ("ticket_attachments", "ticket_attachments_archive", "ticket_id"),
+)
+
+async def _archive_batch(ticket_ids: list[int]) -> dict[str, int]:
+  """Move um lote de tickets (e as linhas associadas) para o arquivo. Devolve o número de linhas por tabela."""
+  # Os ids vêm da base de dados (inteiros): podem ser incluídos diretamente no SQL
+  id_list = ",".join(str(int(ticket_id)) for ticket_id in ticket_ids)
+  moved = {}
+  async with in_transaction() as connection:
+    for table, archive_table, column in ARCHIVED_TICKET_RELATIONS:
+      moved[table], _ = await connection.execute_query(
+        f"INSERT INTO {archive_table} SELECT * FROM {table} WHERE {column} IN ({id_list})"
+      )
+    moved["tickets"], _ = await connection.execute_query(
+      f"INSERT INTO tickets_archive SELECT * FROM tickets WHERE id IN ({id_list})"
+    )
+    # As linhas associadas são removidas antes dos tickets (foreign keys)
+    for table, _, column in ARCHIVED_TICKET_RELATIONS:
+      await connection.execute_query(f"DELETE FROM {table} WHERE {column} IN ({id_list})")
+    await connection.execute_query(f"DELETE FROM tickets WHERE id IN ({id_list})")
+    # Os tickets saem da listagem por omissão: a versão do arquivo muda o ETag da listagem
+    await _bump_entity_version(TICKET_ARCHIVE_VERSION_NAME, connection=connection)
+  return moved
+
+async def archive_tickets(days: int = TICKET_ARCHIVE_AFTER_DAYS, batch_size: int = 500, dry_run: bool = False) -> int:
+  """
+  Arquiva, em lotes por ordem de id, os tickets fechados antes de agora - `days` dias.
+
+  Returns:
+    O número de tickets arquivados (ou a arquivar, se dry_run).
+  """
+  cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+  candidates = Tickets.filter(closed_at__isnull=False, closed_at__lt=cutoff).exclude(
+    id__in=Subquery(TicketEquipments.all().values('ticket_id'))
+  ).exclude(
+    id__in=Subquery(TicketSuppliers.all().values('ticket_id'))
+  )
+
+  if dry_run:
+    return await candidates.count()
+
+  archived = 0
+  last_id = 0
+  while True:
+    ticket_ids = await candidates.filter(id__gt=last_id).order_by('id').limit(batch_size).values_list('id', flat=True)
+    if not ticket_ids:
+      break
+
+    moved = await _archive_batch(list(ticket_ids))
+    archived += moved["tickets"]
+    last_id = ticket_ids[-1]
+    logger.info(f"Archived tickets up to id {last_id}: {moved}")
+
+  return archived
+
+async def main(days: int, batch_size: int, dry_run: bool):
+  await Tortoise.init(config=DATABASE_CONFIG)
+  try:
+    archived = await archive_tickets(days, batch_size, dry_run)
+    action = "would be archived" if dry_run else "archived"
+    print(f"{archived} tickets closed more than {days} days ago {action}.")
+  finally:
+    await Tortoise.close_connections()
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--days", type=int, default=TICKET_ARCHIVE_AFTER_DAYS, help="Idade mínima (dias desde o fecho) dos tickets a arquivar")
+  parser.add_argument("--batch-size", type=int, default=500)
+  parser.add_argument("--dry-run", action="store_true")
+  args = parser.parse_args()
+
+  logging.basicConfig(level=logging.INFO)
+  run_async(main(args.days, args.batch_size, args.dry_run))
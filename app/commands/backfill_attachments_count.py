@@ -0,0 +1,71 @@
+"""
+Recalcula a coluna tickets.attachments_count a partir da tabela ticket_attachments.
+Corrige apenas os tickets em que o contador difere do número real de anexos.
+
+Uso (na raiz do projeto):
+  python -m app.commands.backfill_attachments_count [--batch-size 1000] [--dry-run]
+"""
+from dotenv import load_dotenv
+
+# As variáveis do .env têm de estar carregadas antes de importar a configuração da base de dados
+load_dotenv(dotenv_path='.env.dev')
+
+from app.database.models.helpdesk import Tickets
+from collections import defaultdict
+from config import DATABASE_CONFIG
+from tortoise import Tortoise, run_async
+from tortoise.functions import Count
+import argparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+async def backfill_attachments_count(batch_size: int = 1000, dry_run: bool = False) -> int:
+  """
+  Percorre os tickets por ordem de id, em lotes, e corrige o attachments_count.
+
+  Returns:
+    O número de tickets com o contador errado (corrigidos, se não for dry_run).
+  """
+  last_id = 0
+  repaired = 0
+  while True:
+    rows = await Tickets.filter(id__gt=last_id).order_by('id').limit(batch_size).annotate(
+      real_count=Count('attachments')
+    ).values('id', 'attachments_count', 'real_count')
+    if not rows:
+      break
+
+    # Agrupa os tickets pelo valor correto, para um UPDATE por valor
+    ids_per_count = defaultdict(list)
+    for row in rows:
+      if row['attachments_count'] != row['real_count']:
+        ids_per_count[row['real_count']].append(row['id'])
+
+    for real_count, ticket_ids in ids_per_count.items():
+      repaired += len(ticket_ids)
+      if not dry_run:
+        await Tickets.filter(id__in=ticket_ids).update(attachments_count=real_count)
+
+    last_id = rows[-1]['id']
+    logger.info(f"Processed tickets up to id {last_id}, {repaired} with a wrong attachments_count so far")
+
+  return repaired
+
+async def main(batch_size: int, dry_run: bool):
+  await Tortoise.init(config=DATABASE_CONFIG)
+  try:
+    repaired = await backfill_attachments_count(batch_size, dry_run)
+    action = "would be repaired" if dry_run else "repaired"
+    print(f"{repaired} tickets {action}.")
+  finally:
+    await Tortoise.close_connections()
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--batch-size", type=int, default=1000)
+  parser.add_argument("--dry-run", action="store_true")
+  args = parser.parse_args()
+
+  logging.basicConfig(level=logging.INFO)
+  run_async(main(args.batch_size, args.dry_run))
@@ -0,0 +1,124 @@
+"""
+Consultor de índices das listagens de tickets.
+
+Lê as formas dos filtros registadas por GET /tickets nos logs de produção (linhas com
+"ticket_filter_shape"), reproduz cada forma com valores de exemplo através de _apply_filters
+e corre o EXPLAIN da query da página. Indica as formas em que alguma tabela ainda é lida por
+inteiro (type = ALL), ordenadas pelo número de pedidos.
+
+Termina com o código 1 se alguma forma fizer full scan (útil para correr depois das migrações).
+
+Uso (na raiz do projeto):
+  python -m app.commands.ticket_index_advisor app.log [outro.log ...] [--min-count 1] [--all]
+  docker compose logs api | python -m app.commands.ticket_index_advisor -
+"""
+from dotenv import load_dotenv
+
+# As variáveis do .env têm de estar carregadas antes de importar a configuração da base de dados
+load_dotenv(dotenv_path='.env.dev')
+
+from app.database.models.helpdesk import Tickets
+from app.utils.errors.exceptions import CustomError
+from app.utils.helpers.name_index import _ensure_search_name_index
+from app.utils.helpers.tickets.ticket_helpers import _apply_filters
+from app.utils.helpers.tickets.ticket_filter_shapes import _parse_ticket_filter_shape, _sample_filters
+from collections import Counter
+from config import DATABASE_CONFIG
+from tortoise import Tortoise
+import argparse
+import asyncio
+import json
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Tamanho da página usado nas queries reproduzidas
+EXPLAIN_PAGE_SIZE = 50
+
+def _read_shapes(paths: list[str]) -> Counter:
+  """Conta as formas dos filtros encontradas nos ficheiros de log ('-' para o stdin)."""
+  shapes = Counter()
+  for path in paths:
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8", errors="replace")
+    try:
+      for line in stream:
+        shape = _parse_ticket_filter_shape(line)
+        if shape is not None:
+          shapes[json.dumps(shape, sort_keys=True)] += 1
+    finally:
+      if stream is not sys.stdin:
+        stream.close()
+  return shapes
+
+async def _explain_shape(shape: dict) -> list[dict]:
+  """Reproduz a query da página para a forma dada e devolve as linhas do EXPLAIN."""
+  queryset = Tickets.all()
+  if shape.get("own"):
+    queryset = queryset.filter(agent_id=1)
+  queryset = _apply_filters(
+    queryset,
+    _sample_filters(shape.get("filters") or []),
+    "x" if shape.get("search") else None,
+    shape.get("order_by"),
+  ).limit(EXPLAIN_PAGE_SIZE)
+  return await Tickets._meta.db.execute_query_dict(f"EXPLAIN {queryset.sql(params_inline=True)}")
+
+async def advise(paths: list[str], min_count: int = 1, show_all: bool = False) -> int:
+  """
+  Corre o EXPLAIN de cada forma de filtros encontrada nos logs.
+
+  Returns:
+    O número de formas que fazem full scan.
+  """
+  shapes = _read_shapes(paths)
+  if not shapes:
+    logger.warning("Nenhuma linha 'ticket_filter_shape' encontrada nos logs.")
+    return 0
+
+  if Tickets._meta.db.capabilities.dialect != "mysql":
+    logger.warning("O resultado do EXPLAIN só é interpretado em MySQL: nenhuma forma vai ser indicada como full scan.")
+
+  await _ensure_search_name_index()
+  full_scans = 0
+  for shape_key, requests in shapes.most_common():
+    if requests < min_count:
+      break
+    shape = json.loads(shape_key)
+    try:
+      plan = await _explain_shape(shape)
+    except CustomError as e:
+      # Forma com um campo que já não é permitido
+      logger.warning(f"{requests:>7} pedidos  {shape_key}: ignorada ({e.detail.get('info')})")
+      continue
+
+    scanned = [row for row in plan if row.get("type") == "ALL"]
+    filesort = any("filesort" in (row.get("Extra") or "") for row in plan)
+    if scanned:
+      full_scans += 1
+      tables = ", ".join(f"{row.get('table')} (~{row.get('rows')} linhas)" for row in scanned)
+      print(f"{requests:>7} pedidos  FULL SCAN  {shape_key}\n           tabelas: {tables}{'; filesort' if filesort else ''}")
+    elif show_all:
+      keys = ", ".join(f"{row.get('table')}: {row.get('key')}" for row in plan)
+      print(f"{requests:>7} pedidos  ok         {shape_key}\n           índices: {keys}{'; filesort' if filesort else ''}")
+
+  print(f"{len(shapes)} formas de filtros, {full_scans} com full scan.")
+  return full_scans
+
+async def main(paths: list[str], min_count: int, show_all: bool) -> int:
+  await Tortoise.init(config=DATABASE_CONFIG)
+  try:
+    return await advise(paths, min_count, show_all)
+  finally:
+    await Tortoise.close_connections()
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("logs", nargs="+", help="Ficheiros de log a analisar ('-' para o stdin)")
+  parser.add_argument("--min-count", type=int, default=1, help="Ignora formas com menos pedidos do que este valor")
+  parser.add_argument("--all", action="store_true", help="Mostra também as formas que já usam índices")
+  args = parser.parse_args()
+
+  logging.basicConfig(level=logging.INFO)
+  full_scans = asyncio.run(main(args.logs, args.min_count, args.all))
+  sys.exit(1 if full_scans else 0)
@@ -46,6 +46,7 @@ async def handle_fetch_companies_management(
   search: str | None,
   and_filters: str | None,
   order_by: str | None,
+  count: str = "exact",
 ):
   try:
     logger.info(f"Handling fetch companies management request. Page: {page}, Page Size: {page_size}, Search: '{search}', Order By: '{order_by}'")
@@ -68,6 +69,7 @@ async def handle_fetch_companies_management(
       search=search,
       and_filters=parsed_and_filters,
       order_by=order_by,
+      count=count,
     )
     logger.info(f"Successfully fetched tickets. Page: {page}, Count: {len(result.get('items', []))}")
     return result
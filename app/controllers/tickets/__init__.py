@@ -3,7 +3,10 @@ from .tickets import (
   handle_fetch_tickets,
   handle_fetch_ticket_details,
   handle_update_ticket,
+  handle_bulk_update_tickets,
   handle_preset_counts,
+  handle_fetch_ticket_facets,
+  handle_fetch_ticket_suggestions,
   handle_fetch_ticket_logs,
   handle_fetch_ticket_file,
 )
\ No newline at end of file
@@ -44,7 +44,8 @@ async def handle_fetch_ticket_categories(
   search: str | None = None,
   and_filters: dict[str, any] | None = None,
   order_by: str | None = None,
-  original_query_params: dict | None = None
+  original_query_params: dict | None = None,
+  count: str = "exact"
   ):
   
   try:
@@ -57,6 +58,7 @@ async def handle_fetch_ticket_categories(
       and_filters,
       order_by,
       original_query_params,
+      count,
     )
   
   except CustomError as e:
@@ -3,14 +3,22 @@ from fastapi.responses import JSONResponse
 from app.services.tickets import (
   create_ticket,
   fetch_tickets,
+  fetch_tickets_version,
+  fetch_tickets_etag,
   fetch_ticket_details,
+  fetch_ticket_details_version,
+  fetch_ticket_details_etag,
   update_ticket_details,
+  bulk_update_tickets,
   fetch_preset_counts,
+  fetch_ticket_facets,
+  fetch_ticket_suggestions,
   fetch_ticket_logs,
   fetch_ticket_file,
 )
 from app.utils.errors.exceptions import CustomError
-from app.schemas.tickets import BaseCreateTicket
+from app.schemas.tickets import BaseCreateTicket, BaseBulkUpdateTickets
+from app.utils.helpers.responses import _fast_response, _etag_matches, _not_modified
 import logging
 import json
 
@@ -37,6 +45,20 @@ async def handle_ticket_creation(
     logger.error(f"Unexpected error during ticket creation: {e}", exc_info=True)
     raise e
 
+def _parse_and_filters(and_filters: str | None) -> dict | None:
+  """Converte o parâmetro and_filters (string JSON) num dicionário."""
+  if not and_filters:
+    return None
+  try:
+    parsed_and_filters = json.loads(and_filters)
+    if not isinstance(parsed_and_filters, dict):
+      raise ValueError("Parsed JSON is not a dictionary")
+    logger.debug(f"Parsed and_filters: {parsed_and_filters}")
+    return parsed_and_filters
+  except (json.JSONDecodeError, ValueError) as json_error:
+    logger.error(f"Failed to parse and_filters JSON string: {and_filters}. Error: {json_error}", exc_info=True)
+    raise CustomError(400, f"Invalid format for 'and_filters'. Expected a valid JSON object string. Error: {json_error}")
+
 async def handle_fetch_tickets(
   path: str,
   page: int,
@@ -47,21 +69,24 @@ async def handle_fetch_tickets(
   search: str | None,
   and_filters: str | None,
   order_by: str | None,
+  cursor: str | None = None,
+  count: str = "exact",
+  fields: str | None = None,
+  exclude: str | None = None,
+  if_none_match: str | None = None,
 ):
   try:
+    # Pedido condicional: se a página não mudou, responde 304 sem a reconstruir
+    # A mesma versão é usada no ETag e na chave da cache (a página devolvida corresponde ao ETag)
+    version = await fetch_tickets_version()
+    etag = fetch_tickets_etag(version, current_user, own, original_query_params)
+    if _etag_matches(if_none_match, etag):
+      return _not_modified(etag)
+
     logger.info(f"Handling fetch tickets request. Page: {page}, Page Size: {page_size}, Search: '{search}', Order By: '{order_by}'")
     logger.debug(f"Raw and_filters string: {and_filters}")
 
-    parsed_and_filters = None
-    if and_filters:
-      try:
-        parsed_and_filters = json.loads(and_filters)
-        if not isinstance(parsed_and_filters, dict):
-          raise ValueError("Parsed JSON is not a dictionary")
-        logger.debug(f"Parsed and_filters: {parsed_and_filters}")
-      except (json.JSONDecodeError, ValueError) as json_error:
-        logger.error(f"Failed to parse and_filters JSON string: {and_filters}. Error: {json_error}", exc_info=True)
-        raise CustomError(400, f"Invalid format for 'and_filters'. Expected a valid JSON object string. Error: {json_error}")
+    parsed_and_filters = _parse_and_filters(and_filters)
 
     tickets_result = await fetch_tickets(
       path=path,
@@ -73,9 +98,14 @@ async def handle_fetch_tickets(
       order_by=order_by,
       current_user=current_user,
       own=own,
+      cursor=cursor,
+      count=count,
+      fields=fields,
+      exclude=exclude,
+      version=version,
     )
     logger.info(f"Successfully fetched tickets. Page: {page}, Count: {len(tickets_result.get('items', []))}")
-    return tickets_result
+    return _fast_response(tickets_result, etag=etag)
 
   except CustomError as e:
     logger.error(f"CustomError during fetching tickets: Status={e.status_code}, Detail={e.detail}", exc_info=True)
@@ -87,11 +117,21 @@ async def handle_fetch_tickets(
   
 async def handle_fetch_ticket_details(
   uid: str,
-  current_user: dict | None = None
+  current_user: dict | None = None,
+  fields: str | None = None,
+  exclude: str | None = None,
+  if_none_match: str | None = None
 ):
   try:
-    db_ticket_details = await fetch_ticket_details(uid)
-    return db_ticket_details
+    # Pedido condicional: se o ticket não mudou, responde 304 sem obter os detalhes
+    # A mesma versão é usada no ETag e para validar os detalhes em cache
+    version = await fetch_ticket_details_version(uid)
+    etag = fetch_ticket_details_etag(version, fields, exclude)
+    if _etag_matches(if_none_match, etag):
+      return _not_modified(etag)
+
+    db_ticket_details = await fetch_ticket_details(uid, fields, exclude, version=version)
+    return _fast_response(db_ticket_details, etag=etag)
   except CustomError as e:
     raise e
   except Exception as e:
@@ -116,7 +156,60 @@ async def handle_update_ticket(
     raise e
   except Exception as e:
     raise e
+
+async def handle_bulk_update_tickets(
+  bulk_data: BaseBulkUpdateTickets,
+  current_user: dict
+):
+  try:
+    logger.info(f"Handling bulk ticket update request by user: {current_user.get('id')}")
+    result = await bulk_update_tickets(bulk_data, current_user)
+    logger.info(f"Bulk ticket update finished: {result['summary']}")
+    return result
+  except CustomError as e:
+    logger.error(f"CustomError during bulk ticket update: {e.detail}", exc_info=True)
+    raise e
+  except Exception as e:
+    logger.error(f"Unexpected error during bulk ticket update: {e}", exc_info=True)
+    raise e
     
+async def handle_fetch_ticket_facets(
+  path: str,
+  current_user: dict,
+  own: bool | None,
+  search: str | None,
+  and_filters: str | None,
+  facets: str | None = None,
+):
+  try:
+    ticket_facets = await fetch_ticket_facets(
+      path=path,
+      current_user=current_user,
+      own=own,
+      search=search,
+      and_filters=_parse_and_filters(and_filters),
+      facets=facets,
+    )
+    return _fast_response(ticket_facets)
+  except CustomError as e:
+    logger.error(f"CustomError during fetching ticket facets: Status={e.status_code}, Detail={e.detail}", exc_info=True)
+    raise e
+
+  except Exception as e:
+    logger.error(f"Unexpected error during fetching ticket facets: {e}", exc_info=True)
+    raise e
+
+async def handle_fetch_ticket_suggestions(query: str, limit: int = 10):
+  try:
+    return _fast_response(fetch_ticket_suggestions(query, limit))
+  except CustomError as e:
+    logger.error(f"CustomError during fetching ticket suggestions: Status={e.status_code}, Detail={e.detail}", exc_info=True)
+    raise e
+
+  except Exception as e:
+    logger.error(f"Unexpected error during fetching ticket suggestions: {e}", exc_info=True)
+    raise e
+
 async def handle_preset_counts(
   current_user: dict,
   search: str | None = None,
@@ -41,7 +41,8 @@ async def handle_fetch_users(
   original_query_params: dict,
   search: str,
   and_filters: str,
-  order_by: str
+  order_by: str,
+  count: str = "exact"
 ):
   try:
     parsed_and_filters = {}
@@ -63,7 +64,8 @@ async def handle_fetch_users(
       original_query_params,
       search,
       parsed_and_filters,
-      order_by
+      order_by,
+      count
     ) 
   except Exception as e:
     raise e
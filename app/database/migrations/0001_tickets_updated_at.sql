@@ -0,0 +1,8 @@
+-- Versão dos tickets (usada nos ETags de GET /tickets e GET /tickets/details/{uid})
+ALTER TABLE tickets ADD COLUMN updated_at DATETIME(6) NULL AFTER created_at;
+
+-- Os tickets existentes ficam com a data da última alteração conhecida
+UPDATE tickets SET updated_at = COALESCE(closed_at, created_at) WHERE updated_at IS NULL;
+
+-- O ETag das listagens usa o updated_at mais recente
+CREATE INDEX idx_tickets_updated_at ON tickets (updated_at);
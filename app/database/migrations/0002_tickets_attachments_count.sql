@@ -0,0 +1,12 @@
+-- Contador de anexos dos tickets (substitui o COUNT com join nas listagens)
+ALTER TABLE tickets ADD COLUMN attachments_count INT NOT NULL DEFAULT 0 AFTER spent_time;
+
+-- Preenche o contador dos tickets existentes
+-- (pode ser repetido a qualquer momento com: python -m app.commands.backfill_attachments_count)
+UPDATE tickets t
+LEFT JOIN (
+  SELECT ticket_id, COUNT(*) AS total
+  FROM ticket_attachments
+  GROUP BY ticket_id
+) a ON a.ticket_id = t.id
+SET t.attachments_count = COALESCE(a.total, 0);
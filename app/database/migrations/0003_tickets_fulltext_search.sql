@@ -0,0 +1,7 @@
+-- Índice FULLTEXT para a pesquisa geral (parâmetro `search`) de GET /tickets
+-- As colunas têm de coincidir com TICKET_FULLTEXT_COLUMNS (app/utils/helpers/tickets/ticket_search.py).
+-- A pesquisa ignora acentos e maiúsculas conforme a collation da tabela (ex: utf8mb4_0900_ai_ci).
+-- Palavras com menos de innodb_ft_min_token_size caracteres (3 por defeito) não são indexadas;
+-- essas continuam a ser pesquisadas com LIKE.
+ALTER TABLE tickets
+  ADD FULLTEXT INDEX ft_tickets_search (subject, request, response, internal_comment, supplier_reference);
@@ -0,0 +1,22 @@
+-- Índices para os caminhos de acesso das listagens de tickets (filtros e ordenação de GET /tickets)
+-- e do histórico dos tickets. Para verificar as formas de filtros usadas em produção:
+--   python -m app.commands.ticket_index_advisor <ficheiro de log>
+
+-- "Os meus tickets" (own=true), por estado, ordenados por data
+CREATE INDEX idx_tickets_agent_status_created ON tickets (agent_id, status_id, created_at);
+
+-- Presets e filtros por estado, ordenados por data
+CREATE INDEX idx_tickets_status_created ON tickets (status_id, created_at);
+
+-- Filtros por empresa, requerente e categoria, ordenados por data
+CREATE INDEX idx_tickets_company_created ON tickets (company_id, created_at);
+CREATE INDEX idx_tickets_requester_created ON tickets (requester_id, created_at);
+CREATE INDEX idx_tickets_category_created ON tickets (category_id, created_at);
+
+-- Ordenação por omissão (-created_at, com o id como desempate da paginação por cursor) e filtros de datas
+CREATE INDEX idx_tickets_created_at ON tickets (created_at);
+CREATE INDEX idx_tickets_closed_at ON tickets (closed_at);
+CREATE INDEX idx_tickets_prevention_date ON tickets (prevention_date);
+
+-- Histórico de um ticket (GET /tickets/logs/{id}), ordenado por data
+CREATE INDEX idx_ticket_logs_target_created ON ticket_logs (target_id, created_at);
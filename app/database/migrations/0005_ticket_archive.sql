@@ -0,0 +1,32 @@
+-- Arquivo dos tickets fechados (ver app/commands/archive_tickets.py)
+-- As tabelas de arquivo têm a mesma estrutura e os mesmos índices das tabelas ativas (CREATE TABLE ... LIKE
+-- não copia as foreign keys). Qualquer ALTER TABLE futuro a estas tabelas tem de ser repetido no arquivo,
+-- para que as views continuem a ter as mesmas colunas pela mesma ordem.
+CREATE TABLE tickets_archive LIKE tickets;
+CREATE TABLE ticket_logs_archive LIKE ticket_logs;
+CREATE TABLE tickets_ccs_archive LIKE tickets_ccs;
+CREATE TABLE ticket_attachments_archive LIKE ticket_attachments;
+
+-- Views só de leitura com os registos ativos e arquivados (modelos em tickets_with_archive.py).
+-- Só são consultadas quando o pedido precisa do arquivo (filtro de datas anterior ao arquivo ou
+-- um ticket arquivado pedido pelo uid). Em MySQL 8.0.22+ as condições do WHERE são aplicadas
+-- dentro de cada parte do UNION, usando os índices de cada tabela.
+CREATE VIEW tickets_with_archive AS
+  SELECT * FROM tickets
+  UNION ALL
+  SELECT * FROM tickets_archive;
+
+CREATE VIEW ticket_logs_with_archive AS
+  SELECT * FROM ticket_logs
+  UNION ALL
+  SELECT * FROM ticket_logs_archive;
+
+CREATE VIEW tickets_ccs_with_archive AS
+  SELECT * FROM tickets_ccs
+  UNION ALL
+  SELECT * FROM tickets_ccs_archive;
+
+CREATE VIEW ticket_attachments_with_archive AS
+  SELECT * FROM ticket_attachments
+  UNION ALL
+  SELECT * FROM ticket_attachments_archive;
@@ -0,0 +1,16 @@
+-- Versão de cada tipo de entidade incluída nas respostas dos tickets (colaboradores, departamentos,
+-- empresas, categorias e subcategorias). É atualizada quando uma dessas entidades é alterada pela API
+-- e faz parte dos ETags de GET /tickets e GET /tickets/details/{uid} (ver ticket_versions.py).
+-- A linha TicketsArchive é atualizada por cada lote de app.commands.archive_tickets (ETag de GET /tickets).
+CREATE TABLE ticket_entity_versions (
+  name VARCHAR(64) NOT NULL PRIMARY KEY,
+  version DATETIME(6) NOT NULL
+);
+
+INSERT INTO ticket_entity_versions (name, version) VALUES
+  ('Employees', UTC_TIMESTAMP(6)),
+  ('Departments', UTC_TIMESTAMP(6)),
+  ('Companies', UTC_TIMESTAMP(6)),
+  ('TicketCategories', UTC_TIMESTAMP(6)),
+  ('TicketSubcategories', UTC_TIMESTAMP(6)),
+  ('TicketsArchive', UTC_TIMESTAMP(6));
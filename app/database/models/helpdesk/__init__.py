@@ -26,6 +26,8 @@ from .ticket_categories_companies import TicketCategories_Companies
 from .ticket_attachments import TicketAttachments
 from .ticket_assistance_types import TicketAssistanceTypes
 from .tickets_ccs import Tickets_CCS
+from .ticket_entity_versions import TicketEntityVersions
+from .tickets_with_archive import TicketsWithArchive, TicketLogsWithArchive, TicketAttachmentsWithArchive
 
 
 __tickets__ = [
@@ -61,5 +63,9 @@ __all__ = [
   "TicketCategories_Companies",
   "TicketAttachments",
   "TicketAssistanceTypes",
-  "Tickets_CCS"
+  "Tickets_CCS",
+  "TicketEntityVersions",
+  "TicketsWithArchive",
+  "TicketLogsWithArchive",
+  "TicketAttachmentsWithArchive"
 ]
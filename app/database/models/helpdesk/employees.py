@@ -2,6 +2,8 @@ from tortoise.models import Model
 from tortoise import fields
 from tortoise.queryset import QuerySet
 from tortoise.exceptions import DoesNotExist
+from app.utils.helpers.employees.contact_loader import _employee_contacts
+from app.utils.helpers.identity_map import _load_related
 from datetime import datetime
 import hashlib
 import os
@@ -54,7 +56,10 @@ class Employees(Model):
   
   async def to_dict_employee_emails(self) -> dict:
     try:
-      employee_email = await self.employee_relation.filter(main_contact=True, contact_type_id=1).first()
+      employee_email = next(
+        (contact for contact in await _employee_contacts(self.id) if contact.main_contact and contact.contact_type_id == 1),
+        None
+      )
       email = employee_email._contact() if employee_email else None
     except Exception:
       email = None
@@ -76,9 +81,9 @@ class Employees(Model):
     }
 
   async def to_dict_equipments(self) -> dict:
-    department = await self.department
-    company = await self.company
-    local = await self.local
+    department = await _load_related(self, 'department')
+    company = await _load_related(self, 'company')
+    local = await _load_related(self, 'local')
     department_dict = department.to_dict() if department else None
     company_dict = company.to_dict() if company else None
     local_dict = local.to_dict() if local else None
@@ -93,13 +98,16 @@ class Employees(Model):
     }
       
   async def to_dict_ticket_requester(self) -> dict:
-    department = await self.department
-    company = await self.company
-    local = await self.local
+    department = await _load_related(self, 'department')
+    company = await _load_related(self, 'company')
+    local = await _load_related(self, 'local')
     department_dict = department.to_dict() if department else None
     company_dict = company.to_dict() if company else None
     local_dict = local.to_dict() if local else None
-    contact_obj = await self.employee_relation.filter(public=True, contact_type_id=4).first()
+    contact_obj = next(
+      (contact for contact in await _employee_contacts(self.id) if contact.public and contact.contact_type_id == 4),
+      None
+    )
     extension = contact_obj._contact() if contact_obj else None
     
     return {
@@ -114,12 +122,13 @@ class Employees(Model):
     }
   
   async def to_dict_contacts(self) -> dict:
-    department = await self.department
-    company = await self.company
-    local = await self.local
+    department = await _load_related(self, 'department')
+    company = await _load_related(self, 'company')
+    local = await _load_related(self, 'local')
     public_contacts = [
       await contact.to_dict()
-      for contact in await self.employee_relation.filter(public=True)
+      for contact in await _employee_contacts(self.id)
+      if contact.public
     ]
     return {
       "id": self.id,
@@ -243,9 +252,13 @@ class Employees(Model):
     }
   
   async def to_dict_basic_info(self) -> dict:
-    department = await self.department
-    local = await self.local
-    contacts = [await contact.to_dict() for contact in await self.employee_relation.filter(main_contact=True, public=True)]
+    department = await _load_related(self, 'department')
+    local = await _load_related(self, 'local')
+    contacts = [
+      await contact.to_dict()
+      for contact in await _employee_contacts(self.id)
+      if contact.main_contact and contact.public
+    ]
     return {
       "id": self.id,
       "first_name": self.first_name,
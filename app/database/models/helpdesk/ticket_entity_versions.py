@@ -0,0 +1,10 @@
+from tortoise.models import Model
+from tortoise import fields
+
+class TicketEntityVersions(Model):
+  """Versão de cada tipo de entidade incluída nas respostas dos tickets (ver ticket_versions.py)."""
+  name = fields.CharField(max_length=64, pk=True)
+  version = fields.DatetimeField()
+
+  class Meta:
+    table = "ticket_entity_versions"
@@ -1,5 +1,6 @@
 from tortoise.models import Model
 from tortoise import fields
+from tortoise.indexes import Index
 
 class TicketLogs(Model):
   id = fields.IntField(pk=True)
@@ -21,4 +22,8 @@ class TicketLogs(Model):
   
   class Meta:
     table = "ticket_logs"
+    # Histórico de um ticket (migração 0004)
+    indexes = (
+      Index(fields=("target_id", "created_at"), name="idx_ticket_logs_target_created"),
+    )
   
\ No newline at end of file
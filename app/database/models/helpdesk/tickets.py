@@ -1,8 +1,11 @@
 from tortoise.models import Model
 from tortoise import fields
+from tortoise.indexes import Index
 from datetime import datetime, timezone
 import hashlib
 from tortoise.queryset import QuerySet
+from app.utils.helpers.employees.contact_loader import _prime_employee_contacts
+from app.utils.helpers.identity_map import _load_related
 
 class Tickets(Model):
   id = fields.IntField(pk=True)
@@ -13,8 +16,12 @@ class Tickets(Model):
   internal_comment = fields.TextField(null=True)
   prevention_date = fields.DatetimeField(null=True)
   created_at = fields.DatetimeField()
+  # Versão do ticket: atualizada sempre que o ticket, os seus CCS ou anexos mudam (usada nos ETags)
+  updated_at = fields.DatetimeField(null=True)
   closed_at = fields.DatetimeField(null=True)
   spent_time = fields.IntField(default=15)
+  # Número de anexos, mantido em _bulk_create_attachments (evita o COUNT com join nas listagens)
+  attachments_count = fields.IntField(default=0)
   supplier_reference = fields.CharField(max_length=255, null=True)
 
   # --- Foreign Keys --- 
@@ -101,20 +108,41 @@ class Tickets(Model):
   
   class Meta:
     table = "tickets"
+    # Índices das listagens (migrações 0001 e 0004)
+    indexes = (
+      Index(fields=("agent_id", "status_id", "created_at"), name="idx_tickets_agent_status_created"),
+      Index(fields=("status_id", "created_at"), name="idx_tickets_status_created"),
+      Index(fields=("company_id", "created_at"), name="idx_tickets_company_created"),
+      Index(fields=("requester_id", "created_at"), name="idx_tickets_requester_created"),
+      Index(fields=("category_id", "created_at"), name="idx_tickets_category_created"),
+      Index(fields=("created_at",), name="idx_tickets_created_at"),
+      Index(fields=("closed_at",), name="idx_tickets_closed_at"),
+      Index(fields=("prevention_date",), name="idx_tickets_prevention_date"),
+      Index(fields=("updated_at",), name="idx_tickets_updated_at"),
+    )
   
-  async def to_dict_log(self) -> dict[str, any]:
+  async def to_dict_log(self, cc_employees: list | None = None) -> dict[str, any]:
+    """
+    Estado do ticket para os logs.
+    `cc_employees`: CCS já conhecidos (ex: preobtidos), evita uma nova query aos CCS.
+    """
     try:
-      company = await self.company
-      category = await self.category
-      subcategory = await self.subcategory if self.subcategory else None
-      status = await self.status
-      type_ = await self.type
-      priority = await self.priority
-      assistance_type = await self.assistance_type if self.assistance_type else None
-      created_by = await self.created_by if self.created_by else None
-      requester = await self.requester
-      agent = await self.agent if self.agent else None
-      ccs = [await cc.to_dict_employee_emails() for cc in await self.ccs.all()]
+      # As relações são lidas pelo identity map do pedido (ou usadas as preobtidas)
+      company = await _load_related(self, 'company')
+      category = await _load_related(self, 'category')
+      subcategory = await _load_related(self, 'subcategory')
+      status = await _load_related(self, 'status')
+      type_ = await _load_related(self, 'type')
+      priority = await _load_related(self, 'priority')
+      assistance_type = await _load_related(self, 'assistance_type')
+      created_by = await _load_related(self, 'created_by')
+      requester = await _load_related(self, 'requester')
+      agent = await _load_related(self, 'agent')
+      if cc_employees is None:
+        cc_employees = await self.ccs.all()
+      # Os emails de todos os CCS são carregados numa única query
+      _prime_employee_contacts(*(cc.id for cc in cc_employees))
+      ccs = [await cc.to_dict_employee_emails() for cc in cc_employees]
     except Exception as e:
       raise e
     
@@ -212,20 +240,29 @@ class Tickets(Model):
       "attachments": self.attachments_count
     }
   
-  async def to_dict_details(self):
+  async def to_dict_details(self, cc_employees: list | None = None):
+    """
+    Detalhes do ticket.
+    `cc_employees`: CCS já conhecidos (ex: preobtidos), evita uma nova query aos CCS.
+    """
     try:
-      category = await self.category.to_dict()
-      subcategory = await self.subcategory if self.subcategory else None
-      status = await self.status
-      priority = await self.priority
-      requester = await self.requester
-      agent = await self.agent if self.agent else None
+      # As relações são lidas pelo identity map do pedido (ou usadas as preobtidas)
+      category = await (await _load_related(self, 'category')).to_dict()
+      subcategory = await _load_related(self, 'subcategory')
+      status = await _load_related(self, 'status')
+      priority = await _load_related(self, 'priority')
+      requester = await _load_related(self, 'requester')
+      agent = await _load_related(self, 'agent')
       attachments = [attachment for attachment in await self.attachments.all()]
-      ccs = [await cc.to_dict_employee_emails() for cc in await self.ccs.all()]
-      created_by = await self.created_by if self.created_by else None
-      assistance_type = await self.assistance_type if self.assistance_type else None
-      type_ = await self.type
-      company = await self.company
+      if cc_employees is None:
+        cc_employees = await self.ccs.all()
+      # Os contactos do requerente, do técnico e dos CCS são carregados numa única query
+      _prime_employee_contacts(self.requester_id, self.agent_id, *(cc.id for cc in cc_employees))
+      ccs = [await cc.to_dict_employee_emails() for cc in cc_employees]
+      created_by = await _load_related(self, 'created_by')
+      assistance_type = await _load_related(self, 'assistance_type')
+      type_ = await _load_related(self, 'type')
+      company = await _load_related(self, 'company')
     except Exception as e:
       raise e
 
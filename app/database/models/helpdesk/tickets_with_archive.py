@@ -0,0 +1,59 @@
+from tortoise import fields
+from .tickets import Tickets
+from .ticket_logs import TicketLogs
+from .ticket_attachments import TicketAttachments
+
+# --- Tickets com o arquivo ---
+# Modelos só de leitura sobre as views da migração 0005, que juntam (UNION ALL) as tabelas ativas
+# e as tabelas de arquivo (tickets_archive, ticket_logs_archive, ...), para onde o comando
+# app.commands.archive_tickets move os tickets fechados há mais tempo.
+# Herdam as colunas e os métodos de serialização dos modelos originais; as FKs são redeclaradas
+# sem relação inversa, para não duplicar as relações dos modelos originais.
+# Só devem ser usados quando o pedido precisa do arquivo (ver ticket_archive.py).
+
+class TicketsWithArchive(Tickets):
+  company = fields.ForeignKeyField("helpdesk_models.Companies", related_name=False, db_column="company_id")
+  category = fields.ForeignKeyField("helpdesk_models.TicketCategories", related_name=False, db_column="category_id")
+  subcategory = fields.ForeignKeyField("helpdesk_models.TicketSubcategories", related_name=False, db_column="subcategory_id", null=True)
+  status = fields.ForeignKeyField("helpdesk_models.TicketStatuses", related_name=False, db_column="status_id", null=True)
+  type = fields.ForeignKeyField("helpdesk_models.TicketTypes", related_name=False, db_column="type_id")
+  priority = fields.ForeignKeyField("helpdesk_models.TicketPriorities", related_name=False, db_column="priority_id")
+  assistance_type = fields.ForeignKeyField("helpdesk_models.TicketAssistanceTypes", related_name=False, db_column="assistance_type_id")
+  created_by = fields.ForeignKeyField("helpdesk_models.Employees", related_name=False, db_column="created_by_id", null=True)
+  requester = fields.ForeignKeyField("helpdesk_models.Employees", related_name=False, db_column="requester_id")
+  agent = fields.ForeignKeyField("helpdesk_models.Employees", related_name=False, db_column="agent_id", null=True)
+
+  ccs = fields.ManyToManyField(
+    "helpdesk_models.Employees",
+    related_name='employee_ccs_with_archive',
+    through='tickets_ccs_with_archive',
+    backward_key="ticket_id",
+    forward_key="employee_id"
+  )
+
+  class Meta:
+    table = "tickets_with_archive"
+
+class TicketLogsWithArchive(TicketLogs):
+  target = fields.ForeignKeyField(
+    "helpdesk_models.TicketsWithArchive",
+    related_name="ticket_logs",
+    db_column="target_id"
+  )
+  agent = fields.ForeignKeyField("helpdesk_models.Employees", related_name=False, db_column="agent_id")
+
+  class Meta:
+    table = "ticket_logs_with_archive"
+
+class TicketAttachmentsWithArchive(TicketAttachments):
+  ticket = fields.ForeignKeyField(
+    "helpdesk_models.TicketsWithArchive",
+    related_name="attachments",
+    db_column="ticket_id"
+  )
+  agent = fields.ForeignKeyField("helpdesk_models.Employees", related_name=False, db_column="agent_id", null=True)
+
+  class Meta:
+    table = "ticket_attachments_with_archive"
+
+# --- Fim dos tickets com o arquivo ---
@@ -19,20 +19,30 @@ load_dotenv(dotenv_path='.env.dev')
 # --- Variavéis do .env já estão carregadas  ---
 
 from app.database.database import init_db, close_db, keep_connection_alive
+from app.utils.helpers.tickets.preset_counters import _seed_preset_counters, reconcile_preset_counters_periodically
+from app.utils.helpers.tickets.ticket_suggest import _build_ticket_suggest_index, rebuild_ticket_suggest_index_periodically
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
   app.state.http_client = httpx.AsyncClient()
   await init_db()
   keepalive_task = asyncio.create_task(keep_connection_alive())
+  # Contadores dos presets em memória, reconciliados periodicamente com a base de dados
+  await _seed_preset_counters()
+  reconcile_task = asyncio.create_task(reconcile_preset_counters_periodically())
+  # Índice de prefixos das sugestões da pesquisa (atualizado pelo hook de alteração de tickets e
+  # reconstruído periodicamente)
+  await _build_ticket_suggest_index()
+  suggest_rebuild_task = asyncio.create_task(rebuild_ticket_suggest_index_periodically())
   try:
     yield
   finally:
-    keepalive_task.cancel()
-    try:
-      await keepalive_task
-    except asyncio.CancelledError:
-      pass
+    for task in (keepalive_task, reconcile_task, suggest_rebuild_task):
+      task.cancel()
+      try:
+        await task
+      except asyncio.CancelledError:
+        pass
     await close_db()
     await app.state.http_client.aclose()
   
@@ -48,6 +58,20 @@ app.add_middleware(
   allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def request_scope_middleware(request: Request, call_next):
+  # Cada pedido tem o seu próprio loader de contactos dos colaboradores e o seu próprio identity map
+  from app.utils.helpers.employees.contact_loader import _employee_contacts_loader, _reset_employee_contacts_loader
+  from app.utils.helpers.identity_map import _identity_map, _reset_identity_map
+
+  token = _reset_employee_contacts_loader()
+  identity_map_token = _reset_identity_map()
+  try:
+    return await call_next(request)
+  finally:
+    _identity_map.reset(identity_map_token)
+    _employee_contacts_loader.reset(token)
+
 @app.middleware("http")
 async def service_handshake_middleware(request:Request, call_next):
   # Import moved inside to avoid potential circular dependencies at startup
@@ -13,13 +13,14 @@ from app.schemas.companies.companies import (
   CompanyUpdate,
 )
 from app.services.users import fetch_current_user
+from app.utils.helpers.responses import FastJSONResponse, _fast_response
 
 router = APIRouter(prefix="/companies", tags=["Companies"])
 
-@router.get("")
+@router.get("", response_class=FastJSONResponse)
 async def fetch_companies():
   try:
-    return await handle_fetch_companies()
+    return _fast_response(await handle_fetch_companies())
   except Exception as e:
     raise e
 
@@ -42,6 +43,7 @@ async def fetch_companies_management(
   search: str | None = None,
   and_filters: str | None = None,
   order_by: str | None = None,
+  count: str = Query("exact", pattern="^(exact|cached|none)$", description="Total count mode: exact, cached or none"),
 ):
   query_params = dict(request.query_params)
   companies_data = await handle_fetch_companies_management(
@@ -52,6 +54,7 @@ async def fetch_companies_management(
     search,
     and_filters,
     order_by,
+    count,
   )
   return companies_data
 
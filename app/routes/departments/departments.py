@@ -8,6 +8,7 @@ from app.controllers.departments.departments import (
   handle_deactivate_department,
 )
 from app.schemas.departments import DepartmentCreation, DepartmentsUpdate
+from app.utils.helpers.responses import FastJSONResponse, _fast_response
 
 router = APIRouter(prefix="/departments", tags=["Departments"])
 
@@ -23,13 +24,13 @@ async def create_new_department(department_data: DepartmentCreation):
   except Exception as e:
     raise e
 
-@router.get("")
+@router.get("", response_class=FastJSONResponse)
 async def get_all_departments():
   """
   Fetches all departments.
   """
   try:
-    return await handle_fetch_departments()
+    return _fast_response(await handle_fetch_departments())
   except Exception as e:
     raise e
 
@@ -41,6 +42,7 @@ async def fetch_departments_management(
   search: str | None = None,
   and_filters: str | None = None,
   order_by: str | None = None,
+  count: str = Query("exact", pattern="^(exact|cached|none)$", description="Total count mode: exact, cached or none"),
 ):
   query_params = dict(request.query_params)
   companies_data = await handle_fetch_departments_management(
@@ -51,6 +53,7 @@ async def fetch_departments_management(
     search,
     and_filters,
     order_by,
+    count,
   )
   return companies_data
 
@@ -2,12 +2,13 @@ from fastapi import APIRouter, Depends
 from app.controllers.tickets.assistance_types.ticket_assistance_types import (
   handle_fetch_ticket_assistance_types,
 )
+from app.utils.helpers.responses import FastJSONResponse, _fast_response
 
 router = APIRouter(prefix="/ticket-assistance-types", tags=["Ticket Assitance Types"])
 
-@router.get("")
+@router.get("", response_class=FastJSONResponse)
 async def fetch_ticket_assistance_types():
   try:
-    return await handle_fetch_ticket_assistance_types()
+    return _fast_response(await handle_fetch_ticket_assistance_types())
   except Exception as e:
     raise e
\ No newline at end of file
@@ -9,6 +9,7 @@ from app.controllers.tickets.categories.ticket_categories import (
   handle_delete_ticket_category,
 )
 from app.controllers.users import handle_fetch_current_user
+from app.utils.helpers.responses import FastJSONResponse, _fast_response
 
 
 router = APIRouter(prefix="/ticket-categories", tags=["Ticket Categories"])
@@ -19,9 +20,9 @@ async def create_ticket_category(
 ):
   return await handle_create_ticket_category(category_data.model_dump())
 
-@router.get("")
+@router.get("", response_class=FastJSONResponse)
 async def read_ticket_categories(company_id:int | None = None):
-  return await handle_fetch_all_ticket_categories(company_id)
+  return _fast_response(await handle_fetch_all_ticket_categories(company_id))
 
 @router.get("/details")
 async def read_tickets(
@@ -32,6 +33,7 @@ async def read_tickets(
   search: str | None = None,
   and_filters: str | None = None,
   order_by: str | None = None,
+  count: str = Query("exact", pattern="^(exact|cached|none)$", description="Total count mode: exact, cached or none"),
 ):
   query_params = dict(request.query_params)
   tickets_data = await handle_fetch_ticket_categories(
@@ -43,6 +45,7 @@ async def read_tickets(
     and_filters,
     order_by,
     query_params,
+    count,
   )
   return tickets_data
 
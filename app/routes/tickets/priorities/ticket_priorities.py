@@ -2,12 +2,13 @@ from fastapi import APIRouter, Depends
 from app.controllers.tickets.priorities.ticket_priorities import (
   handle_fetch_ticket_priorities,
 )
+from app.utils.helpers.responses import FastJSONResponse, _fast_response
 
 router = APIRouter(prefix="/ticket-priorities", tags=["Ticket Priorities"])
 
-@router.get("")
+@router.get("", response_class=FastJSONResponse)
 async def fetch_ticket_priorities():
   try:
-    return await handle_fetch_ticket_priorities()
+    return _fast_response(await handle_fetch_ticket_priorities())
   except Exception as e:
     raise e
\ No newline at end of file
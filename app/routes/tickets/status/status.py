@@ -2,12 +2,13 @@ from fastapi import APIRouter, Depends
 from app.controllers.tickets.status import (
   handle_fetch_ticket_statuses,
 )
+from app.utils.helpers.responses import FastJSONResponse, _fast_response
 
 router = APIRouter(prefix="/ticket-status", tags=["Ticket Status"])
 
-@router.get("")
+@router.get("", response_class=FastJSONResponse)
 async def fetch_ticket_types():
   try:
-    return await handle_fetch_ticket_statuses()
+    return _fast_response(await handle_fetch_ticket_statuses())
   except Exception as e:
     raise e
\ No newline at end of file
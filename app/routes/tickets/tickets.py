@@ -1,13 +1,17 @@
 from fastapi import APIRouter, Request, Query, Depends, UploadFile, File
-from app.schemas.tickets import BaseCreateTicket, BaseUpdateTicket
+from app.schemas.tickets import BaseCreateTicket, BaseUpdateTicket, BaseBulkUpdateTickets
 from app.controllers.users import  handle_fetch_current_user
 from app.utils.helpers.token import validate_optional_access_token, validate_access_token
+from app.utils.helpers.responses import FastJSONResponse, _fast_response
 from app.controllers.tickets import (
   handle_ticket_creation,
   handle_fetch_tickets,
   handle_fetch_ticket_details,
   handle_update_ticket,
+  handle_bulk_update_tickets,
   handle_preset_counts,
+  handle_fetch_ticket_facets,
+  handle_fetch_ticket_suggestions,
   handle_fetch_ticket_logs,
   handle_fetch_ticket_file,
 )
@@ -26,7 +30,7 @@ async def create_ticket(
     current_user=current_user
   )
 
-@router.get("")
+@router.get("", response_class=FastJSONResponse)
 async def read_tickets(
   request: Request,
   page: int = Query(1, ge=1, description="Page number"),
@@ -36,6 +40,10 @@ async def read_tickets(
   search: str | None = None,
   and_filters: str | None = None,
   order_by: str | None = None,
+  cursor: str | None = Query(None, description="Cursor (next_cursor) for keyset pagination"),
+  count: str = Query("exact", pattern="^(exact|cached|none)$", description="Total count mode: exact, cached or none"),
+  fields: str | None = Query(None, description="Comma-separated fields to return"),
+  exclude: str | None = Query(None, description="Comma-separated fields to leave out"),
 ):
   query_params = dict(request.query_params)
   tickets_data = await handle_fetch_tickets(
@@ -48,15 +56,28 @@ async def read_tickets(
     search,
     and_filters,
     order_by,
+    cursor,
+    count,
+    fields,
+    exclude,
+    request.headers.get("if-none-match"),
   )
-  return tickets_data
+  return _fast_response(tickets_data)
 
-@router.get("/details/{uid}")
+@router.get("/details/{uid}", response_class=FastJSONResponse)
 async def get_ticket_details(
-  uid: str
+  request: Request,
+  uid: str,
+  fields: str | None = Query(None, description="Comma-separated fields to return"),
+  exclude: str | None = Query(None, description="Comma-separated fields to leave out"),
 ):
-  ticket_details = await handle_fetch_ticket_details(uid)
-  return ticket_details
+  ticket_details = await handle_fetch_ticket_details(
+    uid,
+    fields=fields,
+    exclude=exclude,
+    if_none_match=request.headers.get("if-none-match")
+  )
+  return _fast_response(ticket_details)
 
 @router.put("/details/{uid}")
 async def update_ticket(
@@ -73,6 +94,40 @@ async def update_ticket(
   )
   return updated_ticket
 
+@router.patch("/bulk")
+async def bulk_update_tickets(
+  bulk_data: BaseBulkUpdateTickets,
+  current_user: dict = Depends(handle_fetch_current_user)
+):
+  return await handle_bulk_update_tickets(bulk_data, current_user)
+
+@router.get("/facets", response_class=FastJSONResponse)
+async def get_ticket_facets(
+  request: Request,
+  current_user: dict = Depends(handle_fetch_current_user),
+  own: bool | None = False,
+  search: str | None = None,
+  and_filters: str | None = None,
+  facets: str | None = Query(None, description="Comma-separated facets (e.g. status_id,priority_id)"),
+):
+  ticket_facets = await handle_fetch_ticket_facets(
+    request.url.path,
+    current_user,
+    own,
+    search,
+    and_filters,
+    facets,
+  )
+  return _fast_response(ticket_facets)
+
+@router.get("/suggest", response_class=FastJSONResponse)
+async def get_ticket_suggestions(
+  q: str = Query(..., min_length=1, max_length=100, description="Text typed in the search box"),
+  limit: int = Query(10, ge=1, le=50, description="Maximum number of suggestions"),
+  current_user: dict = Depends(handle_fetch_current_user),
+):
+  return await handle_fetch_ticket_suggestions(q, limit)
+
 @router.get("/presets")
 async def get_ticket_presets_count(
   current_user: dict = Depends(handle_fetch_current_user),
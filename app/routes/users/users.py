@@ -22,6 +22,7 @@ from app.controllers.users import (
 )
 from app.schemas.users import UserCreate, UserResponse, UserUpdate, UserAuthentication, EmailForm, CodeForm, RecoveryForm
 from app.utils.helpers.token import validate_access_token, validate_refresh_token
+from app.utils.helpers.responses import FastJSONResponse, _fast_response
 from app.utils.keys import verify_jwt
 
 router = APIRouter(prefix="/employees", tags=["Users"])
@@ -30,7 +31,7 @@ router = APIRouter(prefix="/employees", tags=["Users"])
 async def create_user(user: UserCreate):
   return await add_user(user, {"id":1})
 
-@router.get("")
+@router.get("", response_class=FastJSONResponse)
 async def read_users(
   request: Request,
   page: int = Query(1, ge=1, description="Page number"),
@@ -38,6 +39,7 @@ async def read_users(
   and_filters: str | None = None,
   order_by: str | None = None,
   search: str | None = None,
+  count: str = Query("exact", pattern="^(exact|cached|none)$", description="Total count mode: exact, cached or none"),
 ):
   query_params = dict(request.query_params)
   users_data = await handle_fetch_users(
@@ -47,13 +49,14 @@ async def read_users(
     original_query_params=query_params,
     search=search,
     and_filters=and_filters,
-    order_by=order_by
+    order_by=order_by,
+    count=count
   )
-  return users_data
+  return _fast_response(users_data)
 
-@router.get("/details/{id}")
+@router.get("/details/{id}", response_class=FastJSONResponse)
 async def get_user_details(id: int):
-  return await fetch_user_details(id)
+  return _fast_response(await fetch_user_details(id))
 
 @router.put("/details/{id}")
 async def update_user_details(id:int, user_data: UserUpdate, current_user: dict = Depends(handle_fetch_current_user)):
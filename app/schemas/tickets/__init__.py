@@ -1,4 +1,6 @@
 from .tickets import (
   BaseCreateTicket,
   BaseUpdateTicket,
+  BaseBulkTicketChanges,
+  BaseBulkUpdateTickets,
 )
\ No newline at end of file
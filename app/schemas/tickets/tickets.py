@@ -237,4 +237,16 @@ class BaseUpdateTicket(BaseModel):
       supplier_reference=supplier_reference,
       ccs=parsed_ccs
     )
-    
\ No newline at end of file
+    
+class BaseBulkTicketChanges(BaseModel):
+  # Só os campos enviados são alterados (agent_id: null retira o técnico)
+  agent_id: int | None = None
+  status_id: int | None = None
+  priority_id: int | None = None
+  category_id: int | None = None
+
+class BaseBulkUpdateTickets(BaseModel):
+  # Tickets a alterar: uma lista de uids ou um filtro (mesmo formato do and_filters da listagem)
+  uids: list[str] | None = None
+  and_filters: dict | None = None
+  changes: BaseBulkTicketChanges
@@ -6,6 +6,9 @@ from app.database.models.helpdesk import (
 from app.utils.errors.exceptions import CustomError
 from tortoise.transactions import in_transaction
 from tortoise.exceptions import IntegrityError, DoesNotExist
+from app.utils.helpers.name_index import _invalidate_search_name_index
+from app.utils.helpers.ticket_details_cache import _invalidate_ticket_details_for
+from app.utils.helpers.tickets.ticket_versions import _bump_entity_version
 from app.utils.helpers.companies.company_helpers import (
   _validate_company_creation_data,
   _create_locals_for_company,
@@ -72,7 +75,11 @@ async def create_company(company_data: dict) -> Companies:
       if category_ids_to_link:
         await _associate_ticket_categories_with_company(new_company, category_ids_to_link)
       
-      return new_company
+      _invalidate_search_name_index()
+
+    # O nome da nova empresa passa a estar disponível na pesquisa de tickets dos outros processos
+    await _bump_entity_version("Companies")
+    return new_company
 
   except IntegrityError as e:
     logger.error(f"Integrity error creating company '{company_name}': {e}", exc_info=True)
@@ -144,7 +151,9 @@ async def fetch_companies_management(
     # Dict para pesquisa especifica (AND)
     and_filters: dict[str, any] | None,
     # Campos para ordenação, usar o prefixo '-' para descendente
-    order_by: str | None
+    order_by: str | None,
+    # Modo de contagem do total: exact, cached ou none
+    count: str = "exact"
   ):
   start = time.time()
   
@@ -170,6 +179,8 @@ async def fetch_companies_management(
       page=page,
       page_size=page_size,
       original_query_params=original_query_params,
+      count=count,
+      count_key={"and_filters": and_filters, "search": search},
       distinct=True
     )
     
@@ -268,7 +279,14 @@ async def update_company_details(company_id: int, company_data: dict) -> Compani
         'company_local_relations', 
         'company_ticket_categories'
       ).get()
-      return updated_company
+      _invalidate_search_name_index()
+
+    # Os detalhes dos tickets incluem a empresa (do ticket, dos colaboradores e das categorias)
+    _invalidate_ticket_details_for("Companies", company_id)
+    _invalidate_ticket_details_for("TicketCategories", *company_data_dict.get("ticket_category_ids") or [])
+    # ... e os ETags dos tickets mudam
+    await _bump_entity_version("Companies", "TicketCategories")
+    return updated_company
 
   except DoesNotExist:
     logger.warning(f"Empresa com ID {company_id} não encontrada para atualização.")
@@ -12,6 +12,8 @@ from ...utils.helpers.filtering import (
   _apply_ordering, 
 )
 from app.utils.helpers.paginate import paginate
+from app.utils.helpers.ticket_details_cache import _invalidate_ticket_details_for
+from app.utils.helpers.tickets.ticket_versions import _bump_entity_version
 import time
 
 logger = logging.getLogger(__name__)
@@ -129,7 +131,9 @@ async def fetch_departments_management(
     # Dict para pesquisa especifica (AND)
     and_filters: dict[str, any] | None,
     # Campos para ordenação, usar o prefixo '-' para descendente
-    order_by: str | None
+    order_by: str | None,
+    # Modo de contagem do total: exact, cached ou none
+    count: str = "exact"
   ):
   start = time.time()
   
@@ -151,6 +155,8 @@ async def fetch_departments_management(
       page=page,
       page_size=page_size,
       original_query_params=original_query_params,
+      count=count,
+      count_key={"and_filters": and_filters, "search": search},
     )
     
   except Exception as e:
@@ -274,7 +280,11 @@ async def update_department_details(department_id: int, department_data: dict) -
 
       # Refetch para garantir que todas as relações estejam populadas e atualizadas no objeto devolvido
       updated_department = await Departments.filter(id=department_id).prefetch_related('companies').get()
-      return updated_department.to_dict_with_companies()
+
+    # O nome do departamento aparece nos detalhes dos tickets (requerente e técnico)
+    _invalidate_ticket_details_for("Departments", department_id)
+    await _bump_entity_version("Departments")
+    return updated_department.to_dict_with_companies()
 
   except DoesNotExist:
     logger.warning(f"Departamento com ID {department_id} não encontrado para atualização.")
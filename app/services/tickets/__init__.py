@@ -1,9 +1,16 @@
 from .tickets import (
   create_ticket,
   fetch_tickets,
+  fetch_tickets_version,
+  fetch_tickets_etag,
   fetch_ticket_details,
+  fetch_ticket_details_version,
+  fetch_ticket_details_etag,
   update_ticket_details,
+  bulk_update_tickets,
   fetch_preset_counts,
+  fetch_ticket_facets,
+  fetch_ticket_suggestions,
   fetch_ticket_logs,
   fetch_ticket_file,
 )
\ No newline at end of file
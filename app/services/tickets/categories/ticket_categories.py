@@ -7,6 +7,9 @@ from app.database.models.helpdesk import (
 from app.utils.errors.exceptions import CustomError
 from app.utils.helpers.tickets.categories.ticket_categories import _validate_category_name, _apply_filters
 from app.utils.helpers.paginate import paginate
+from app.utils.helpers.name_index import _invalidate_search_name_index
+from app.utils.helpers.ticket_details_cache import _invalidate_ticket_details_for
+from app.utils.helpers.tickets.ticket_versions import _bump_entity_version
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +40,9 @@ async def create_ticket_category(category_data: dict) -> TicketCategories:
     if company_ids:
       companies_to_add = await Companies.filter(id__in=company_ids, deactivated_at__isnull=True).all()
       await new_category.companies.add(*companies_to_add)
+    # O nome da nova categoria passa a estar disponível na pesquisa de tickets (também nos outros processos)
+    _invalidate_search_name_index()
+    await _bump_entity_version("TicketCategories")
     return new_category
 
   except CustomError as e:
@@ -58,7 +64,8 @@ async def fetch_ticket_categories(
   search: str | None = None,
   and_filters: dict[str, any] | None = None,
   order_by: str | None = None,
-  original_query_params: dict | None = None
+  original_query_params: dict | None = None,
+  count: str = "exact"
   ) -> dict[str, any]:
   """
   Obtém uma lista paginada de categorias de tickets, com filtros e ordenação.
@@ -73,6 +80,7 @@ async def fetch_ticket_categories(
                                   Ex: {"name": "Support", "companies": 1}
     order_by (str, opcional): Campos para ordenação (ex: "name,-id").
     original_query_params (dict, opcional): Parâmetros originais da query para reconstruir URLs de paginação.
+    count (str, opcional): Modo de contagem do total ("exact", "cached" ou "none").
 
   Returns:
     dict[str, any]: Um dicionário com dados de paginação e a lista de categorias.
@@ -93,7 +101,9 @@ async def fetch_ticket_categories(
       url=path,
       page=page,
       page_size=page_size,
-      original_query_params=original_query_params
+      original_query_params=original_query_params,
+      count=count,
+      count_key={"and_filters": and_filters, "search": search}
     )
     return paginated_result
 
@@ -238,6 +248,10 @@ async def update_ticket_category(category_id: int, category_data: dict) -> Ticke
             str(sub_exc)
           ) from sub_exc
 
+    # Os nomes da categoria e das subcategorias podem ter mudado
+    _invalidate_search_name_index()
+    _invalidate_ticket_details_for("TicketCategories", category_id)
+    await _bump_entity_version("TicketCategories", "TicketSubcategories")
     return category_to_update
 
   except CustomError as e:
@@ -268,6 +282,8 @@ async def delete_ticket_category(category_id: int) -> None:
 
     category_to_delete.active = False
     await category_to_delete.save()
+    _invalidate_ticket_details_for("TicketCategories", category_id)
+    await _bump_entity_version("TicketCategories")
   
   except CustomError as e:
     raise e
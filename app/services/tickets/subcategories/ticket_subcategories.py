@@ -1,6 +1,9 @@
 import logging
 from app.database.models.helpdesk import TicketSubcategories
 from app.utils.errors.exceptions import CustomError
+from app.utils.helpers.name_index import _invalidate_search_name_index
+from app.utils.helpers.ticket_details_cache import _invalidate_ticket_details_for
+from app.utils.helpers.tickets.ticket_versions import _bump_entity_version
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +27,11 @@ async def delete_ticket_subcategory(subcategory_id: int) -> None:
       )
 
     await subcategory_to_delete.delete()
+    # A subcategoria deixa de poder ser encontrada pela pesquisa de tickets
+    _invalidate_search_name_index()
+    # A subcategoria aparece nos detalhes dos tickets (subcategoria do ticket e subcategorias da categoria)
+    _invalidate_ticket_details_for("TicketSubcategories", subcategory_id)
+    await _bump_entity_version("TicketSubcategories")
     logger.info(f"Subcategoria de ticket com ID {subcategory_id} eliminada com sucesso.")
 
   except CustomError as e:
@@ -1,5 +1,6 @@
 from tortoise.expressions import Q
-from app.database.models.helpdesk import Tickets, TicketLogs, TicketPresets
+from app.schemas.tickets import BaseBulkUpdateTickets
+from app.database.models.helpdesk import Tickets, TicketLogs, TicketPresets, TicketsWithArchive, TicketLogsWithArchive
 from app.utils.helpers.tickets import (
   _handle_ticket_creation_ccs,
   _handle_file_uploads,
@@ -8,26 +9,62 @@ from app.utils.helpers.tickets import (
   # _authorize_ticket_update,
   _prepare_update_data,
   _apply_direct_updates,
+  _ticket_save_fields,
   _handle_automatic_status_update,
   _handle_closed_at_update,
   _handle_ccs_update,
+  _refresh_changed_relations,
   _handle_update_logging,
   _handle_update_notifications,
   _apply_filters,
+  DEFAULT_ORDER_BY,
   _fetch_attachment,
   _construct_file_path,
   _check_file_existance,
   _determine_media_type,
+  _fetch_ticket_list_page,
+  _resolve_sparse_fields,
+  TICKET_LIST_COLUMNS,
+  _fetch_ticket_details_sparse,
+  TICKET_DETAILS_FIELDS,
+  _ticket_details_version,
+  _ticket_details_etag,
+  _ticket_list_version,
+  _ticket_list_etag,
+  _ticket_list_cache_key,
+  _get_cached_ticket_list,
+  _cache_ticket_list,
+  _notify_ticket_change,
+  _log_ticket_filter_shape,
+  _count_presets,
+  _get_preset_counts,
+  _preset_ticket_state,
+  _record_preset_change,
+  _preset_result_filter,
+  _resolve_facets,
+  _fetch_ticket_facets,
+  _suggest_tickets,
+  _check_ticket_filter_cost,
+  _ticket_statement_timeout,
+  _ticket_model_for_filters,
+  TICKET_BULK_UPDATE_MAX_TICKETS,
+  _has_bulk_filter_conditions,
+  _validate_bulk_changes,
+  _plan_bulk_ticket_update,
+  _bulk_log_names,
+  _bulk_log_values,
+  _schedule_bulk_notifications,
 )
+from app.utils.helpers.name_index import _ensure_search_name_index
+from app.utils.helpers.ticket_details_cache import _get_cached_ticket_details, _cache_ticket_details, _ticket_details_generation
 from app.utils.errors.exceptions import CustomError
 from app.utils.helpers.paginate import paginate
 from datetime import datetime, timezone
 from app.services.logs import LogService
-from tortoise.functions import Count
 from tortoise.transactions import in_transaction
 from fastapi import UploadFile
 from fastapi.responses import FileResponse
-import json
+from functools import partial
 import time
 import logging
 
@@ -55,6 +92,7 @@ async def create_ticket(
         ticket_dict['created_by_id'] = current_user['id']
 
       ticket_dict['created_at'] = datetime.now(timezone.utc)
+      ticket_dict['updated_at'] = ticket_dict['created_at']
       
       if not ticket_dict.get('status_id', None):
         if ticket_dict['agent_id'] != None:
@@ -100,6 +138,10 @@ async def create_ticket(
       logger.error(f"Error during transaction, rollback initiated: {e}", exc_info=True)
       raise CustomError(500, "Ocorreu um erro durante a criação do ticket ou processamento de anexos", str(e)) from e
 
+  # O novo ticket altera as listagens (caches de páginas e totais) e os contadores dos presets
+  await _notify_ticket_change(new_ticket_orm.id)
+  _record_preset_change(None, _preset_ticket_state(new_ticket_orm))
+
   # Envia o email de confirmação para o cliente com técnico (se houver) e os utilizadores selecionados como ccs em cc
   try:
     await _handle_ticket_emails(new_ticket_orm, updated_ticket_details, "create")
@@ -130,68 +172,145 @@ async def fetch_tickets(
   # Dict para pesquisa especifica (AND)
   and_filters: dict[str, any] | None,
   # Campos para ordenação, usar o prefixo '-' para descendente
-  order_by: str | None
+  order_by: str | None,
+  # Cursor devolvido em "next_cursor" para paginação por keyset
+  cursor: str | None = None,
+  # Modo de contagem do total: exact, cached ou none
+  count: str = "exact",
+  # Campos a devolver / a excluir, separados por vírgula
+  fields: str | None = None,
+  exclude: str | None = None,
+  # Versão da listagem já lida para o ETag (ver fetch_tickets_version)
+  version: any = None
   ) -> dict:
   start = time.time()
-  queryset = Tickets.all()
+  selected_fields = _resolve_sparse_fields(fields, exclude, tuple(TICKET_LIST_COLUMNS))
+  # Regista os campos usados nos filtros (lido pelo app.commands.ticket_index_advisor)
+  _log_ticket_filter_shape(and_filters, search, order_by, own)
+
+  # As listagens mais usadas são servidas da cache até um ticket ser criado ou alterado.
+  # A versão faz parte da chave: uma página só é reutilizada com a versão do ETag enviado.
+  if version is None:
+    version = await _ticket_list_version()
+  cache_key = _ticket_list_cache_key(
+    version=version,
+    path=path,
+    and_filters=and_filters,
+    search=search,
+    order_by=order_by,
+    page=page,
+    page_size=page_size,
+    cursor=cursor,
+    count=count,
+    fields=selected_fields,
+    own=current_user['id'] if own else None,
+  )
+  cached_page = _get_cached_ticket_list(cache_key)
+  if cached_page is not None:
+    return {**cached_page, "timings": {"cached": True}}
+  # Os tickets arquivados só são incluídos se os filtros de datas precisarem deles (ver ticket_archive.py)
+  ticket_model = await _ticket_model_for_filters(and_filters)
+  queryset = ticket_model.all()
   if own:
     queryset = queryset.filter(Q(agent_id=current_user['id']))
 
   # Aplica os filtros
+  if search:
+    await _ensure_search_name_index()
   queryset = _apply_filters(queryset, and_filters, search, order_by)
-  # Annotate com count para obter a contagem dos attachments em vez dos attachments
-  queryset = queryset.annotate(attachments_count=Count("attachments"))
-  
-  queryset = queryset.prefetch_related(
-    'status',
-    'priority',
-    'category',
-    'subcategory',
-    'requester',
-    'requester__department',
-    'requester__company',
-    'requester__local',
-    'requester__employee_relation',
-    'agent'
-  )
-
+  # Rejeita as combinações de filtros demasiado pesadas (ver ticket_filter_cost.py)
+  filter_cost = _check_ticket_filter_cost(queryset, and_filters, search)
   # Helper de paginação
+  # A página é obtida numa única projeção com joins (sem prefetch nem awaits por linha)
   try:
-    paginated_result = await paginate(
-      queryset=queryset,
-      url=path,
-      page=page,
-      page_size=page_size,
-      original_query_params=original_query_params,
-    )
+    async with _ticket_statement_timeout(queryset, filter_cost) as queryset:
+      paginated_result = await paginate(
+        queryset=queryset,
+        url=path,
+        page=page,
+        page_size=page_size,
+        original_query_params=original_query_params,
+        order_by=order_by or DEFAULT_ORDER_BY,
+        cursor=cursor,
+        fetch_page=partial(_fetch_ticket_list_page, selected=selected_fields),
+        count=count,
+        count_key={
+          "and_filters": and_filters,
+          "search": search,
+          "own": current_user['id'] if own else None,
+        },
+      )
+  except CustomError as e:
+    raise e
   except Exception as e:
     logger.error(f"Error during ticket pagination: {e}", exc_info=True)
     raise CustomError(500, "Erro ao processar a lista de tickets.", str(e)) from e
 
+  _cache_ticket_list(cache_key, paginated_result)
+
   end = time.time()
   logger.info(f"fetch_tickets execution time: {end-start:.4f}s")
   return paginated_result
 
+async def fetch_tickets_version() -> any:
+  """Versão da listagem, usada no ETag e na chave da cache das páginas."""
+  return await _ticket_list_version()
+
+def fetch_tickets_etag(version: any, current_user: dict, own: bool | None, original_query_params: dict | None) -> str:
+  """ETag da página pedida, calculado sem executar a listagem."""
+  return _ticket_list_etag(version, original_query_params, current_user['id'] if own else None)
+
 # --- Fim do get de todos os tickets ---
 
 # --- Inicio do get dos detalhes de um ticket pelo uid ---
   
-async def fetch_ticket_details(uid: str) -> dict:
+async def fetch_ticket_details(
+  uid: str,
+  fields: str | None = None,
+  exclude: str | None = None,
+  # Versão do ticket já lida para o ETag (ver fetch_ticket_details_version)
+  version: tuple | None = None
+) -> dict:
   try:
-    ticket = await Tickets.get_or_none(uid=uid).prefetch_related(
-      'status',
-      'priority',
-      'category',
-      'subcategory',
-      'requester',
-      'agent',
-      'company',
-      'ccs',
-      'attachments',
-      'type',
-      'assistance_type',
-      'created_by'
-    )
+    selected_fields = _resolve_sparse_fields(fields, exclude, TICKET_DETAILS_FIELDS)
+    if selected_fields is not None:
+      # Só lê as colunas e as relações pedidas
+      ticket_details = await _fetch_ticket_details_sparse(uid, selected_fields)
+      if ticket_details is None:
+        # O ticket pode ter sido arquivado (ver ticket_archive.py)
+        ticket_details = await _fetch_ticket_details_sparse(uid, selected_fields, TicketsWithArchive)
+      if ticket_details is None:
+        logger.warning(f"Ticket not found with UID: {uid}")
+        raise CustomError(404, "Ticket não encontrado", f"Nenhum ticket encontrado com o UID: {uid}")
+      return ticket_details
+
+    # Detalhes completos já serializados (ver ticket_details_cache.py), válidos só para a versão do ETag
+    cache_generation = _ticket_details_generation()
+    if version is None:
+      version = await _ticket_details_version(uid)
+    cached_details = _get_cached_ticket_details(uid, version)
+    if cached_details is not None:
+      return cached_details
+
+    ticket = None
+    # Procura primeiro nos tickets ativos e só depois no arquivo (ver ticket_archive.py)
+    for ticket_model in (Tickets, TicketsWithArchive):
+      ticket = await ticket_model.get_or_none(uid=uid).prefetch_related(
+        'status',
+        'priority',
+        'category',
+        'subcategory',
+        'requester',
+        'agent',
+        'company',
+        'ccs',
+        'attachments',
+        'type',
+        'assistance_type',
+        'created_by'
+      )
+      if ticket:
+        break
 
     # Check if the ticket was found
     if not ticket:
@@ -200,7 +319,7 @@ async def fetch_ticket_details(uid: str) -> dict:
 
     # Serialize the ticket details using the specified method
     ticket_details = await ticket.to_dict_details()
-    return ticket_details
+    return _cache_ticket_details(uid, ticket_details, cache_generation, version)
 
   except CustomError as e:
     raise e
@@ -208,6 +327,14 @@ async def fetch_ticket_details(uid: str) -> dict:
   except Exception as e:
     raise CustomError(500, "Erro ao buscar detalhes do ticket", str(e)) from e
 
+async def fetch_ticket_details_version(uid: str) -> tuple | None:
+  """Versão do ticket, usada no ETag e para validar os detalhes em cache (None se não existir)."""
+  return await _ticket_details_version(uid)
+
+def fetch_ticket_details_etag(version: tuple | None, fields: str | None = None, exclude: str | None = None) -> str | None:
+  """ETag dos detalhes do ticket, ou None se o ticket não existir."""
+  return _ticket_details_etag(version, fields, exclude)
+
 # --- Fim do get dos detalhes de um ticket pelo uid ---
 
 # --- Inicio do update de um ticket pelo uid ---
@@ -219,11 +346,16 @@ async def update_ticket_details(
     files: list[UploadFile] | None = None
   ) -> dict:
 
+  # O ticket (com as relações e os CCS) é lido uma única vez: as alterações são aplicadas em memória
+  # e o estado final serve para o log, as notificações e a resposta, sem voltar a ler o ticket.
   ticket = await _get_ticket_for_update(uid)
   # _authorize_ticket_update(ticket, current_user)
   # Guarda o estado do ticket antes de qualquer alteração para logs e comparações
-  old_ticket_details = await ticket.to_dict_log()
+  cc_employees = list(ticket.ccs)
+  old_ticket_details = await ticket.to_dict_log(cc_employees)
+  preset_state_before = _preset_ticket_state(ticket)
   original_agent_id_value = ticket.agent_id # Capture the actual ID from the model original_status_id_value
+  original_status_id_value = ticket.status_id
 
   # Prepara os dados para o update
   update_data, ccs_ids_to_update = _prepare_update_data(ticket_data)
@@ -233,33 +365,41 @@ async def update_ticket_details(
     try:
       # --- Operações em transação ---
       # Aplica alterações nos campos diretos.
-      _apply_direct_updates(ticket, update_data)
+      ticket_changed = _apply_direct_updates(ticket, update_data)
       
-      # Lida com as alterações automáticas de estado
-      if original_agent_id_value:
-        assigned = _handle_automatic_status_update(ticket, update_data, original_agent_id_value)
+      # Lida com as alterações automáticas de estado (também quando o ticket ainda não tinha agente)
+      assigned = _handle_automatic_status_update(ticket, update_data, original_agent_id_value)
       
       # Lida com o estado "fechado"
-      _handle_closed_at_update(ticket, old_ticket_details)
+      _handle_closed_at_update(ticket, original_status_id_value)
       
       # Lida com o update dos CCS
-      await _handle_ccs_update(ticket, ccs_ids_to_update)
+      updated_ccs = await _handle_ccs_update(ticket, ccs_ids_to_update, cc_employees)
+      if updated_ccs is not None:
+        cc_employees = updated_ccs
+        ticket_changed = True
 
       # Lida com upload de ficheiros
-      if files:
-        await _handle_file_uploads(ticket, files, current_user)
-
-      # Guarda todas as alterações feitas
-      await ticket.save()
+      if files and await _handle_file_uploads(ticket, files, current_user):
+        ticket_changed = True
+
+      # Guarda todas as alterações feitas e atualiza a versão do ticket, num único UPDATE no fim:
+      # os helpers só indicam se alteraram alguma coisa. Um update sem alterações não escreve o ticket.
+      if ticket_changed:
+        ticket.updated_at = datetime.now(timezone.utc)
+        await ticket.save(update_fields=_ticket_save_fields())
+      preset_state_after = _preset_ticket_state(ticket)
       
       # Cria log das alterações
-      # Atualiza os detalhes atualizados do ticket com uma nova pesquisa na base de dados.
-      new_ticket_details = await _get_ticket_for_update(uid)
+      # Só as relações alteradas são lidas; o novo estado é comparado com o anterior em memória.
+      await _refresh_changed_relations(ticket)
+      new_ticket_details = await ticket.to_dict_log(cc_employees)
 
       # Passa a informação necessária para criar o log
       await _handle_update_logging(
-        new_ticket_details,
+        ticket.id,
         old_ticket_details,
+        new_ticket_details,
         ccs_ids_to_update,
         current_user['id']
       )
@@ -272,25 +412,203 @@ async def update_ticket_details(
       logger.error(f"Error during ticket update transaction for UID {uid}, rollback initiated: {e}", exc_info=True)
       raise CustomError(500, "Ocorreu um erro ao atualizar o ticket", str(e)) from e
   
+  # As alterações podem mudar o ticket de filtro (estado, agente, ...)
+  await _notify_ticket_change(ticket.id)
+  _record_preset_change(preset_state_before, preset_state_after)
+
+  try:
+    # Detalhes finais do ticket: usados no email e devolvidos na resposta
+    updated_ticket_details = await ticket.to_dict_details(cc_employees)
+
+  except Exception as e:
+    raise CustomError(500, "Erro ao obter detalhes atualizados do ticket após a atualização.", str(e)) from e
+
   # ---  Notifica o requerente ---
   # Envia email após todas as alterações.
   try:
-    await _handle_update_notifications(ticket, assigned)
+    await _handle_update_notifications(ticket, updated_ticket_details, assigned)
   except Exception as email_error:
     logger.error(f"Error sending update notification for ticket UID {uid}: {email_error}", exc_info=True)
 
-  try:
-    updated_ticket_details = await fetch_ticket_details(uid)
-    return updated_ticket_details
-
-  except CustomError as e:
-    raise e
-  
-  except Exception as e:
-    raise CustomError(500, "Erro ao obter detalhes atualizados do ticket após a atualização.", str(e)) from e
+  return updated_ticket_details
 
 # --- Fim da atualização de um ticket ---
 
+
+# --- Inicio da atualização em massa dos tickets ---
+
+async def bulk_update_tickets(bulk_data: BaseBulkUpdateTickets, current_user: dict) -> dict:
+  """
+  Aplica as mesmas alterações (agent_id, status_id, priority_id, category_id) a vários tickets,
+  escolhidos pelos uids ou pelo and_filters, numa única transação (ver ticket_bulk.py).
+
+  Returns:
+    O resumo e o resultado por ticket ("updated", "unchanged" ou "not_found").
+
+  Raises:
+    CustomError: Se o pedido for inválido ou abranger mais de TICKET_BULK_UPDATE_MAX_TICKETS tickets.
+  """
+  changes = bulk_data.changes.model_dump(exclude_unset=True)
+  if not changes:
+    raise CustomError(400, "Alteração inválida", "Indique pelo menos uma alteração (agent_id, status_id, priority_id ou category_id).")
+  if (bulk_data.uids is None) == (bulk_data.and_filters is None):
+    raise CustomError(400, "Seleção inválida", "Indique os tickets a alterar com 'uids' ou com 'and_filters' (apenas um).")
+  if bulk_data.uids is not None and not bulk_data.uids:
+    raise CustomError(400, "Seleção inválida", "A lista de uids está vazia.")
+  if bulk_data.and_filters is not None and not _has_bulk_filter_conditions(bulk_data.and_filters):
+    raise CustomError(400, "Seleção inválida", "O and_filters está vazio ou só tem valores em branco.")
+  await _validate_bulk_changes(changes)
+
+  # Só os tickets ativos podem ser alterados (os arquivados não estão na tabela tickets)
+  if bulk_data.uids is not None:
+    queryset = Tickets.filter(uid__in=list(dict.fromkeys(bulk_data.uids)))
+  else:
+    queryset = _apply_filters(Tickets.all(), bulk_data.and_filters)
+    # Rejeita as combinações de filtros demasiado pesadas (ver ticket_filter_cost.py)
+    _check_ticket_filter_cost(queryset, bulk_data.and_filters, None, context="bulk_update")
+
+  now = datetime.now(timezone.utc)
+  async with in_transaction('helpdesk') as conn:
+    try:
+      # Os tickets são lidos uma única vez (bloqueados até ao fim da transação)
+      tickets = await queryset.using_db(conn).select_for_update().limit(TICKET_BULK_UPDATE_MAX_TICKETS + 1)
+      if len(tickets) > TICKET_BULK_UPDATE_MAX_TICKETS:
+        raise CustomError(
+          400,
+          "Demasiados tickets",
+          f"A atualização em massa está limitada a {TICKET_BULK_UPDATE_MAX_TICKETS} tickets. Restrinja os filtros."
+        )
+
+      plans = {ticket.id: _plan_bulk_ticket_update(ticket, changes, now) for ticket in tickets}
+      changed_tickets = [ticket for ticket in tickets if plans[ticket.id]]
+      names = await _bulk_log_names(changed_tickets, plans)
+
+      # Um UPDATE por conjunto de alterações iguais (normalmente um ou dois)
+      ids_by_values: dict[tuple, list[int]] = {}
+      for ticket in changed_tickets:
+        ids_by_values.setdefault(tuple(sorted(plans[ticket.id].items())), []).append(ticket.id)
+      for values, ticket_ids in ids_by_values.items():
+        await Tickets.filter(id__in=ticket_ids).update(**dict(values), updated_at=now)
+
+      # Todos os logs são inseridos de uma só vez
+      log_values = {ticket.id: _bulk_log_values(ticket, plans[ticket.id], names) for ticket in changed_tickets}
+      await TicketLogs.bulk_create([
+        TicketLogs(
+          action_type="Atualizado",
+          agent_id=current_user['id'],
+          target_id=ticket.id,
+          old_values=log_values[ticket.id][0],
+          new_values=log_values[ticket.id][1],
+          details="Atualização em massa",
+        )
+        for ticket in changed_tickets
+      ])
+      # --- A Transação faz commit se não houver erros ---
+
+    except CustomError as e:
+      raise e
+
+    except Exception as e:
+      logger.error(f"Error during bulk ticket update, rollback initiated: {e}", exc_info=True)
+      raise CustomError(500, "Ocorreu um erro ao atualizar os tickets", str(e)) from e
+
+  # As alterações podem mudar os tickets de filtro (estado, agente, ...)
+  if changed_tickets:
+    await _notify_ticket_change(*(ticket.id for ticket in changed_tickets))
+  for ticket in changed_tickets:
+    preset_state_before = _preset_ticket_state(ticket)
+    preset_state_after = {
+      column: plans[ticket.id].get(column, now if column == 'updated_at' else value)
+      for column, value in preset_state_before.items()
+    }
+    _record_preset_change(preset_state_before, preset_state_after)
+
+  # ---  Notifica os requerentes ---
+  # Os emails são enviados em lotes depois da resposta (técnico atribuído, fechado ou reaberto)
+  _schedule_bulk_notifications([
+    (ticket.id, plans[ticket.id].get('agent_id') is not None)
+    for ticket in changed_tickets
+    if 'agent_id' in plans[ticket.id] or 'status_id' in plans[ticket.id]
+  ])
+
+  results = [
+    {"uid": ticket.uid, "result": "updated", "changes": log_values[ticket.id][1]} if plans[ticket.id]
+    else {"uid": ticket.uid, "result": "unchanged", "changes": {}}
+    for ticket in tickets
+  ]
+  if bulk_data.uids is not None:
+    found_uids = {ticket.uid for ticket in tickets}
+    results.extend(
+      {"uid": uid, "result": "not_found", "changes": {}}
+      for uid in dict.fromkeys(bulk_data.uids) if uid not in found_uids
+    )
+
+  return {
+    "summary": {
+      "matched": len(tickets),
+      "updated": len(changed_tickets),
+      "unchanged": len(tickets) - len(changed_tickets),
+      "not_found": sum(1 for result in results if result["result"] == "not_found"),
+    },
+    "data": results,
+  }
+
+# --- Fim da atualização em massa dos tickets ---
+
+# --- Inicio das facetas dos tickets ---
+
+async def fetch_ticket_facets(
+  path: str,
+  current_user: dict,
+  own: bool | None,
+  search: str | None,
+  and_filters: dict[str, any] | None,
+  facets: str | None = None
+) -> dict:
+  """
+  Calcula as contagens por faceta (estado, prioridade, categoria, técnico, empresa, ...)
+  para os mesmos filtros e pesquisa da listagem, numa única query (um GROUP BY por faceta).
+  O resultado fica na cache da listagem, invalidada sempre que um ticket é criado ou alterado.
+  """
+  selected_facets = _resolve_facets(facets)
+  cache_key = _ticket_list_cache_key(
+    path=path,
+    and_filters=and_filters,
+    search=search,
+    facets=selected_facets,
+    own=current_user['id'] if own else None,
+  )
+  cached_facets = _get_cached_ticket_list(cache_key)
+  if cached_facets is not None:
+    return cached_facets
+
+  queryset = (await _ticket_model_for_filters(and_filters)).all()
+  if own:
+    queryset = queryset.filter(Q(agent_id=current_user['id']))
+  if search:
+    await _ensure_search_name_index()
+  queryset = _apply_filters(queryset, and_filters, search)
+  filter_cost = _check_ticket_filter_cost(queryset, and_filters, search, context="facets")
+
+  async with _ticket_statement_timeout(queryset, filter_cost) as queryset:
+    result = {"facets": await _fetch_ticket_facets(queryset, selected_facets)}
+  _cache_ticket_list(cache_key, result)
+  return result
+
+# --- Fim das facetas dos tickets ---
+
+# --- Inicio das sugestões da pesquisa ---
+
+def fetch_ticket_suggestions(query: str, limit: int = 10) -> dict:
+  """
+  Sugestões para a caixa de pesquisa (search-as-you-type): os tickets mais recentes em que cada
+  palavra escrita é o início do id, de uma palavra do assunto ou do nome do requerente/técnico.
+  Servido pelo índice de prefixos em memória, sem queries à base de dados.
+  """
+  return {"data": _suggest_tickets(query, limit)}
+
+# --- Fim das sugestões da pesquisa ---
+
 # --- Inicio dos counts dos presets ---
 
 async def fetch_preset_counts(search: str | None , and_filters: dict[str, any] | None, own: bool | None, current_user: dict | None) -> list[dict]:
@@ -309,44 +627,33 @@ async def fetch_preset_counts(search: str | None , and_filters: dict[str, any] |
   Raises:
     CustomError: Se houver um erro ao aplicar os filtros base.
   """
-  presets = await TicketPresets.filter(main=True).all()
-  results = []
-
-  # Cria um queryset base
+  # Cria um queryset base, partilhado por todos os presets (own e search)
   base_queryset = Tickets.all()
   
   if own:
     base_queryset = base_queryset.filter(Q(agent_id=current_user['id']))
 
-  for preset in presets:
-    preset_queryset = base_queryset # Começa com o queryset base (já filtrado se and_filters foi passado)
-    if preset.filter:
-      try:
-        preset_filter_dict = json.loads(preset.filter)
-          
-        if isinstance(preset_filter_dict, dict):
-          # Aplica os filtros específicos do preset sobre o queryset base
-          preset_queryset = _apply_filters(preset_queryset, preset_filter_dict, search)
-        else:
-          logger.warning(f"Preset '{preset.name}' (ID: {preset.id}) filter is not a valid JSON object. Skipping preset filters.")
-      except json.JSONDecodeError:
-        logger.warning(f"Warning: Could not parse filter for preset '{preset.name}' (ID: {preset.id}). Skipping preset filters.")
-      except CustomError as e:
-        # Erro ao aplicar filtros do *preset* (e.g., campo inválido no preset)
-        logger.warning(f"Warning: Invalid filter found in preset '{preset.name}' (ID: {preset.id}): {e}. Skipping preset filters.")
-      except Exception as e:
-        logger.warning(f"Unexpected error applying filter for preset '{preset.name}' (ID: {preset.id}): {e}. Skipping preset filters.", exc_info=True)
-    # Conta os tickets após aplicar os filtros do preset (ou apenas os filtros base se o preset não tiver filtro ou for inválido)
-    try:
-      count = await preset_queryset.count()
-      results.append({"id": preset.id, "name": preset.name, "filter":preset.filter, "color":preset.color, "count": count})
-    except Exception as e:
-      # Log error during the count operation for a specific preset
-      logger.error(f"Error counting tickets for preset '{preset.name}' (ID: {preset.id}): {e}", exc_info=True)
-      # Append a result indicating an error or skip this preset
-      results.append({"id": preset.id, "name": preset.name, "filter":json.loads(preset.filter), "color":preset.color, "count": "Error"}) # Or handle as needed
-
-  return results
+  # Sem pesquisa, as contagens vêm dos contadores em memória (ver preset_counters.py)
+  in_memory = None if search else _get_preset_counts(current_user['id'] if own else None)
+  if in_memory is not None:
+    presets, counts = in_memory
+  else:
+    presets = await TicketPresets.filter(main=True).all()
+    counts = {}
+    if search:
+      await _ensure_search_name_index()
+      base_queryset = _apply_filters(base_queryset, None, search)
+      _check_ticket_filter_cost(base_queryset, None, search, context="presets")
+
+  # Os restantes presets são contados numa única query (ver _count_presets)
+  pending_presets = [preset for preset in presets if preset.id not in counts]
+  if pending_presets:
+    counts.update(await _count_presets(base_queryset, pending_presets))
+
+  return [
+    {"id": preset.id, "name": preset.name, "filter": _preset_result_filter(preset, counts[preset.id]), "color": preset.color, "count": counts[preset.id]}
+    for preset in presets
+  ]
 
 # --- Fim dos counts dos presets ---
 
@@ -369,13 +676,17 @@ async def fetch_ticket_logs(
                  ou se ocorrer um erro durante a busca dos logs.
   """
   try:
-    # Verificar primeiro se o ticket existe
+    # Verificar primeiro se o ticket existe (nos tickets ativos ou no arquivo)
+    logs_model = TicketLogs
     ticket_exists = await Tickets.exists(uid=ticket_uid)
+    if not ticket_exists and await TicketsWithArchive.exists(uid=ticket_uid):
+      ticket_exists = True
+      logs_model = TicketLogsWithArchive
     if not ticket_exists:
       logger.warning(f"Tentativa de obter logs para um ticket não existente com UID: {ticket_uid}")
       raise CustomError(404, "Ticket não encontrado", f"Nenhum ticket encontrado com o UID: {ticket_uid}")
 
-    logs_queryset = TicketLogs.filter(target__uid=ticket_uid).order_by('-created_at').prefetch_related('agent')
+    logs_queryset = logs_model.filter(target__uid=ticket_uid).order_by('-created_at').prefetch_related('agent')
     
     ticket_logs = await logs_queryset.all()
 
@@ -11,6 +11,10 @@ import time
 from functools import reduce
 from operator import or_
 from app.utils.helpers.employees.employee_helpers import _apply_filters, _confirm_employee_exists
+from app.utils.helpers.employees.contact_loader import _prime_employee_contacts, _forget_employee_contacts
+from app.utils.helpers.identity_map import _get_by_pk
+from app.utils.helpers.name_index import _invalidate_search_name_index
+from app.utils.helpers.ticket_details_cache import _invalidate_ticket_details_for
 import logging
 
 logger = logging.getLogger(__name__)
@@ -77,6 +81,9 @@ async def insert_employee_contacts(contacts: list[dict[any, any]], user_id: int)
     )  
 
 async def create_user(user: dict, current_user: dict):
+  # Import local para evitar o import circular com os helpers dos tickets (que importam este serviço)
+  from app.utils.helpers.tickets.ticket_versions import _bump_entity_version
+
   try:
     await validate_unique_fields(Employees, {'username': user.username})
     if user.password:
@@ -125,6 +132,9 @@ async def create_user(user: dict, current_user: dict):
     
     # Formatar o novo colaborador para resposta.
     user_dict = await new_user.to_dict()
+    # O nome do novo colaborador passa a estar disponível na pesquisa de tickets (também nos outros processos)
+    _invalidate_search_name_index()
+    await _bump_entity_version("Employees")
     return user_dict
 
   except CustomError as e:
@@ -166,7 +176,9 @@ async def get_users(
   # Dict para pesquisa especifica (AND)
   and_filters: dict[str, any] | None,
   # Campos para ordenação, usar o prefixo '-' para descendente
-  order_by: str | None
+  order_by: str | None,
+  # Modo de contagem do total: exact, cached ou none
+  count: str = "exact"
 ):
   start = time.time()
   queryset = Employees.filter(deleted_at__isnull=True)
@@ -190,7 +202,9 @@ async def get_users(
     url=path,
     page=page,
     page_size=page_size,
-    original_query_params=original_query_params
+    original_query_params=original_query_params,
+    count=count,
+    count_key={"and_filters": and_filters, "search": search}
   )
   end = time.time()
   print(f"get_users execution time: {end-start:.4f}s")
@@ -325,6 +339,10 @@ async def update_or_create_employee_contacts(contacts_data: list[dict], user_id:
     if contact_ids_to_delete:
       await EmployeeContacts.filter(id__in=list(contact_ids_to_delete)).delete()
 
+    # Os contactos já carregados neste pedido deixam de estar atualizados
+    if contacts_to_create or contacts_to_update or contact_ids_to_delete:
+      _forget_employee_contacts(user_id)
+
   except Exception as e:
     raise CustomError(
       500,
@@ -387,6 +405,9 @@ async def add_or_remove_employee_permissions(permissions: list[int], employee_da
     )
 
 async def update_user_details(id: int, user_data: dict, current_user: dict):
+  # Import local para evitar o import circular com os helpers dos tickets (que importam este serviço)
+  from app.utils.helpers.tickets.ticket_versions import _bump_entity_version, TICKET_EMBEDDED_EMPLOYEE_FIELDS
+
   try:
     db_user = await fetch_user_for_changes(id)
 
@@ -415,6 +436,7 @@ async def update_user_details(id: int, user_data: dict, current_user: dict):
 
     # Obtem os detalhes do utilizador antes das alterações
     before_changes = await db_user.to_dict_log()
+    embedded_before = {field: getattr(db_user, field) for field in TICKET_EMBEDDED_EMPLOYEE_FIELDS}
     await db_user.update_from_dict(update_data).save()
     
     # Atualiza os contactos se existir na lista
@@ -446,6 +468,13 @@ async def update_user_details(id: int, user_data: dict, current_user: dict):
     )
     # Obtem o utilizador com as novas atualizações para a resposta
     user_details = await get_user_details(db_user.id)
+    # O nome pode ter mudado: o índice da pesquisa de tickets é recarregado
+    _invalidate_search_name_index()
+    # Só os campos incluídos nos tickets (nome, departamento, empresa, local, contactos) mudam os ETags
+    if contacts or any(getattr(db_user, field) != value for field, value in embedded_before.items()):
+      # Os detalhes dos tickets em que o colaborador aparece (requerente, técnico, CCS) deixam de estar em cache
+      _invalidate_ticket_details_for("Employees", db_user.id)
+      await _bump_entity_version("Employees")
     return user_details
 
   except CustomError as e:
@@ -722,12 +751,12 @@ async def get_employees_with_permission(permission_id: int, search: str | None =
     employees_with_permission = await queryset.prefetch_related(
       'local', 
       'department',
-      'employee_relation',
-      'employee_relation__contact_type'
     ).distinct().all() 
     # .distinct() por causa do join no employee_relation pode mostrar dados duplicados
     # se um colaborador tiver vários contactos que iguale à pesquisa
     # if an employee has multiple contacts matching the search term.
+    # Os contactos de todos os colaboradores são carregados numa única query
+    _prime_employee_contacts(*(employee.id for employee in employees_with_permission))
     return [await employee.to_dict_contacts() for employee in employees_with_permission]
 
   except Exception as e:
@@ -756,8 +785,9 @@ async def get_users_by_ids(ids: list[int]):
 async def get_employee_basic_info(id: int) -> dict:
   try:
     # Obtem as informações básicas de um utilizador com o email
-    db_employee = await Employees.filter(id=id, deactivated_at__isnull=True, deleted_at__isnull=True).first()
-    if not db_employee:
+    # (pelo identity map do pedido: o colaborador normalmente já foi lido para os detalhes do ticket)
+    db_employee = await _get_by_pk(Employees, id)
+    if not db_employee or db_employee.deactivated_at is not None or db_employee.deleted_at is not None:
       return None
     return await db_employee.to_dict_employee_emails()
     
@@ -826,6 +856,8 @@ async def fetch_requester_employees(company_id: int | None) -> dict:
     if company_id is not None:
       prefetch_fields.append('companies')
     active_employees = await queryset.prefetch_related(*prefetch_fields).all()
+    # Os contactos de todos os colaboradores são carregados numa única query
+    _prime_employee_contacts(*(employee.id for employee in active_employees))
 
     requesters_list = [
       await employee.to_dict_basic_info() for employee in active_employees
@@ -0,0 +1,99 @@
+from collections import OrderedDict
+from typing import Callable
+import hashlib
+import json
+import time
+
+def _canonical_hash(*parts: any) -> str:
+  """
+  Gera um hash estável para os argumentos dados.
+  Os dicionários são serializados com as chaves ordenadas, para que filtros
+  equivalentes (com outra ordem de chaves) resultem na mesma chave.
+  """
+  canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+  return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class LRUCache:
+  """
+  Cache em memória (por processo) com limite de entradas, limite de memória (bytes)
+  e expiração (TTL) opcionais, e contadores de hits/misses.
+  Quando um limite é atingido, as entradas menos usadas recentemente são removidas.
+  """
+
+  def __init__(self, max_entries: int = 1024, ttl: float | None = None, max_bytes: int | None = None):
+    self.max_entries = max_entries
+    self.ttl = ttl
+    self.max_bytes = max_bytes
+    self._entries: OrderedDict[any, tuple[float | None, any, int]] = OrderedDict()
+    self.total_bytes = 0
+    self.hits = 0
+    self.misses = 0
+
+  def get(self, key: any, default: any = None) -> any:
+    entry = self._entries.get(key)
+    if entry is None:
+      self.misses += 1
+      return default
+
+    expires_at, value, _ = entry
+    if expires_at is not None and expires_at < time.monotonic():
+      # Entrada expirada
+      self._remove(key)
+      self.misses += 1
+      return default
+
+    self._entries.move_to_end(key)
+    self.hits += 1
+    return value
+
+  def set(self, key: any, value: any, size: int = 0) -> None:
+    """
+    Guarda o valor. `size` é o tamanho aproximado do valor em bytes, usado no limite `max_bytes`.
+    Valores maiores do que o próprio limite não são guardados.
+    """
+    if self.max_bytes is not None and size > self.max_bytes:
+      return
+    if key in self._entries:
+      self._remove(key)
+    expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+    self._entries[key] = (expires_at, value, size)
+    self.total_bytes += size
+    while len(self._entries) > self.max_entries or (self.max_bytes is not None and self.total_bytes > self.max_bytes):
+      oldest_key = next(iter(self._entries))
+      self._remove(oldest_key)
+
+  def __contains__(self, key: any) -> bool:
+    """Indica se a chave está guardada (sem contar como hit/miss nem verificar a expiração)."""
+    return key in self._entries
+
+  def discard(self, key: any) -> bool:
+    """Remove a entrada, se existir. Devolve True se foi removida."""
+    if key not in self._entries:
+      return False
+    self._remove(key)
+    return True
+
+  def _remove(self, key: any) -> None:
+    _, _, size = self._entries.pop(key)
+    self.total_bytes -= size
+
+  def invalidate(self, predicate: Callable[[any], bool]) -> int:
+    """Remove todas as entradas cuja chave satisfaz o predicado. Devolve o número de entradas removidas."""
+    keys_to_remove = [key for key in self._entries if predicate(key)]
+    for key in keys_to_remove:
+      self._remove(key)
+    return len(keys_to_remove)
+
+  def clear(self) -> None:
+    self._entries.clear()
+    self.total_bytes = 0
+
+  def stats(self) -> dict[str, any]:
+    total = self.hits + self.misses
+    return {
+      "entries": len(self._entries),
+      "bytes": self.total_bytes,
+      "hits": self.hits,
+      "misses": self.misses,
+      "hit_rate": round(self.hits / total, 4) if total else None,
+    }
@@ -0,0 +1,79 @@
+from contextvars import ContextVar
+
+# --- Loader dos contactos dos colaboradores ---
+# Os serializers dos colaboradores (emails, extensão, contactos públicos) leem os contactos daqui.
+# Os ids pedidos (ou anunciados com `prime`) são carregados em conjunto numa única query,
+# com o tipo de contacto incluído, e ficam guardados até ao fim do pedido.
+
+class EmployeeContactsLoader:
+  """Carrega e guarda, por pedido, os contactos de vários colaboradores de uma só vez."""
+
+  def __init__(self):
+    self._contacts: dict[int, list] = {}
+    self._pending: set[int] = set()
+
+  def prime(self, *employee_ids: int | None):
+    """Anuncia os colaboradores de que a resposta vai precisar, para serem carregados na mesma query."""
+    self._pending.update(
+      employee_id for employee_id in employee_ids
+      if employee_id is not None and employee_id not in self._contacts
+    )
+
+  def forget(self, *employee_ids: int):
+    """Descarta os contactos guardados (ex: depois de os contactos do colaborador serem alterados)."""
+    for employee_id in employee_ids:
+      self._contacts.pop(employee_id, None)
+
+  async def contacts(self, employee_id: int) -> list:
+    """Devolve os contactos do colaborador (com o contact_type carregado), ordenados pelo id."""
+    if employee_id not in self._contacts:
+      self._pending.add(employee_id)
+      await self._load_pending()
+    return self._contacts[employee_id]
+
+  async def _load_pending(self):
+    # Import local para evitar o import circular com os modelos
+    from app.database.models.helpdesk.employee_contacts import EmployeeContacts
+
+    employee_ids = [employee_id for employee_id in self._pending if employee_id not in self._contacts]
+    self._pending.clear()
+    if not employee_ids:
+      return
+
+    for employee_id in employee_ids:
+      self._contacts[employee_id] = []
+    contacts = await EmployeeContacts.filter(
+      employee_id__in=employee_ids
+    ).select_related('contact_type').order_by('id')
+    for contact in contacts:
+      self._contacts[contact.employee_id].append(contact)
+
+_employee_contacts_loader: ContextVar[EmployeeContactsLoader | None] = ContextVar(
+  "employee_contacts_loader",
+  default=None
+)
+
+def _get_employee_contacts_loader() -> EmployeeContactsLoader:
+  """Devolve o loader do pedido atual, criando-o se ainda não existir (ex: fora de um pedido HTTP)."""
+  loader = _employee_contacts_loader.get()
+  if loader is None:
+    loader = EmployeeContactsLoader()
+    _employee_contacts_loader.set(loader)
+  return loader
+
+def _reset_employee_contacts_loader():
+  """Inicia um loader novo para o pedido. Devolve o token para repor o anterior."""
+  return _employee_contacts_loader.set(EmployeeContactsLoader())
+
+def _prime_employee_contacts(*employee_ids: int | None):
+  _get_employee_contacts_loader().prime(*employee_ids)
+
+def _forget_employee_contacts(*employee_ids: int):
+  loader = _employee_contacts_loader.get()
+  if loader is not None:
+    loader.forget(*employee_ids)
+
+async def _employee_contacts(employee_id: int) -> list:
+  return await _get_employee_contacts_loader().contacts(employee_id)
+
+# --- Fim do loader dos contactos dos colaboradores ---
@@ -2,4 +2,7 @@ from .filtering_logic import (
   _apply_and_filters,
   _apply_or_search,
   _apply_ordering,
+  _compile_filter_plan,
+  FilterPlan,
+  filter_plan_cache_stats,
 )
\ No newline at end of file
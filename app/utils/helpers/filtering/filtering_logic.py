@@ -2,156 +2,202 @@ from functools import reduce
 from operator import or_, and_
 from tortoise.queryset import QuerySet
 from app.utils.errors.exceptions import CustomError
+from app.utils.helpers.cache import LRUCache
 from tortoise.expressions import Q
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 import json
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
 
-# Função auxiliar interna para processar um dicionário de filtros e preparar kwargs para Tortoise .filter()
-# Alterado para devolver uma lista de objetos Q
-def _build_q_objects_from_filter_dict(
+# --- Plano de filtros compilado ---
+# Um documento de filtros (dict ou string JSON) é validado e convertido uma única vez num
+# FilterPlan imutável, guardado numa cache LRU. O plano pode depois ser aplicado a qualquer queryset.
+
+# Número máximo de planos em cache
+FILTER_PLAN_CACHE_SIZE = int(os.getenv('FILTER_PLAN_CACHE_SIZE', 512))
+
+# Uma condição é um grupo de lookups combinados com OR; as condições são combinadas com AND
+FilterCondition = tuple[tuple[str, any], ...]
+
+@dataclass(frozen=True)
+class FilterPlan:
+  """Filtros AND já validados e normalizados, prontos a aplicar a um queryset."""
+  conditions: tuple[FilterCondition, ...] = ()
+
+  def q_objects(self) -> list[Q]:
+    """Constrói os objetos Q (um por condição) a partir do plano."""
+    return [
+      reduce(or_, [Q(**{lookup: list(value) if isinstance(value, tuple) else value}) for lookup, value in condition])
+      for condition in self.conditions
+    ]
+
+  def apply(self, queryset: QuerySet) -> QuerySet:
+    """Aplica todas as condições ao queryset; o Tortoise combina-as com AND."""
+    for q_condition in self.q_objects():
+      queryset = queryset.filter(q_condition)
+    return queryset
+
+_EMPTY_FILTER_PLAN = FilterPlan()
+
+_filter_plan_cache = LRUCache(max_entries=FILTER_PLAN_CACHE_SIZE)
+
+def filter_plan_cache_stats() -> dict[str, any]:
+  return _filter_plan_cache.stats()
+
+def _icontains_group(field: str, parts: list) -> FilterCondition:
+  """Grupo OR de `field__icontains` para as partes não vazias."""
+  return tuple(
+    (f"{field}__icontains", part_str)
+    for part_str in (str(part).strip() for part in parts)
+    if part_str
+  )
+
+def _compile_field_conditions(field: str, value: any, date_fields_config: set[str], allowed_fields_config: set[str]) -> list[FilterCondition]:
+  """Valida um campo do documento de filtros e devolve as suas condições. Não altera o valor recebido."""
+  # --- Filtro de datas ---
+  if field.endswith('_after'):
+    base_field = field[:-6] # Remove o '_after'
+    if base_field not in date_fields_config:
+      raise CustomError(400, "Filtro inválido", f"Não é possível filtrar por data no campo '{base_field}'. Campo não permitido para filtro de data.")
+    try:
+      start_date = datetime.fromisoformat(str(value)).date()
+    except ValueError:
+      raise CustomError(400, "Formato de data inválido", f"Formato inválido para '{field}'. Usar YYYY-MM-DD.")
+    return [((f"{base_field}__gte", datetime.combine(start_date, datetime.min.time())),)]
+
+  if field.endswith('_before'):
+    base_field = field[:-7] # Remove o '_before'
+    if base_field not in date_fields_config:
+      raise CustomError(400, "Filtro inválido", f"Não é possível filtrar por data no campo '{base_field}'. Campo não permitido para filtro de data.")
+    try:
+      end_date = datetime.fromisoformat(str(value)).date()
+    except ValueError:
+      raise CustomError(400, "Formato de data inválido", f"Formato inválido para '{field}'. Usar YYYY-MM-DD.")
+    # Para tornar '_before' exclusivo da data fornecida, filtramos por menos que o início do dia seguinte.
+    next_day_start = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+    return [((f"{base_field}__lt", next_day_start),)]
+
+  # --- Filtro de campos que não são datas ---
+  if field not in allowed_fields_config:
+    raise CustomError(400, "Filtro inválido", f"Não é possível filtrar pelo campo '{field}'. Campo não permitido para filtro.")
+
+  if isinstance(value, str) and not field.endswith('_id') and field != "id" and not field.endswith('_isnull'):
+    # Com vírgulas, cada parte deve estar contida no campo (OR entre as partes);
+    # sem vírgula, __icontains para o valor completo.
+    parts = value.split(',') if ',' in value else [value]
+    group = _icontains_group(field, parts) if ',' in value else ((f"{field}__icontains", value),)
+    return [group] if group else []
+
+  if isinstance(value, list):
+    # Filtro para correspondência em lista de valores.
+    # Trabalha sobre uma cópia, para não alterar o documento de filtros recebido
+    value = list(value)
+    if value and ':' in str(value[-1]):
+      # Remove o sufixo de tipo (ex: "valor:t") do último elemento
+      value[-1] = value[-1][:-2]
+
+    if any(isinstance(item, list) for item in value):
+      # Se pelo menos 1 dos elementos do value for uma lista
+      # Trata como: (cond1 OR cond2) AND (cond3 OR cond4) ...
+      conditions = []
+      for element_in_value in value:
+        if isinstance(element_in_value, list):
+          group = _icontains_group(field, element_in_value)
+        elif isinstance(element_in_value, str):
+          group = _icontains_group(field, [element_in_value])
+        else:
+          group = ()
+        if group:
+          conditions.append(group)
+      return conditions
+
+    if all(isinstance(item, str) for item in value):
+      # Lista de strings: field__icontains="a" OR field__icontains="b"
+      group = _icontains_group(field, value)
+      return [group] if group else []
+
+    # Outras listas, ex: lista de IDs para uma query __in
+    return [((f"{field}__in", tuple(value)),)]
+
+  value = str(value)
+  if ',' in value:
+    values = tuple(part_val.strip() for part_val in value.split(',') if part_val.strip())
+    return [((f"{field}__in", values),)]
+  if field.endswith('_isnull'):
+    # Se a pesquisa for feita com __isnull, deve ser feita com o valor 0/1 para conseguir
+    # transformar em boolean, para a query
+    return [((field, bool(int(value))),)]
+  # Correspondência exata para outros tipos ou campos _id.
+  return [((field, value),)]
+
+def _compile_filter_plan(
   filters_source: dict[str, any] | str | None,
   date_fields_config: set[str],
   allowed_fields_config: set[str]
-) -> list[Q]:
+) -> FilterPlan:
   """
-  Processa um dicionário de filtros (ou uma string JSON)
-  e devolve uma LISTA de objetos Q do Tortoise.
-  Valida os campos contra date_fields_config e allowed_fields_config.
+  Converte um documento de filtros (dict ou string JSON) num FilterPlan.
+  O plano é guardado em cache, com a chave do documento canónico (chaves ordenadas) e dos
+  campos permitidos, pelo que o mesmo filtro só é interpretado e validado uma vez.
+
+  Raises:
+    CustomError: Se o JSON for inválido ou se algum campo/data não for permitido.
   """
   if not filters_source:
-    return []
+    return _EMPTY_FILTER_PLAN
+
+  if isinstance(filters_source, str):
+    source_key = ("json", filters_source)
+  elif isinstance(filters_source, dict):
+    source_key = ("dict", json.dumps(filters_source, sort_keys=True, default=str))
+  else:
+    logger.warning(f"Tipo de fonte de filtros inesperado: {type(filters_source)}")
+    return _EMPTY_FILTER_PLAN
+
+  cache_key = (source_key, frozenset(date_fields_config), frozenset(allowed_fields_config))
+  plan = _filter_plan_cache.get(cache_key)
+  if plan is not None:
+    return plan
 
   actual_filters_dict: dict[str, any]
   if isinstance(filters_source, str):
     try:
       loaded_json = json.loads(filters_source)
-      if not isinstance(loaded_json, dict):
-        logger.warning(f"Filtro JSON carregado não é um dicionário: {filters_source}")
-        return []
-      actual_filters_dict = loaded_json
     except json.JSONDecodeError as e:
       raise CustomError(400, "Formato de filtro inválido", f"O dicionário de filtros (string JSON) não é válido: {e}")
-  elif isinstance(filters_source, dict):
-    actual_filters_dict = filters_source
+    if not isinstance(loaded_json, dict):
+      logger.warning(f"Filtro JSON carregado não é um dicionário: {filters_source}")
+      loaded_json = {}
+    actual_filters_dict = loaded_json
   else:
-    logger.warning(f"Tipo de fonte de filtros inesperado: {type(filters_source)}")
-    return []
-
-  if not actual_filters_dict: # Trata dicionário vazio ou dicionário de JSON vazio/não-dicionário
-    return []
+    actual_filters_dict = filters_source
 
-  q_objects = []
+  conditions = []
   for field, value in actual_filters_dict.items():
-    # --- Filtro de datas ---
-    if field.endswith('_after'):
-      base_field = field[:-6] # Remove o '_after'
-      if base_field in date_fields_config:
-        try:
-          start_date = datetime.fromisoformat(str(value)).date()
-          filter_key = f"{base_field}__gte"
-          q_objects.append(Q(**{filter_key: datetime.combine(start_date, datetime.min.time())}))
-        except ValueError:
-          raise CustomError(400, "Formato de data inválido", f"Formato inválido para '{field}'. Usar YYYY-MM-DD.")
-      else:
-        raise CustomError(400, "Filtro inválido", f"Não é possível filtrar por data no campo '{base_field}'. Campo não permitido para filtro de data.")
-    elif field.endswith('_before'):
-      base_field = field[:-7] # Remove o '_before'
-      if base_field in date_fields_config:
-        try:
-          end_date = datetime.fromisoformat(str(value)).date()
-          # Para tornar '_before' exclusivo da data fornecida, filtramos por menos que o início do dia seguinte.
-          next_day_start = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
-          filter_key = f"{base_field}__lt"
-          q_objects.append(Q(**{filter_key: next_day_start}))
-        except ValueError:
-          raise CustomError(400, "Formato de data inválido", f"Formato inválido para '{field}'. Usar YYYY-MM-DD.")
-      else:
-        raise CustomError(400, "Filtro inválido", f"Não é possível filtrar por data no campo '{base_field}'. Campo não permitido para filtro de data.")
-    # --- Filtro de campos que não são datas ---
-    elif field in allowed_fields_config:
-      print(field)
-      if isinstance(value, str) and not field.endswith('_id') and field != "id" and not field.endswith('_isnull'):
-        if ',' in value:
-          parts = [part.strip() for part in value.split(',') if part.strip()]
-          if parts:
-            # Cria um objeto Q para cada parte e combina-os com AND para este campo específico.
-            # Cada parte deve estar contida no campo.
-            print(f"{field}__icontains")
-            field_specific_q_objects = [Q(**{f"{field}__icontains": part}) for part in parts]
-            q_objects.append(reduce(or_, field_specific_q_objects))
-          # Se 'parts' estiver vazio (ex: valor era apenas ","), nenhum filtro é adicionado para este campo.
-        else:
-          # Sem vírgula, comportamento original de __icontains para o valor completo.
-          
-          print(f"{field}_icontains: {value}")
-          q_objects.append(Q(**{f"{field}__icontains": value}))
-      elif isinstance(value, list):
-        # Filtro para correspondência em lista de valores.
-        # Confirma se existe algum valor dentro do value que seja lista.
-        _type = None
-        if ':' in str(value[-1]):
-          _type = value[-1].split(':').pop()
-          value[-1] = value[-1][:-2]
-
-        
-        if any(isinstance(item, list) for item in value):
-          # Se pelo menos 1 dos elementos do value for uma lista
-          # Trata como: (cond1 OR cond2) AND (cond3 OR cond4) ...
-          # Onde cada elemento de 'value' pode ser uma lista de condições OR-ed, ou uma string única.
-          for element_in_value in value: # element_in_value can be a list or a string
-            current_or_group_qs = []
-            if isinstance(element_in_value, list): # This is a sub-list for OR conditions
-              for part in element_in_value:
-                part_str = str(part).strip() # Ensure part is a string and stripped
-                if part_str: # Only add if part is non-empty
-                  current_or_group_qs.append(Q(**{f"{field}__icontains": part_str}))
-            elif isinstance(element_in_value, str): # This is a single string condition
-              part_str = element_in_value.strip()
-              if part_str:
-                current_or_group_qs.append(Q(**{f"{field}__icontains": part_str}))
-            
-            if current_or_group_qs: # Garante que current_or_group_qs não está vazia antes de reduce
-              q_objects.append(reduce(or_, current_or_group_qs))
-          
-        # ELIF: If not a list containing sub-lists, check if it's a flat list of strings.
-        # Example: value = ["tagA", "tagB"] -> field__icontains="tagA" OR field__icontains="tagB"
-        elif all(isinstance(item, str) for item in value): # `all` ensures it's purely a list of strings
-          current_or_group_qs = []
-          for item_str in value:
-            part_str = item_str.strip() # item_str is already a string
-            if part_str:
-              current_or_group_qs.append(Q(**{f"{field}__icontains": part_str}))
-          if current_or_group_qs: # Only add if there are actual conditions
-            q_objects.append(reduce(or_, current_or_group_qs))
+    conditions.extend(_compile_field_conditions(field, value, date_fields_config, allowed_fields_config))
 
-        else:
-          # Fallback for other list types, e.g., list of IDs for an __in query
-          q_objects.append(Q(**{f"{field}__in": value}))
-      else:
-        value = str(value)
-        print("\n\nVALUE:",str(value))
-        if ',' in value:
-          values = [part_val.strip() for part_val in value.split(',') if part_val.strip()]
-        
-          # Cria um objeto Q para cada parte e combina-os com AND para este campo específico.
-          # Cada parte deve estar contida no campo.
-          q_objects.append(Q(**{f"{field}__in": values}))
-        elif field.endswith('_isnull'):
-          # Se a pesquisa for feita com __isnull, deve ser feita com o valor 0/1 para conseguir 
-          # transformar em boolean, para a query
-          q_objects.append(Q(**{field: bool(int(value))}))
-        else:
-          # Correspondência exata para outros tipos ou campos _id.
-          q_objects.append(Q(**{field: value}))
-    else:
-      raise CustomError(400, "Filtro inválido", f"Não é possível filtrar pelo campo '{field}'. Campo não permitido para filtro.")
-  print(str(q_objects))
-  
-  return q_objects
+  plan = FilterPlan(tuple(conditions))
+  _filter_plan_cache.set(cache_key, plan)
+  return plan
+
+# --- Fim do plano de filtros compilado ---
+
+def _build_q_objects_from_filter_dict(
+  filters_source: dict[str, any] | str | None,
+  date_fields_config: set[str],
+  allowed_fields_config: set[str]
+) -> list[Q]:
+  """
+  Processa um dicionário de filtros (ou uma string JSON)
+  e devolve uma LISTA de objetos Q do Tortoise.
+  Valida os campos contra date_fields_config e allowed_fields_config.
+  O documento é compilado uma única vez (ver `_compile_filter_plan`).
+  """
+  return _compile_filter_plan(filters_source, date_fields_config, allowed_fields_config).q_objects()
 
 def _apply_and_filters(
     queryset: QuerySet,
@@ -186,18 +232,14 @@ def _apply_and_filters(
       - Se um campo para filtragem direta não estiver em `ALLOWED_AND_FILTER_FIELDS`.
   """
   
-  # Aplica filtros (AND) ao queryset
+  # Aplica filtros (AND) ao queryset, a partir do plano compilado (em cache)
   if filters_dict:
-    q_conditions = _build_q_objects_from_filter_dict(
+    plan = _compile_filter_plan(
       filters_dict,
       DATE_FIELDS if DATE_FIELDS is not None else set(),
       ALLOWED_AND_FILTER_FIELDS
     )
-    
-    if q_conditions:
-      # Aplica todos os objetos Q; o Tortoise irá combiná-los com AND.
-      for q_condition_group in q_conditions:
-        queryset = queryset.filter(q_condition_group)
+    queryset = plan.apply(queryset)
   return queryset
 
 def _apply_or_search(queryset: QuerySet, DEFAULT_OR_SEARCH_FIELDS: list[str], search: str | None) -> QuerySet:
@@ -0,0 +1,80 @@
+from contextvars import ContextVar
+from tortoise.models import Model
+
+# --- Identity map do pedido ---
+# Dentro de um pedido, cada linha (modelo, chave primária) lida pelo identity map é lida da base de
+# dados uma única vez: o requerente, o técnico e o created_by de um ticket que são o mesmo colaborador,
+# o departamento/empresa/local comuns a vários colaboradores, o requerente lido outra vez para o email...
+# O mapa é criado pelo request_scope_middleware (app/main.py) e descartado no fim do pedido, por isso
+# nada fica desatualizado entre pedidos. Fora de um pedido HTTP (comandos, arranque) não há mapa e as
+# leituras vão sempre à base de dados.
+# As instâncias guardadas são as mesmas que o serviço altera e grava (save), por isso continuam
+# atualizadas.
+
+class IdentityMap:
+  """Guarda, por pedido, as instâncias dos modelos lidas pela chave primária."""
+
+  def __init__(self):
+    self._instances: dict[tuple[type[Model], any], Model | None] = {}
+
+  def __contains__(self, key: tuple[type[Model], any]) -> bool:
+    return key in self._instances
+
+  def get(self, model: type[Model], pk: any) -> Model | None:
+    return self._instances.get((model, pk))
+
+  def add(self, *instances: Model | None):
+    """Regista instâncias já lidas (ex: preobtidas). As que já estão no mapa não são substituídas."""
+    for instance in instances:
+      if instance is not None and instance.pk is not None:
+        self._instances.setdefault((type(instance), instance.pk), instance)
+
+  async def load(self, model: type[Model], pk: any) -> Model | None:
+    """Devolve a instância pela chave primária, lendo-a da base de dados só na primeira vez."""
+    key = (model, pk)
+    if key not in self._instances:
+      # As linhas inexistentes também ficam guardadas (None)
+      self._instances[key] = await model.get_or_none(pk=pk)
+    return self._instances[key]
+
+_identity_map: ContextVar[IdentityMap | None] = ContextVar("identity_map", default=None)
+
+def _reset_identity_map():
+  """Inicia um identity map novo para o pedido. Devolve o token para repor o anterior."""
+  return _identity_map.set(IdentityMap())
+
+def _remember(*instances: Model | None):
+  identity_map = _identity_map.get()
+  if identity_map is not None:
+    identity_map.add(*instances)
+
+async def _get_by_pk(model: type[Model], pk: any) -> Model | None:
+  """Obtém a instância pela chave primária, através do identity map do pedido (se existir)."""
+  if pk is None:
+    return None
+  identity_map = _identity_map.get()
+  if identity_map is None:
+    return await model.get_or_none(pk=pk)
+  return await identity_map.load(model, pk)
+
+async def _load_related(instance: Model, field_name: str) -> Model | None:
+  """
+  Devolve a instância da FK `field_name`. Usa a instância preobtida se corresponder à FK atual,
+  senão obtém-na pelo identity map e guarda-a na instância (os acessos seguintes não fazem queries).
+  """
+  related_id = getattr(instance, f"{field_name}_id")
+  if related_id is None:
+    return None
+
+  related = instance.__dict__.get(f"_{field_name}")
+  if related is not None and related.pk == related_id:
+    _remember(related)
+    return related
+
+  related_model = instance._meta.fields_map[field_name].related_model
+  related = await _get_by_pk(related_model, related_id)
+  if related is not None:
+    setattr(instance, field_name, related)
+  return related
+
+# --- Fim do identity map do pedido ---
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import time
+import unicodedata
+
+# --- Índice de nomes para a pesquisa ---
+# Nomes dos colaboradores, empresas, categorias e subcategorias, guardados em memória (por processo)
+# e normalizados como a collation da base de dados. Permite resolver uma palavra pesquisada nos ids
+# dos registos correspondentes sem fazer joins na query principal.
+# É recarregado depois de SEARCH_NAME_INDEX_TTL segundos, logo que um dos nomes é alterado neste processo,
+# ou quando a versão dos nomes na base de dados (tabela ticket_entity_versions, atualizada ao criar ou
+# alterar colaboradores, empresas, categorias e subcategorias em qualquer processo) deixa de ser a do índice.
+
+# Tempo (segundos) até o índice de nomes ser recarregado
+SEARCH_NAME_INDEX_TTL = float(os.getenv('SEARCH_NAME_INDEX_TTL', 300))
+
+# Tipos de entidade do índice (linhas da tabela ticket_entity_versions)
+SEARCH_NAME_VERSION_NAMES: tuple[str, ...] = ("Employees", "Companies", "TicketCategories", "TicketSubcategories")
+
+def _fold(text: str) -> str:
+  """Normaliza o texto como a collation da base de dados (sem acentos nem maiúsculas)."""
+  decomposed = unicodedata.normalize('NFKD', text)
+  return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+class SearchNameIndex:
+  """Nomes dos colaboradores, empresas, categorias e subcategorias, normalizados para a pesquisa."""
+
+  def __init__(self, names: dict[str, list[tuple[int, str]]], version: any = None):
+    self._names = names
+    self.version = version
+    self.loaded_at = time.monotonic()
+
+  def is_fresh(self) -> bool:
+    return time.monotonic() - self.loaded_at < SEARCH_NAME_INDEX_TTL
+
+  def resolve(self, word: str) -> dict[str, list[int]]:
+    """Devolve, por tabela, os ids dos registos cujo nome contém a palavra."""
+    folded_word = _fold(word)
+    return {
+      source: [record_id for record_id, text in records if folded_word in text]
+      for source, records in self._names.items()
+    }
+
+_search_name_index: SearchNameIndex | None = None
+_search_name_index_lock = asyncio.Lock()
+
+async def _search_name_version() -> list:
+  """Versão dos nomes na base de dados: uma única query à tabela ticket_entity_versions."""
+  # Import local para evitar o import circular com os modelos
+  from app.database.models.helpdesk import TicketEntityVersions
+  return await TicketEntityVersions.filter(name__in=SEARCH_NAME_VERSION_NAMES).order_by('name').values_list('name', 'version')
+
+async def _load_search_name_index(version: any) -> SearchNameIndex:
+  # Import local para evitar o import circular com os modelos
+  from app.database.models.helpdesk import Employees, Companies, TicketCategories, TicketSubcategories
+
+  # Inclui os colaboradores removidos/desativados: continuam associados aos tickets antigos
+  employees = await Employees.all().values_list('id', 'first_name', 'last_name', 'full_name')
+  companies = await Companies.all().values_list('id', 'name')
+  categories = await TicketCategories.all().values_list('id', 'name')
+  subcategories = await TicketSubcategories.all().values_list('id', 'name')
+
+  def folded(rows) -> list[tuple[int, str]]:
+    # Os campos são separados por '\n' para que uma palavra não corresponda a dois campos ao mesmo tempo
+    return [(row[0], _fold('\n'.join(part for part in row[1:] if part))) for row in rows]
+
+  return SearchNameIndex({
+    'employees': folded(employees),
+    'companies': folded(companies),
+    'categories': folded(categories),
+    'subcategories': folded(subcategories),
+  }, version)
+
+async def _ensure_search_name_index():
+  """Carrega (ou recarrega, se tiver expirado) o índice de nomes. Chamar antes de `_apply_ticket_search`."""
+  global _search_name_index
+  version = await _search_name_version()
+  if _search_name_index is not None and _search_name_index.is_fresh() and _search_name_index.version == version:
+    return
+  async with _search_name_index_lock:
+    index = _search_name_index
+    if index is None or not index.is_fresh() or index.version != version:
+      _search_name_index = await _load_search_name_index(version)
+
+def _invalidate_search_name_index():
+  """Descarta o índice de nomes (ex: depois de criar ou renomear um colaborador, empresa ou categoria)."""
+  global _search_name_index
+  _search_name_index = None
+
+def _get_search_name_index() -> SearchNameIndex | None:
+  if _search_name_index is not None and _search_name_index.is_fresh():
+    return _search_name_index
+  return None
+
+# --- Fim do índice de nomes para a pesquisa ---
@@ -1,9 +1,183 @@
 from tortoise.queryset import QuerySet
-from tortoise import Tortoise
+from tortoise.expressions import Q
+from typing import Awaitable, Callable
+from app.utils.errors.exceptions import CustomError
+from app.utils.helpers.cache import LRUCache, _canonical_hash
+from datetime import datetime
 from math import ceil
 from urllib.parse import urlencode
+import asyncio
+import base64
+import json
+import os
 import time
 
+# --- Helpers do cursor (keyset pagination) ---
+
+def _encode_cursor(order_by: str, value: any, last_id: int) -> str:
+  """
+  Codifica a chave de ordenação da última linha da página num cursor opaco.
+  O cursor guarda o campo de ordenação, o valor desse campo e o id (desempate).
+  """
+  if isinstance(value, datetime):
+    encoded_value = {"t": "dt", "v": value.isoformat()}
+  else:
+    encoded_value = {"t": "raw", "v": value}
+  payload = json.dumps({"o": order_by, "k": encoded_value, "id": last_id}, separators=(",", ":"))
+  return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str, order_by: str) -> tuple[any, int]:
+  """
+  Descodifica um cursor gerado por `_encode_cursor`.
+
+  Raises:
+    CustomError: Se o cursor for inválido ou tiver sido gerado com outra ordenação.
+  """
+  try:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    encoded_value = payload["k"]
+    value = encoded_value["v"]
+    if encoded_value["t"] == "dt" and value is not None:
+      value = datetime.fromisoformat(value)
+    last_id = int(payload["id"])
+    cursor_order = payload["o"]
+  except (ValueError, KeyError, TypeError) as e:
+    raise CustomError(400, "Cursor inválido", f"Não foi possível interpretar o cursor: {e}") from e
+
+  if cursor_order != order_by:
+    raise CustomError(400, "Cursor inválido", f"O cursor foi gerado para a ordenação '{cursor_order}' e não para '{order_by}'.")
+  return value, last_id
+
+def _keyset_ordering(order_by: str) -> tuple[str, ...]:
+  """Devolve a ordenação completa, com o id como desempate na mesma direção."""
+  descending = order_by.startswith('-')
+  field_name = order_by.lstrip('-')
+  if field_name == 'id':
+    return (order_by,)
+  return (order_by, '-id' if descending else 'id')
+
+def _keyset_condition(order_by: str, value: any, last_id: int) -> Q:
+  """
+  Constrói a condição que devolve as linhas depois de (value, last_id) na ordenação dada.
+  Segue a ordenação do MySQL, em que os NULL aparecem primeiro em ASC e no fim em DESC.
+  """
+  descending = order_by.startswith('-')
+  field_name = order_by.lstrip('-')
+
+  if field_name == 'id':
+    return Q(id__lt=last_id) if descending else Q(id__gt=last_id)
+
+  if value is None:
+    if descending:
+      # Os NULL estão no fim, só restam os NULL com id menor
+      return Q(**{f"{field_name}__isnull": True, "id__lt": last_id})
+    # Os NULL estão no início, seguem-se os NULL com id maior e depois todos os valores não nulos
+    return Q(Q(**{f"{field_name}__isnull": True, "id__gt": last_id}), Q(**{f"{field_name}__isnull": False}), join_type="OR")
+
+  if descending:
+    return Q(
+      Q(**{f"{field_name}__lt": value}),
+      Q(**{field_name: value, "id__lt": last_id}),
+      Q(**{f"{field_name}__isnull": True}),
+      join_type="OR"
+    )
+  return Q(
+    Q(**{f"{field_name}__gt": value}),
+    Q(**{field_name: value, "id__gt": last_id}),
+    join_type="OR"
+  )
+
+def _row_id(row: any) -> int:
+  """Devolve o id de uma linha, seja uma instância do modelo ou um dicionário serializado."""
+  return row["id"] if isinstance(row, dict) else row.id
+
+async def _cursor_value(queryset: QuerySet, last_row: any, order_by: str) -> any:
+  """
+  Obtém o valor do campo de ordenação da última linha.
+  Campos diretos são lidos da instância; campos relacionados (ex: 'company__name') e linhas
+  já serializadas são lidos pela chave primária.
+  """
+  field_name = order_by.lstrip('-')
+  if '__' not in field_name and not isinstance(last_row, dict):
+    return getattr(last_row, field_name)
+  return await queryset.model.filter(id=_row_id(last_row)).first().values_list(field_name, flat=True)
+
+# --- Fim dos helpers do cursor ---
+
+# --- Contagem do total (com cache) ---
+
+# Modos de contagem aceites por paginate
+COUNT_MODES: set[str] = {"exact", "cached", "none"}
+
+# Tempo de vida (segundos) das contagens guardadas em cache
+COUNT_CACHE_TTL = float(os.getenv('COUNT_CACHE_TTL', 60))
+
+# Cache das contagens, chave: (nome do modelo, hash canónico dos filtros)
+_count_cache = LRUCache(max_entries=2048, ttl=COUNT_CACHE_TTL)
+
+def invalidate_count_cache(model_name: str) -> int:
+  """Remove todas as contagens em cache de um modelo (ex: 'Tickets'). Deve ser chamado após um commit."""
+  return _count_cache.invalidate(lambda key: key[0] == model_name)
+
+def count_cache_stats() -> dict[str, any]:
+  return _count_cache.stats()
+
+async def _count_queryset(queryset: QuerySet, distinct: bool) -> int:
+  if distinct:
+    return len(await queryset.all())
+  return await queryset.count()
+
+async def _resolve_total_count(queryset: QuerySet, distinct: bool, count: str, count_key: dict | None) -> int | None:
+  """
+  Obtém o total de linhas conforme o modo pedido:
+    - exact: executa sempre o COUNT (e atualiza a cache).
+    - cached: usa a contagem em cache se existir e não tiver expirado.
+    - none: não conta (útil para scroll infinito).
+  """
+  if count == "none":
+    return None
+
+  if count_key is None:
+    return await _count_queryset(queryset, distinct)
+
+  cache_key = (queryset.model.__name__, _canonical_hash(count_key))
+  if count == "cached":
+    cached_total = _count_cache.get(cache_key)
+    if cached_total is not None:
+      return cached_total
+
+  total_count = await _count_queryset(queryset, distinct)
+  _count_cache.set(cache_key, total_count)
+  return total_count
+
+# --- Fim da contagem do total ---
+
+# --- Execução concorrente do count e da página ---
+
+# Número de ligações livres necessárias para correr o count e a página em paralelo
+CONCURRENT_QUERIES_MIN_FREE: int = 2
+
+def _pool_has_capacity(queryset: QuerySet, needed: int = CONCURRENT_QUERIES_MIN_FREE) -> bool:
+  """
+  Indica se a pool da ligação do modelo tem ligações livres suficientes.
+  Dentro de uma transação (ou sem pool) devolve False, porque as queries partilham a mesma ligação.
+  """
+  pool = getattr(queryset.model._meta.db, "_pool", None)
+  if pool is None:
+    return False
+  # Ligações livres mais as que a pool ainda pode abrir
+  available = pool.freesize + (pool.maxsize - pool.size)
+  return available >= needed
+
+async def _timed(awaitable: Awaitable) -> tuple[any, float]:
+  """Aguarda o awaitable e devolve o resultado e a duração em milissegundos."""
+  start_time = time.perf_counter()
+  result = await awaitable
+  return result, round((time.perf_counter() - start_time) * 1000, 2)
+
+# --- Fim da execução concorrente ---
+
 async def paginate(
   queryset: QuerySet,
   url: str,
@@ -11,45 +185,136 @@ async def paginate(
   page_size: int = 10,
   # Pass original request query params to preserve filters/sorting in links
   original_query_params: dict[str, any] | None = None,
-  distinct: bool = False
+  distinct: bool = False,
+  # Ordenação efetiva do queryset, necessária para gerar/usar cursores
+  order_by: str | None = None,
+  # Cursor opaco devolvido em "next_cursor" (ativa o modo keyset)
+  cursor: str | None = None,
+  # Função que obtém e serializa a página; por defeito usa o to_dict_pagination() de cada instância
+  fetch_page: Callable[[QuerySet], Awaitable[list[dict]]] | None = None,
+  # Modo de contagem do total: exact, cached ou none
+  count: str = "exact",
+  # Dados que identificam a contagem na cache (filtros, pesquisa, utilizador, ...)
+  count_key: dict[str, any] | None = None
 ) -> dict[str, any]:
-  start_time = time.time()
+  """
+  Pagina um queryset no modo page/page_size (offset) ou no modo cursor (keyset).
+
+  Quando `order_by` é fornecido, a ordenação é completada com o id como desempate e a
+  resposta inclui um `next_cursor`. Se `cursor` for enviado, a página é obtida a partir
+  da chave da última linha da página anterior, sem offset, pelo que o custo de cada página
+  não depende da profundidade.
+
+  Se `fetch_page` for fornecido, recebe o queryset da página (com limit/offset aplicados)
+  e devolve a lista de dicionários já serializada.
+
+  O total é obtido conforme `count` (ver `_resolve_total_count`). Com `count="none"`,
+  `total_count` e `total_pages` são None e a existência da página seguinte é determinada
+  pela linha extra obtida com a página.
+
+  O count e a página correm em paralelo (em ligações distintas da pool) quando a pool tem
+  ligações livres; caso contrário, ou dentro de uma transação, correm em sequência.
+  A duração de cada um é devolvida em `timings`.
+  """
+  if count not in COUNT_MODES:
+    raise CustomError(400, "Modo de contagem inválido", f"O modo '{count}' não é suportado. Usar: {', '.join(sorted(COUNT_MODES))}.")
+
+  cursor_mode = bool(cursor) and order_by is not None
+
+  if order_by:
+    queryset = queryset.order_by(*_keyset_ordering(order_by))
+
+  # Aplicar limit and offset para obter os dados
+  # É obtida uma linha extra para saber se existe uma página seguinte
+  if cursor_mode:
+    cursor_value, cursor_id = _decode_cursor(cursor, order_by)
+    page_queryset = queryset.filter(_keyset_condition(order_by, cursor_value, cursor_id)).limit(page_size + 1)
+  else:
+    page_queryset = queryset.offset((page - 1) * page_size).limit(page_size + 1)
+
+  async def fetch_rows():
+    """Devolve (has_more, linhas da página, dados serializados)."""
+    if fetch_page:
+      page_rows = await fetch_page(page_queryset)
+      return len(page_rows) > page_size, page_rows[:page_size], page_rows[:page_size]
+    dbData = await page_queryset
+    page_rows = dbData[:page_size]
+    # Constroi a resposta com os dados prefetched
+    return len(dbData) > page_size, page_rows, [await data.to_dict_pagination() for data in page_rows]
+
   # O count deve acontecer no filtro/order antes do limit/offset
-  if distinct:
-    total_count = len(await queryset.all())
+  def count_task():
+    return _timed(_resolve_total_count(queryset, distinct, count, count_key))
+
+  def page_task():
+    return _timed(fetch_rows())
+
+  # As duas queries são independentes; correm em ligações distintas da pool se houver capacidade
+  concurrent = _pool_has_capacity(queryset)
+  if concurrent:
+    (total_count, count_ms), (page_result, page_ms) = await asyncio.gather(count_task(), page_task())
   else:
-    total_count = await queryset.count()
-    
-  total_pages = ceil(total_count / page_size) if page_size > 0 else 0
-  print("Despois do count:",time.time() - start_time)
-  
-  # Aplicar limit and offset para obter os dados
-  dbData = await queryset.offset((page - 1) * page_size).limit(page_size)
+    total_count, count_ms = await count_task()
+    page_result, page_ms = await page_task()
+
+  if total_count is None:
+    total_pages = None
+  else:
+    total_pages = ceil(total_count / page_size) if page_size > 0 else 0
+
+  has_more, page_rows, data_list = page_result
+
+  next_cursor = None
+  if order_by and has_more:
+    last_row = page_rows[-1]
+    next_cursor = _encode_cursor(order_by, await _cursor_value(queryset, last_row, order_by), _row_id(last_row))
 
-  print(dbData)
-  # Constroi a resposta com os dados prefetched
-  data_list = [await data.to_dict_pagination() for data in dbData]
-  print("Despois de serializar a resposta:",time.time() - start_time)
-  
   # Geração do link
   base_params = original_query_params.copy() if original_query_params else {}
 
   def build_page_url(page_num):
-    if not (1 <= page_num <= total_pages):
+    if page_num < 1 or (total_pages is not None and page_num > total_pages):
       return None
     params = base_params.copy()
+    params.pop('cursor', None)
     params['page'] = page_num
     params['page_size'] = page_size
     # urlencode lida com caracteres especiais e junta-os com "&"
     return f"{url}?{urlencode(params, doseq=True)}"
 
-  print("final da função:",time.time() - start_time)
+  def strip_prefix(page_url):
+    # dá skip ao prefixo do endpoint
+    return page_url[7:] if page_url else None
+
+  def build_cursor_url(cursor_token):
+    params = base_params.copy()
+    params.pop('page', None)
+    params['cursor'] = cursor_token
+    params['page_size'] = page_size
+    return f"{url}?{urlencode(params, doseq=True)}"
+
+  timings = {"count_ms": count_ms, "page_ms": page_ms, "concurrent": concurrent}
+  if cursor_mode:
+    return {
+      "data": data_list,
+      "total_count": total_count,
+      "page": None,
+      "page_size": page_size,
+      "total_pages": total_pages,
+      "next_cursor": next_cursor,
+      "next_page": strip_prefix(build_cursor_url(next_cursor)) if next_cursor else None,
+      "previous_page": None,
+      "timings": timings,
+    }
+
   return {
     "data": data_list,
     "total_count": total_count,
     "page": page,
     "page_size": page_size,
     "total_pages": total_pages,
-    "next_page": build_page_url(page + 1)[7:] if page < total_pages else None, # dá skip ao prefixo do endpoint
-    "previous_page": build_page_url(page - 1)[7:] if page > 1 else None, # dá skip ao prefixo do endpoint
+    "next_cursor": next_cursor,
+    "next_page": strip_prefix(build_page_url(page + 1)) if has_more else None,
+    "previous_page": strip_prefix(build_page_url(page - 1)) if page > 1 else None,
+    "timings": timings,
   }
@@ -0,0 +1,74 @@
+from datetime import timedelta
+from decimal import Decimal
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from tortoise.models import Model
+from app.utils.helpers.cache import _canonical_hash
+import orjson
+
+# --- Resposta JSON rápida ---
+# Os dados são codificados diretamente com orjson (datetime, date, UUID e enums nativos),
+# sem passar pelo jsonable_encoder do FastAPI.
+
+# Opções do orjson: permite chaves não textuais (ex: ids inteiros) como no json.dumps
+ORJSON_OPTIONS: int = orjson.OPT_NON_STR_KEYS
+
+def _to_primitive(obj: any) -> any:
+  """
+  Converte os objetos que o orjson não conhece em tipos primitivos.
+  Os modelos do Tortoise são convertidos nas colunas da tabela (tal como o jsonable_encoder faz com dict(modelo)).
+  """
+  if isinstance(obj, Model):
+    return dict(obj)
+  if isinstance(obj, BaseModel):
+    return obj.model_dump()
+  if isinstance(obj, Decimal):
+    return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+  if isinstance(obj, timedelta):
+    return obj.total_seconds()
+  if isinstance(obj, (set, frozenset, tuple)):
+    return list(obj)
+  raise TypeError(f"O objeto do tipo {type(obj).__name__} não é serializável em JSON")
+
+def _dumps(content: any) -> bytes:
+  return orjson.dumps(content, default=_to_primitive, option=ORJSON_OPTIONS)
+
+class FastJSONResponse(JSONResponse):
+  """JSONResponse codificada com orjson. Aceita modelos do Tortoise e datetimes diretamente."""
+  media_type = "application/json"
+
+  def render(self, content: any) -> bytes:
+    return _dumps(content)
+
+def _fast_response(content: any, status_code: int = 200, etag: str | None = None) -> Response:
+  """
+  Devolve o conteúdo numa FastJSONResponse, com o header ETag se for indicado.
+  Se o conteúdo já for uma Response (ex: devolvida pelo controller), é devolvido sem alterações.
+  """
+  if isinstance(content, Response):
+    return content
+  headers = {"ETag": etag} if etag else None
+  return FastJSONResponse(content, status_code, headers=headers)
+
+# --- Fim da resposta JSON rápida ---
+
+# --- ETags (pedidos condicionais) ---
+
+def _weak_etag(*parts: any) -> str:
+  """Gera um ETag fraco a partir das partes que identificam a versão da resposta."""
+  return f'W/"{_canonical_hash(*parts)[:32]}"'
+
+def _etag_matches(if_none_match: str | None, etag: str | None) -> bool:
+  """Compara o header If-None-Match com o ETag atual (comparação fraca, como indicado no RFC 9110)."""
+  if not if_none_match or not etag:
+    return False
+  if if_none_match.strip() == "*":
+    return True
+  current = etag.removeprefix("W/")
+  return any(candidate.strip().removeprefix("W/") == current for candidate in if_none_match.split(","))
+
+def _not_modified(etag: str) -> Response:
+  """Resposta 304 sem corpo, com o ETag atual."""
+  return Response(status_code=304, headers={"ETag": etag})
+
+# --- Fim dos ETags ---
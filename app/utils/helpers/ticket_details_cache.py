@@ -0,0 +1,152 @@
+from app.utils.helpers.cache import LRUCache
+from app.utils.helpers.responses import _dumps
+import orjson
+import os
+
+# --- Cache dos detalhes dos tickets ---
+# Guarda, por uid, os detalhes completos já serializados (GET /tickets/details/{uid} sem fields/exclude).
+# Cada entrada regista as entidades incluídas na resposta (o ticket, os colaboradores, a categoria e as
+# suas subcategorias/empresas, o estado, ...) num índice de dependências entidade -> uids, para que a
+# alteração de uma entidade descarte só os detalhes que a incluem:
+#   - alterações dos tickets (update, anexos, CCS): pelo hook de alteração de tickets, depois do commit;
+#   - colaboradores, empresas, departamentos, categorias e subcategorias: pelos serviços que os alteram,
+#     com `_invalidate_ticket_details_for`.
+# A cache é por processo: cada entrada guarda a versão do ticket (a do ETag, ver `_ticket_details_version`)
+# a partir da qual foi construída e só é devolvida para essa versão. Uma alteração feita noutro processo
+# muda a versão, pelo que os detalhes anteriores não são servidos com o novo ETag.
+
+# Limite de memória (bytes do JSON) e de entradas da cache
+TICKET_DETAILS_CACHE_MAX_BYTES = int(os.getenv('TICKET_DETAILS_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+TICKET_DETAILS_CACHE_MAX_ENTRIES = int(os.getenv('TICKET_DETAILS_CACHE_MAX_ENTRIES', 4096))
+# Tempo de vida (segundos) de cada entrada
+TICKET_DETAILS_CACHE_TTL = float(os.getenv('TICKET_DETAILS_CACHE_TTL', 120))
+
+# Entidades incluídas nos detalhes (campo da resposta -> modelo)
+DETAILS_DEPENDENCY_FIELDS: dict[str, str] = {
+  "category": "TicketCategories",
+  "subcategory": "TicketSubcategories",
+  "status": "TicketStatuses",
+  "priority": "TicketPriorities",
+  "type": "TicketTypes",
+  "assistance_type": "TicketAssistanceTypes",
+  "company": "Companies",
+  "requester": "Employees",
+  "agent": "Employees",
+  "created_by": "Employees",
+  "ccs": "Employees",
+}
+
+# Entidades incluídas dentro das anteriores (ex: departamento do requerente, subcategorias da categoria)
+DETAILS_NESTED_DEPENDENCY_FIELDS: dict[str, str] = {
+  "department": "Departments",
+  "company": "Companies",
+  "local": "Locals",
+  "companies": "Companies",
+  "subcategories": "TicketSubcategories",
+}
+
+DependencyKey = tuple[str, int]
+
+_ticket_details_cache = LRUCache(
+  max_entries=TICKET_DETAILS_CACHE_MAX_ENTRIES,
+  ttl=TICKET_DETAILS_CACHE_TTL,
+  max_bytes=TICKET_DETAILS_CACHE_MAX_BYTES
+)
+# Índice de dependências: entidade -> uids dos detalhes guardados que a incluem (e o inverso)
+_details_dependents: dict[DependencyKey, set[str]] = {}
+_details_dependencies: dict[str, set[DependencyKey]] = {}
+# Incrementado a cada invalidação: detalhes lidos antes de uma invalidação não são guardados
+_details_generation = 0
+
+def _as_records(value: any) -> list[dict]:
+  if isinstance(value, dict):
+    return [value]
+  if isinstance(value, list):
+    return [record for record in value if isinstance(record, dict)]
+  return []
+
+def _details_dependency_keys(details: dict) -> set[DependencyKey]:
+  """Entidades (modelo, id) incluídas nos detalhes serializados de um ticket."""
+  keys = {("Tickets", details["id"])}
+  for field, model_name in DETAILS_DEPENDENCY_FIELDS.items():
+    for record in _as_records(details.get(field)):
+      if record.get("id") is not None:
+        keys.add((model_name, record["id"]))
+      for nested_field, nested_model_name in DETAILS_NESTED_DEPENDENCY_FIELDS.items():
+        for nested in _as_records(record.get(nested_field)):
+          if nested.get("id") is not None:
+            keys.add((nested_model_name, nested["id"]))
+  return keys
+
+def _ticket_details_generation() -> int:
+  """Geração atual da cache. Deve ser lida antes de obter os detalhes da base de dados."""
+  return _details_generation
+
+def _get_cached_ticket_details(uid: str, version: any) -> dict | None:
+  """Detalhes guardados do ticket, se foram construídos a partir da versão indicada."""
+  entry = _ticket_details_cache.get(uid)
+  if entry is None or entry[0] != version:
+    return None
+  return entry[1]
+
+def _cache_ticket_details(uid: str, details: dict, generation: int, version: any) -> dict:
+  """
+  Guarda os detalhes do ticket já convertidos em JSON (tal como são enviados na resposta), com a versão
+  lida antes de os obter, e regista as suas dependências. Devolve os detalhes convertidos.
+  Se houve uma invalidação depois de `generation`, os detalhes podem estar desatualizados e não são guardados.
+  """
+  encoded = _dumps(details)
+  serialized = orjson.loads(encoded)
+  if generation != _details_generation or version is None:
+    return serialized
+
+  _forget_dependencies(uid)
+  _ticket_details_cache.set(uid, (version, serialized), size=len(encoded))
+  if uid not in _ticket_details_cache:
+    # Maior do que o limite de memória
+    return serialized
+
+  keys = _details_dependency_keys(serialized)
+  _details_dependencies[uid] = keys
+  for key in keys:
+    _details_dependents.setdefault(key, set()).add(uid)
+  _prune_dependencies()
+  return serialized
+
+def _forget_dependencies(uid: str):
+  for key in _details_dependencies.pop(uid, ()):
+    dependents = _details_dependents.get(key)
+    if dependents is not None:
+      dependents.discard(uid)
+      if not dependents:
+        del _details_dependents[key]
+
+def _prune_dependencies():
+  # As entradas removidas pela própria cache (LRU, memória, TTL) deixam dependências órfãs
+  if len(_details_dependencies) <= 2 * TICKET_DETAILS_CACHE_MAX_ENTRIES:
+    return
+  for uid in [uid for uid in _details_dependencies if uid not in _ticket_details_cache]:
+    _forget_dependencies(uid)
+
+def _invalidate_ticket_details(*uids: str):
+  """Descarta os detalhes guardados dos tickets."""
+  global _details_generation
+  _details_generation += 1
+  for uid in uids:
+    _ticket_details_cache.discard(uid)
+    _forget_dependencies(uid)
+
+def _invalidate_ticket_details_for(model_name: str, *ids: int):
+  """Descarta os detalhes guardados que incluem as entidades indicadas (ex: "Employees", 3)."""
+  uids = set()
+  for entity_id in ids:
+    uids.update(_details_dependents.get((model_name, entity_id), ()))
+  _invalidate_ticket_details(*uids)
+
+def ticket_details_cache_stats() -> dict[str, any]:
+  return {
+    **_ticket_details_cache.stats(),
+    "dependencies": len(_details_dependents),
+  }
+
+# --- Fim da cache dos detalhes dos tickets ---
@@ -6,14 +6,78 @@ from .ticket_helpers import (
   _authorize_ticket_update,
   _prepare_update_data,
   _apply_direct_updates,
+  _ticket_save_fields,
   _handle_automatic_status_update,
   _handle_closed_at_update,
   _handle_ccs_update,
+  _refresh_changed_relations,
   _handle_update_logging,
   _handle_update_notifications,
   _apply_filters,
+  DEFAULT_ORDER_BY,
   _fetch_attachment,
   _construct_file_path,
   _check_file_existance,
   _determine_media_type,
-)
\ No newline at end of file
+)
+from .ticket_list import (
+  _fetch_ticket_list_page,
+  _resolve_sparse_fields,
+  TICKET_LIST_COLUMNS,
+  _ticket_list_cache_key,
+  _get_cached_ticket_list,
+  _cache_ticket_list,
+  ticket_list_cache_stats,
+)
+from .ticket_details import (
+  _fetch_ticket_details_sparse,
+  TICKET_DETAILS_FIELDS,
+)
+from .ticket_versions import (
+  _ticket_details_version,
+  _ticket_details_etag,
+  _ticket_list_version,
+  _ticket_list_etag,
+  TICKET_EMBEDDED_EMPLOYEE_FIELDS,
+  _bump_entity_version,
+)
+from .ticket_events import (
+  _on_ticket_change,
+  _notify_ticket_change,
+)
+from .ticket_filter_shapes import (
+  _log_ticket_filter_shape,
+)
+from .ticket_presets import (
+  _count_presets,
+  _preset_result_filter,
+)
+from .preset_counters import (
+  _get_preset_counts,
+  _preset_ticket_state,
+  _record_preset_change,
+)
+from .ticket_facets import (
+  _resolve_facets,
+  _fetch_ticket_facets,
+)
+from .ticket_suggest import (
+  _build_ticket_suggest_index,
+  _suggest_tickets,
+)
+from .ticket_filter_cost import (
+  _check_ticket_filter_cost,
+  _ticket_statement_timeout,
+)
+from .ticket_archive import (
+  _ticket_model_for_filters,
+)
+from .ticket_bulk import (
+  TICKET_BULK_UPDATE_MAX_TICKETS,
+  _has_bulk_filter_conditions,
+  _validate_bulk_changes,
+  _plan_bulk_ticket_update,
+  _bulk_log_names,
+  _bulk_log_values,
+  _schedule_bulk_notifications,
+)
@@ -0,0 +1,267 @@
+from app.database.models.helpdesk import Tickets, TicketPresets
+from app.utils.helpers.name_index import _fold
+from tortoise.expressions import Case, When
+from tortoise.functions import Sum, Count
+from tortoise.transactions import in_transaction
+from datetime import datetime, timezone
+from functools import reduce
+from operator import and_
+from ..filtering import FilterPlan
+from .ticket_presets import _compile_preset_plan, _plan_uses_only_ticket_columns
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# --- Contadores dos presets em memória ---
+# As contagens dos presets (globais e por técnico, para own=true) são carregadas no arranque e
+# atualizadas em cada criação/alteração de ticket, avaliando os filtros dos presets sobre o estado
+# do ticket antes e depois da alteração. GET /tickets/presets (sem search) é servido daqui, sem
+# queries. Os contadores são por processo: as alterações feitas noutros workers (e qualquer desvio)
+# são corrigidas pela reconciliação periódica com a base de dados.
+#
+# Os presets com filtros em campos de tabelas relacionadas não podem ser avaliados em memória e
+# continuam a ser contados na base de dados (ver _count_presets).
+#
+# As alterações registadas enquanto a contagem está a ser calculada (no arranque e em cada
+# reconciliação) ficam guardadas e são repostas sobre as novas contagens: para cada ticket alterado,
+# retira-se o estado que a query viu (lido na mesma transação) e soma-se o último estado registado.
+
+# Intervalo (segundos) entre reconciliações com a base de dados
+PRESET_COUNTERS_RECONCILE_SECONDS = float(os.getenv('PRESET_COUNTERS_RECONCILE_SECONDS', 300))
+
+# Operadores dos lookups que podem ser avaliados em memória
+_EVALUABLE_OPERATORS = {None, 'in', 'icontains', 'gte', 'lt', 'isnull'}
+
+def _normalize(value: any) -> any:
+  """Converte datas para datetimes sem fuso horário (UTC), como são comparadas na base de dados."""
+  if isinstance(value, str):
+    try:
+      value = datetime.fromisoformat(value)
+    except ValueError:
+      return value
+  if isinstance(value, datetime) and value.tzinfo is not None:
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+  return value
+
+def _equals(actual: any, expected: any) -> bool:
+  if actual is None:
+    return False
+  if isinstance(actual, bool):
+    return actual == (expected if isinstance(expected, bool) else str(expected).lower() in ('1', 'true'))
+  if isinstance(actual, (int, float)):
+    try:
+      return actual == float(expected)
+    except (TypeError, ValueError):
+      return False
+  # As comparações de texto da base de dados não distinguem maiúsculas nem acentos
+  return _fold(str(actual)) == _fold(str(expected))
+
+def _lookup_matches(lookup: str, expected: any, state: dict[str, any]) -> bool:
+  column, *operators = lookup.split('__')
+  operator = operators[0] if operators else None
+  actual = state.get(column)
+  if operator is None:
+    return _equals(actual, expected)
+  if operator == 'in':
+    return any(_equals(actual, item) for item in expected)
+  if operator == 'icontains':
+    return actual is not None and _fold(str(expected)) in _fold(str(actual))
+  if operator == 'isnull':
+    return (actual is None) == bool(expected)
+  actual = _normalize(actual)
+  if actual is None:
+    return False
+  if operator == 'gte':
+    return actual >= _normalize(expected)
+  return actual < _normalize(expected)
+
+def _plan_matches(plan: FilterPlan | None, state: dict[str, any]) -> bool:
+  """Avalia o plano (AND entre condições, OR dentro de cada condição) sobre o estado de um ticket."""
+  if plan is None:
+    return True
+  return all(
+    any(_lookup_matches(lookup, value, state) for lookup, value in condition)
+    for condition in plan.conditions
+  )
+
+def _plan_is_evaluable(plan: FilterPlan | None) -> bool:
+  if plan is None:
+    return True
+  if not _plan_uses_only_ticket_columns(plan):
+    return False
+  return all(
+    (lookup.split('__')[1:] or [None])[0] in _EVALUABLE_OPERATORS
+    for condition in plan.conditions
+    for lookup, _ in condition
+  )
+
+class PresetCounters:
+  """Contagens dos presets principais, globais e por técnico (agent_id)."""
+
+  def __init__(self):
+    self.presets: list[TicketPresets] = []
+    # Planos dos presets avaliados em memória (None = sem filtro, conta todos os tickets)
+    self.plans: dict[int, FilterPlan | None] = {}
+    self.columns: tuple[str, ...] = ('agent_id', 'id')
+    self.totals: dict[int, int] = {}
+    self.per_agent: dict[int | None, dict[int, int]] = {}
+    self.ready = False
+    self.seeded_at: float | None = None
+    # Último estado de cada ticket alterado durante o seed (None = fora do seed)
+    self._changes_during_seed: dict[int, dict[str, any] | None] | None = None
+
+  async def seed(self):
+    """(Re)calcula todas as contagens numa única query agrupada por técnico."""
+    self._changes_during_seed = {}
+    try:
+      presets = await TicketPresets.filter(main=True).all()
+      plans = {}
+      for preset in presets:
+        plan = _compile_preset_plan(preset)
+        if plan is not None and not plan.conditions:
+          plan = None
+        if _plan_is_evaluable(plan):
+          plans[preset.id] = plan
+
+      aggregates = {
+        f"preset_{preset_id}": (
+          Count("id") if plan is None
+          else Sum(Case(When(reduce(and_, plan.q_objects()), then=1), default=0))
+        )
+        for preset_id, plan in plans.items()
+      }
+      columns = {'agent_id', 'id'}
+      for plan in plans.values():
+        for condition in (plan.conditions if plan else ()):
+          columns.update(lookup.split('__')[0] for lookup, _ in condition)
+      columns = tuple(sorted(columns))
+
+      seen_states = {}
+      if aggregates:
+        # A contagem e o estado dos tickets alterados entretanto são lidos na mesma transação
+        async with in_transaction('helpdesk') as connection:
+          rows = await (
+            Tickets.annotate(**aggregates).group_by('agent_id').using_db(connection).values('agent_id', *aggregates)
+          )
+          while missing := self._changes_during_seed.keys() - seen_states.keys():
+            found = {
+              row['id']: row
+              for row in await Tickets.filter(id__in=list(missing)).using_db(connection).values(*columns)
+            }
+            seen_states.update({ticket_id: found.get(ticket_id) for ticket_id in missing})
+
+          per_agent = {
+            row['agent_id']: {preset_id: int(row[f"preset_{preset_id}"] or 0) for preset_id in plans}
+            for row in rows
+          }
+          totals = {
+            preset_id: sum(counts[preset_id] for counts in per_agent.values())
+            for preset_id in plans
+          }
+          self._install(presets, plans, columns, totals, per_agent, seen_states)
+      else:
+        self._install(presets, plans, columns, {}, {}, seen_states)
+    finally:
+      self._changes_during_seed = None
+
+  def _install(
+    self,
+    presets: list[TicketPresets],
+    plans: dict[int, FilterPlan | None],
+    columns: tuple[str, ...],
+    totals: dict[int, int],
+    per_agent: dict[int | None, dict[int, int]],
+    seen_states: dict[int, dict[str, any] | None],
+  ):
+    """Substitui as contagens e repõe as alterações registadas durante o seed (sem awaits pelo meio)."""
+    changes = self._changes_during_seed or {}
+    if self.ready and not changes and totals != {preset_id: self.totals.get(preset_id) for preset_id in plans}:
+      logger.info(f"Contadores dos presets corrigidos na reconciliação: {self.totals} -> {totals}")
+
+    self.presets = presets
+    self.plans = plans
+    self.columns = columns
+    self.totals = totals
+    self.per_agent = per_agent
+    self.ready = True
+    self.seeded_at = time.monotonic()
+
+    for ticket_id, after in changes.items():
+      # Os estados registados antes do seed podem não ter as colunas dos novos filtros
+      if after is not None and not set(columns) <= after.keys():
+        logger.warning(f"Alteração do ticket {ticket_id} não reposta nos contadores dos presets (até à próxima reconciliação)")
+        continue
+      self._apply(seen_states.get(ticket_id), after)
+
+  def state(self, ticket: Tickets) -> dict[str, any]:
+    """Estado do ticket nas colunas usadas pelos filtros dos presets."""
+    return {column: getattr(ticket, column, None) for column in self.columns}
+
+  def apply_change(self, before: dict[str, any] | None, after: dict[str, any] | None):
+    """Atualiza as contagens com a mudança de estado de um ticket (None = o ticket não existia / deixou de existir)."""
+    if self._changes_during_seed is not None:
+      ticket_id = (after or before or {}).get('id')
+      if ticket_id is not None:
+        self._changes_during_seed[ticket_id] = after
+    if not self.ready:
+      return
+    self._apply(before, after)
+
+  def _apply(self, before: dict[str, any] | None, after: dict[str, any] | None):
+    for preset_id, plan in self.plans.items():
+      if before is not None and _plan_matches(plan, before):
+        self._add(preset_id, before.get('agent_id'), -1)
+      if after is not None and _plan_matches(plan, after):
+        self._add(preset_id, after.get('agent_id'), 1)
+
+  def _add(self, preset_id: int, agent_id: int | None, delta: int):
+    self.totals[preset_id] = self.totals.get(preset_id, 0) + delta
+    agent_counts = self.per_agent.setdefault(agent_id, {})
+    agent_counts[preset_id] = agent_counts.get(preset_id, 0) + delta
+
+  def counts(self, agent_id: int | None = None, own: bool = False) -> dict[int, int]:
+    """Contagens dos presets avaliados em memória (de um técnico, se own)."""
+    if own:
+      agent_counts = self.per_agent.get(agent_id, {})
+      return {preset_id: agent_counts.get(preset_id, 0) for preset_id in self.plans}
+    return dict(self.totals)
+
+_preset_counters = PresetCounters()
+
+async def _seed_preset_counters():
+  try:
+    await _preset_counters.seed()
+  except Exception as e:
+    # Sem contadores, os presets continuam a ser contados na base de dados
+    logger.error(f"Error seeding preset counters: {e}", exc_info=True)
+
+async def reconcile_preset_counters_periodically():
+  """Tarefa de fundo: volta a calcular os contadores a partir da base de dados."""
+  while True:
+    await asyncio.sleep(PRESET_COUNTERS_RECONCILE_SECONDS)
+    await _seed_preset_counters()
+
+def _get_preset_counts(own_agent_id: int | None = None) -> tuple[list[TicketPresets], dict[int, int]] | None:
+  """
+  Devolve os presets e as contagens em memória (do técnico, se own_agent_id for dado),
+  ou None se os contadores ainda não estiverem carregados.
+  Os presets que não são avaliados em memória não têm contagem no dicionário.
+  """
+  if not _preset_counters.ready:
+    return None
+  return _preset_counters.presets, _preset_counters.counts(own_agent_id, own=own_agent_id is not None)
+
+def _preset_ticket_state(ticket: Tickets) -> dict[str, any]:
+  return _preset_counters.state(ticket)
+
+def _record_preset_change(before: dict[str, any] | None, after: dict[str, any] | None):
+  """Deve ser chamado depois do commit da transação que cria/altera o ticket."""
+  try:
+    _preset_counters.apply_change(before, after)
+  except Exception as e:
+    logger.error(f"Error updating preset counters: {e}", exc_info=True)
+
+# --- Fim dos contadores dos presets em memória ---
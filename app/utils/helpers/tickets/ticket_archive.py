@@ -0,0 +1,91 @@
+from app.database.models.helpdesk import Tickets, TicketsWithArchive
+from app.utils.helpers.cache import LRUCache
+from tortoise.models import Model
+from datetime import datetime, date
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# --- Arquivo dos tickets fechados ---
+# O comando app.commands.archive_tickets move os tickets fechados há mais de TICKET_ARCHIVE_AFTER_DAYS
+# dias (com os logs, CCS e anexos) para as tabelas de arquivo da migração 0005. As listagens e os
+# filtros correm sobre a tabela tickets, que fica só com os tickets recentes ou ainda abertos.
+# O arquivo só é incluído (através das views *_with_archive) quando o pedido precisa dele:
+#   - listagens com filtros de created_at ou closed_at (_after/_before) cujo intervalo começa antes
+#     da data correspondente do ticket arquivado mais recente (ou sem limite inferior);
+#   - detalhes, logs e anexos de um ticket pedido pelo uid que já não está na tabela tickets.
+# Os tickets arquivados só podem ser consultados (não podem ser alterados).
+
+# Idade mínima (dias desde o fecho) dos tickets arquivados
+TICKET_ARCHIVE_AFTER_DAYS = int(os.getenv('TICKET_ARCHIVE_AFTER_DAYS', 365))
+
+# Tempo (segundos) durante o qual a data do ticket arquivado mais recente fica em cache
+TICKET_ARCHIVE_BOUNDARY_TTL = float(os.getenv('TICKET_ARCHIVE_BOUNDARY_TTL', 300))
+
+# Colunas de datas cujos filtros podem precisar do arquivo (os tickets são arquivados pela data de
+# fecho, mas continuam a ser procurados pela data de criação)
+ARCHIVE_DATE_FIELDS: tuple[str, ...] = ('created_at', 'closed_at')
+
+_archive_boundary_cache = LRUCache(max_entries=1, ttl=TICKET_ARCHIVE_BOUNDARY_TTL)
+
+def _as_date(value: any) -> date | None:
+  if isinstance(value, str):
+    value = datetime.fromisoformat(value)
+  return value.date() if isinstance(value, datetime) else value
+
+async def _archive_boundaries() -> dict[str, date | None]:
+  """
+  Datas mais recentes (por coluna de ARCHIVE_DATE_FIELDS) dos tickets arquivados, ou None se o arquivo
+  estiver vazio (ou ainda não existir, antes da migração 0005).
+  """
+  cached = _archive_boundary_cache.get("boundaries")
+  if cached is not None:
+    return cached
+
+  columns = ", ".join(f"MAX({field}) AS {field}" for field in ARCHIVE_DATE_FIELDS)
+  try:
+    rows = await Tickets._meta.db.execute_query_dict(f"SELECT {columns} FROM tickets_archive")
+    row = rows[0] if rows else {}
+    boundaries = {field: _as_date(row.get(field)) for field in ARCHIVE_DATE_FIELDS}
+  except Exception as e:
+    logger.warning(f"Não foi possível ler o arquivo dos tickets, as listagens usam só a tabela tickets: {e}")
+    boundaries = dict.fromkeys(ARCHIVE_DATE_FIELDS)
+
+  _archive_boundary_cache.set("boundaries", boundaries)
+  return boundaries
+
+def _filters_need_archive(and_filters: dict[str, any] | None, boundaries: dict[str, date | None]) -> bool:
+  """
+  Indica se os filtros de created_at ou closed_at podem incluir tickets arquivados.
+  Sem filtros dessas datas, a listagem fica só com os tickets ativos.
+  """
+  if not isinstance(and_filters, dict):
+    return False
+
+  for field in ARCHIVE_DATE_FIELDS:
+    boundary = boundaries.get(field)
+    if boundary is None:
+      continue
+    if f'{field}_after' not in and_filters and f'{field}_before' not in and_filters:
+      continue
+
+    after = and_filters.get(f'{field}_after')
+    if after is None:
+      # Sem limite inferior: o intervalo inclui os tickets mais antigos
+      return True
+    try:
+      if datetime.fromisoformat(str(after)).date() <= boundary:
+        return True
+    except ValueError:
+      # Data inválida: o erro é devolvido pela validação dos filtros
+      continue
+  return False
+
+async def _ticket_model_for_filters(and_filters: dict[str, any] | None) -> type[Model]:
+  """Modelo a usar na listagem: Tickets, ou TicketsWithArchive se os filtros de datas precisarem do arquivo."""
+  if _filters_need_archive(and_filters, await _archive_boundaries()):
+    return TicketsWithArchive
+  return Tickets
+
+# --- Fim do arquivo dos tickets fechados ---
@@ -0,0 +1,174 @@
+from app.database.models.helpdesk import (
+  Employees,
+  TicketCategories,
+  TicketPriorities,
+  TicketStatuses,
+  TicketSubcategories,
+  Tickets,
+)
+from app.utils.errors.exceptions import CustomError
+from app.utils.helpers.employees.contact_loader import _reset_employee_contacts_loader
+from app.utils.helpers.identity_map import _reset_identity_map
+from tortoise.models import Model
+from datetime import datetime
+from app.utils.helpers.filtering import _compile_filter_plan
+from .ticket_helpers import _handle_update_notifications, DATE_FIELDS, ALLOWED_AND_FILTER_FIELDS
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# --- Atualização em massa dos tickets ---
+# PATCH /tickets/bulk aplica o mesmo conjunto de alterações (técnico, estado, prioridade, categoria)
+# a vários tickets, escolhidos pelos uids ou por and_filters:
+#   - os tickets são lidos numa única query e as alterações de cada ticket são calculadas em memória,
+#     com as mesmas regras do update de um ticket (estado "In Progress" ao atribuir um técnico,
+#     closed_at ao fechar/reabrir);
+#   - os tickets com as mesmas alterações são atualizados com um único UPDATE ... WHERE id IN (...)
+#     e os logs de todos os tickets são inseridos com um único bulk_create;
+#   - os emails são enviados depois da resposta, em lotes, numa tarefa em segundo plano.
+
+# Número máximo de tickets alterados por pedido
+TICKET_BULK_UPDATE_MAX_TICKETS = int(os.getenv('TICKET_BULK_UPDATE_MAX_TICKETS', 500))
+
+# Número de tickets por lote de emails
+TICKET_BULK_NOTIFICATION_BATCH_SIZE = int(os.getenv('TICKET_BULK_NOTIFICATION_BATCH_SIZE', 20))
+
+# Campos que podem ser alterados em massa (campo -> modelo relacionado, chave nos logs)
+BULK_UPDATE_FIELDS: dict[str, tuple[type[Model], str]] = {
+  'agent_id': (Employees, 'agent'),
+  'status_id': (TicketStatuses, 'status'),
+  'priority_id': (TicketPriorities, 'priority'),
+  'category_id': (TicketCategories, 'category'),
+}
+
+# Relações que também podem mudar automaticamente (a subcategoria é limpa ao mudar de categoria)
+BULK_LOG_RELATIONS: dict[str, tuple[type[Model], str]] = {
+  **BULK_UPDATE_FIELDS,
+  'subcategory_id': (TicketSubcategories, 'subcategory'),
+}
+
+# Relações preobtidas para os emails (as mesmas do update de um ticket)
+BULK_NOTIFICATION_PREFETCH: tuple[str, ...] = (
+  'status', 'priority', 'category', 'subcategory', 'requester',
+  'agent', 'company', 'ccs', 'type', 'assistance_type', 'created_by'
+)
+
+def _has_bulk_filter_conditions(and_filters: dict[str, any] | None) -> bool:
+  """
+  Indica se o and_filters restringe os tickets: pelo menos uma condição sem valores vazios.
+  Um filtro vazio (ou só com valores em branco) abrangeria todos os tickets.
+  """
+  plan = _compile_filter_plan(and_filters, DATE_FIELDS, ALLOWED_AND_FILTER_FIELDS)
+  return any(
+    all(not (isinstance(value, str) and not value.strip()) for _, value in condition)
+    for condition in plan.conditions
+  )
+
+async def _validate_bulk_changes(changes: dict[str, any]):
+  """
+  Verifica se as entidades indicadas nas alterações existem (o técnico tem de estar ativo).
+
+  Raises:
+    CustomError: Se uma das entidades não existir.
+  """
+  for field, value in changes.items():
+    model, name = BULK_UPDATE_FIELDS[field]
+    if value is None:
+      # Só o técnico pode ser retirado
+      if model is not Employees:
+        raise CustomError(400, "Alteração inválida", f"O campo {field} não pode ser vazio.")
+      continue
+    queryset = model.filter(id=value)
+    if model is Employees:
+      queryset = queryset.filter(deactivated_at__isnull=True, deleted_at__isnull=True)
+    if not await queryset.exists():
+      raise CustomError(400, "Alteração inválida", f"Não existe {name} com o id {value}.")
+
+def _plan_bulk_ticket_update(ticket: Tickets, changes: dict[str, any], now: datetime) -> dict[str, any]:
+  """Calcula as colunas do ticket que mudam com as alterações pedidas (vazio se nada mudar)."""
+  new_values = {field: value for field, value in changes.items() if getattr(ticket, field) != value}
+
+  # Agente passou de None -> Atribuido altera o estado para "In Progress" (2)
+  if new_values.get('agent_id') is not None and ticket.agent_id is None and not changes.get('status_id') and ticket.status_id != 2:
+    new_values['status_id'] = 2
+
+  # Alteração do estado para "Closed" (7) ou de "Closed" para outro estado
+  final_status_id = new_values.get('status_id', ticket.status_id)
+  if final_status_id == 7 and ticket.status_id != 7 and not ticket.closed_at:
+    new_values['closed_at'] = now
+  elif final_status_id != 7 and ticket.status_id == 7 and ticket.closed_at:
+    new_values['closed_at'] = None
+
+  # A subcategoria pertence à categoria anterior
+  if 'category_id' in new_values and ticket.subcategory_id is not None:
+    new_values['subcategory_id'] = None
+
+  return new_values
+
+async def _bulk_log_names(tickets: list[Tickets], plans: dict[int, dict[str, any]]) -> dict[tuple[str, int], str]:
+  """Nomes (como no to_dict_log) das entidades antigas e novas dos campos alterados, com uma query por modelo."""
+  ids_by_field: dict[str, set[int]] = {}
+  for ticket in tickets:
+    for field, value in plans.get(ticket.id, {}).items():
+      if field not in BULK_LOG_RELATIONS:
+        continue
+      ids = ids_by_field.setdefault(field, set())
+      ids.update(related_id for related_id in (getattr(ticket, field), value) if related_id is not None)
+
+  names = {}
+  for field, ids in ids_by_field.items():
+    model, _ = BULK_LOG_RELATIONS[field]
+    if model is Employees:
+      rows = await Employees.filter(id__in=ids).values('id', 'first_name', 'last_name')
+      names.update({(field, row['id']): f"{row['first_name']} {row['last_name']}" for row in rows})
+    else:
+      rows = await model.filter(id__in=ids).values('id', 'name')
+      names.update({(field, row['id']): row['name'] for row in rows})
+  return names
+
+def _bulk_log_values(ticket: Tickets, new_values: dict[str, any], names: dict[tuple[str, int], str]) -> tuple[dict, dict]:
+  """Valores antigos e novos do log do ticket, com as mesmas chaves do log do update de um ticket."""
+  old_details, new_details = {}, {}
+  for field, value in new_values.items():
+    if field == 'closed_at':
+      old_details['closed_at'] = ticket.closed_at.isoformat() if ticket.closed_at else None
+      new_details['closed_at'] = value.isoformat() if value else None
+    else:
+      _, log_key = BULK_LOG_RELATIONS[field]
+      old_details[log_key] = names.get((field, getattr(ticket, field)))
+      new_details[log_key] = names.get((field, value))
+  return old_details, new_details
+
+# Tarefas de envio dos emails em curso (referência para não serem recolhidas pelo garbage collector)
+_bulk_notification_tasks: set[asyncio.Task] = set()
+
+def _schedule_bulk_notifications(notifications: list[tuple[int, bool]]):
+  """Agenda o envio dos emails (id do ticket, técnico atribuído) numa tarefa em segundo plano."""
+  if not notifications:
+    return
+  task = asyncio.create_task(_send_bulk_notifications(notifications))
+  _bulk_notification_tasks.add(task)
+  task.add_done_callback(_bulk_notification_tasks.discard)
+
+async def _send_bulk_notifications(notifications: list[tuple[int, bool]]):
+  """Envia os emails da atualização em massa, em lotes de TICKET_BULK_NOTIFICATION_BATCH_SIZE tickets."""
+  # A tarefa continua depois do fim do pedido: usa o seu próprio identity map e loader de contactos
+  _reset_identity_map()
+  _reset_employee_contacts_loader()
+
+  for start in range(0, len(notifications), TICKET_BULK_NOTIFICATION_BATCH_SIZE):
+    batch = dict(notifications[start:start + TICKET_BULK_NOTIFICATION_BATCH_SIZE])
+    try:
+      tickets = await Tickets.filter(id__in=list(batch)).prefetch_related(*BULK_NOTIFICATION_PREFETCH)
+      details = [await ticket.to_dict_details(list(ticket.ccs)) for ticket in tickets]
+      # Os emails do lote são enviados em simultâneo
+      await asyncio.gather(*(
+        _handle_update_notifications(ticket, final_details, batch[ticket.id])
+        for ticket, final_details in zip(tickets, details)
+      ))
+    except Exception as e:
+      logger.error(f"Error sending bulk update notifications for tickets {list(batch)}: {e}", exc_info=True)
+
+# --- Fim da atualização em massa dos tickets ---
@@ -0,0 +1,135 @@
+from app.database.models.helpdesk import (
+  Employees,
+  Companies,
+  TicketAssistanceTypes,
+  TicketCategories,
+  TicketPriorities,
+  TicketStatuses,
+  TicketSubcategories,
+  TicketTypes,
+  Tickets,
+)
+from app.utils.helpers.employees.contact_loader import _prime_employee_contacts
+from app.utils.helpers.identity_map import _get_by_pk
+from app.utils.helpers.ticket_details_cache import _invalidate_ticket_details_for
+from .ticket_events import _on_ticket_change
+from tortoise.models import Model
+from typing import Awaitable, Callable
+
+# --- Detalhes do ticket com campos esparsos ---
+# Quando o pedido indica `fields`/`exclude`, só são lidas as colunas e as relações pedidas.
+# O formato de cada campo é igual ao de Tickets.to_dict_details().
+
+# Colunas diretas da tabela tickets
+TICKET_DETAILS_COLUMNS: tuple[str, ...] = (
+  "id",
+  "uid",
+  "subject",
+  "request",
+  "response",
+  "internal_comment",
+  "spent_time",
+  "closed_at",
+  "created_at",
+  "prevention_date",
+)
+
+# Colunas de data serializadas em ISO 8601
+_TICKET_DETAILS_DATES: tuple[str, ...] = ("closed_at", "created_at", "prevention_date")
+
+async def _load_category(category_id: int) -> dict | None:
+  category = await _get_by_pk(TicketCategories, category_id)
+  return await category.to_dict() if category else None
+
+async def _load_contacts(employee_id: int) -> dict | None:
+  employee = await _get_by_pk(Employees, employee_id)
+  return await employee.to_dict_contacts() if employee else None
+
+def _load_model(model) -> Callable[[int], Awaitable[any]]:
+  """Devolve um loader que obtém a instância do modelo pela chave primária (pelo identity map do pedido)."""
+  async def loader(related_id: int):
+    return await _get_by_pk(model, related_id)
+  return loader
+
+# Relações (campo da resposta -> coluna da FK, loader)
+TICKET_DETAILS_RELATIONS: dict[str, tuple[str, Callable[[int], Awaitable[any]]]] = {
+  "status": ("status_id", _load_model(TicketStatuses)),
+  "priority": ("priority_id", _load_model(TicketPriorities)),
+  "category": ("category_id", _load_category),
+  "subcategory": ("subcategory_id", _load_model(TicketSubcategories)),
+  "requester": ("requester_id", _load_contacts),
+  "agent": ("agent_id", _load_contacts),
+  "created_by": ("created_by_id", _load_model(Employees)),
+  "assistance_type": ("assistance_type_id", _load_model(TicketAssistanceTypes)),
+  "type": ("type_id", _load_model(TicketTypes)),
+  "company": ("company_id", _load_model(Companies)),
+}
+
+async def _load_attachments(ticket_id: int, model: type[Model] = Tickets) -> list:
+  # Os anexos de um ticket arquivado estão na view com o arquivo (ver TicketsWithArchive)
+  attachments_model = model._meta.fields_map["attachments"].related_model
+  return list(await attachments_model.filter(ticket_id=ticket_id))
+
+async def _load_ccs(ticket_id: int, model: type[Model] = Tickets) -> list[dict]:
+  ccs_relation = model._meta.fields_map["ccs"].related_name
+  cc_employees = await Employees.filter(**{f"{ccs_relation}__id": ticket_id})
+  # Os emails de todos os CCS são carregados numa única query
+  _prime_employee_contacts(*(cc.id for cc in cc_employees))
+  return [await cc.to_dict_employee_emails() for cc in cc_employees]
+
+# Coleções associadas ao ticket (campo da resposta -> loader pelo id e modelo do ticket)
+TICKET_DETAILS_COLLECTIONS: dict[str, Callable[[int, type[Model]], Awaitable[list]]] = {
+  "attachments": _load_attachments,
+  "ccs": _load_ccs,
+}
+
+# Todos os campos, pela ordem de Tickets.to_dict_details()
+TICKET_DETAILS_FIELDS: tuple[str, ...] = (
+  *TICKET_DETAILS_COLUMNS,
+  *TICKET_DETAILS_RELATIONS,
+  *TICKET_DETAILS_COLLECTIONS,
+)
+
+async def _fetch_ticket_details_sparse(uid: str, selected: tuple[str, ...], model: type[Model] = Tickets) -> dict | None:
+  """
+  Obtém os detalhes de um ticket apenas com os campos selecionados.
+  A linha do ticket é lida com uma projeção das colunas pedidas (mais as FKs das relações pedidas)
+  e cada relação pedida é obtida com uma única query.
+  `model` é Tickets ou, para um ticket arquivado, TicketsWithArchive.
+
+  Returns:
+    O dicionário com os campos selecionados, ou None se o ticket não existir.
+  """
+  columns = [field for field in selected if field in TICKET_DETAILS_COLUMNS]
+  fk_columns = [TICKET_DETAILS_RELATIONS[field][0] for field in selected if field in TICKET_DETAILS_RELATIONS]
+  row = await model.filter(uid=uid).first().values(*dict.fromkeys(("id", *columns, *fk_columns)))
+  if not row:
+    return None
+
+  # Os contactos do requerente e do técnico são carregados na mesma query
+  _prime_employee_contacts(row.get("requester_id"), row.get("agent_id"))
+
+  details = {}
+  for field in selected:
+    if field in TICKET_DETAILS_COLUMNS:
+      value = row[field]
+      if field in _TICKET_DETAILS_DATES and value is not None:
+        value = value.isoformat()
+      details[field] = value
+    elif field in TICKET_DETAILS_RELATIONS:
+      fk_column, loader = TICKET_DETAILS_RELATIONS[field]
+      details[field] = await loader(row[fk_column]) if row[fk_column] is not None else None
+    else:
+      details[field] = await TICKET_DETAILS_COLLECTIONS[field](row["id"], model)
+  return details
+
+# --- Fim dos detalhes do ticket com campos esparsos ---
+
+# --- Invalidação da cache dos detalhes ---
+
+@_on_ticket_change
+def _invalidate_changed_ticket_details(ticket_ids: list[int]):
+  # Alterações do ticket, dos seus anexos ou CCS (ver ticket_details_cache.py)
+  _invalidate_ticket_details_for("Tickets", *ticket_ids)
+
+# --- Fim da invalidação da cache dos detalhes ---
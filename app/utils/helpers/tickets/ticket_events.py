@@ -0,0 +1,41 @@
+from app.utils.helpers.paginate import invalidate_count_cache
+from typing import Awaitable, Callable
+import inspect
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --- Hook de alteração de tickets ---
+# As caches e contadores derivados dos tickets registam-se aqui e são notificados depois do
+# commit de qualquer criação ou alteração de tickets.
+
+TicketChangeListener = Callable[[list[int]], Awaitable[None] | None]
+
+_ticket_change_listeners: list[TicketChangeListener] = []
+
+def _on_ticket_change(listener: TicketChangeListener) -> TicketChangeListener:
+  """Regista uma função a chamar com os ids dos tickets alterados. Pode ser usado como decorator."""
+  _ticket_change_listeners.append(listener)
+  return listener
+
+async def _notify_ticket_change(*ticket_ids: int):
+  """
+  Notifica os listeners de que os tickets foram criados ou alterados.
+  Deve ser chamado depois do commit da transação. Um erro num listener é registado
+  e não interrompe os restantes.
+  """
+  changed_ids = list(ticket_ids)
+  for listener in _ticket_change_listeners:
+    try:
+      result = listener(changed_ids)
+      if inspect.isawaitable(result):
+        await result
+    except Exception as e:
+      logger.error(f"Error in ticket change listener {getattr(listener, '__name__', listener)}: {e}", exc_info=True)
+
+@_on_ticket_change
+def _invalidate_ticket_counts(ticket_ids: list[int]):
+  # Os totais das listagens podem mudar (novo ticket, mudança de estado, agente, ...)
+  invalidate_count_cache("Tickets")
+
+# --- Fim do hook de alteração de tickets ---
@@ -0,0 +1,81 @@
+from app.utils.errors.exceptions import CustomError
+from tortoise.expressions import RawSQL
+from tortoise.functions import Count
+from tortoise.queryset import QuerySet
+
+# --- Facetas da listagem de tickets ---
+# Contagens por estado, prioridade, categoria, técnico, empresa, ... para os filtros e pesquisa atuais.
+# Todas as facetas pedidas são calculadas numa única query: um GROUP BY por faceta, juntos com
+# UNION ALL, que devolve uma linha por valor distinto de cada faceta (e não uma por combinação).
+
+# Colunas que podem ser pedidas como facetas
+TICKET_FACET_FIELDS: tuple[str, ...] = (
+  'status_id',
+  'priority_id',
+  'category_id',
+  'subcategory_id',
+  'type_id',
+  'assistance_type_id',
+  'agent_id',
+  'company_id',
+)
+
+# Facetas devolvidas quando o parâmetro não é enviado
+DEFAULT_TICKET_FACETS: tuple[str, ...] = ('status_id', 'priority_id', 'category_id', 'agent_id', 'company_id')
+
+def _resolve_facets(facets: str | None) -> tuple[str, ...]:
+  """
+  Valida a lista de facetas (separadas por vírgula) e devolve-a pela ordem de TICKET_FACET_FIELDS.
+
+  Raises:
+    CustomError: Se alguma faceta não for permitida.
+  """
+  if not facets:
+    return DEFAULT_TICKET_FACETS
+  requested = {facet.strip() for facet in facets.split(',') if facet.strip()}
+  invalid = requested - set(TICKET_FACET_FIELDS)
+  if invalid:
+    raise CustomError(
+      400,
+      "Facetas inválidas",
+      f"Facetas não permitidas: {', '.join(sorted(invalid))}. Permitidas: {', '.join(TICKET_FACET_FIELDS)}"
+    )
+  return tuple(facet for facet in TICKET_FACET_FIELDS if facet in requested)
+
+async def _fetch_ticket_facets(queryset: QuerySet, facets: tuple[str, ...]) -> dict[str, list[dict]]:
+  """
+  Calcula as contagens das facetas sobre o queryset já filtrado (ver _apply_filters).
+
+  Returns:
+    {faceta: [{"id": valor, "count": n}, ...]}, cada lista ordenada pela contagem (descendente).
+  """
+  # A ordenação não se aplica a uma query agrupada
+  statements = []
+  for facet in facets:
+    facet_queryset = queryset.order_by().annotate(
+      facet=RawSQL(f"'{facet}'"), # facet vem de TICKET_FACET_FIELDS
+      facet_count=Count('id'),
+    ).group_by(facet).values('facet', 'facet_count', value=facet)
+    facet_queryset._choose_db_if_not_chosen()
+    facet_queryset._make_query()
+    statements.append(facet_queryset.query.get_parameterized_sql())
+
+  # Mesma ligação do queryset (ver _ticket_statement_timeout)
+  rows = await facet_queryset._db.execute_query_dict(
+    " UNION ALL ".join(sql for sql, _ in statements),
+    [param for _, params in statements for param in params],
+  )
+
+  counts: dict[str, dict[any, int]] = {facet: {} for facet in facets}
+  for row in rows:
+    counts[row['facet']][row['value']] = int(row['facet_count'])
+
+  return {
+    facet: [
+      {"id": value, "count": count}
+      for value, count in sorted(facet_counts.items(), key=lambda item: -item[1])
+    ]
+    for facet, facet_counts in counts.items()
+  }
+
+# --- Fim das facetas da listagem de tickets ---
@@ -0,0 +1,213 @@
+from app.database.models.helpdesk import Tickets
+from app.utils.errors.exceptions import CustomError
+from tortoise import fields
+from tortoise.exceptions import OperationalError
+from tortoise.queryset import QuerySet
+from tortoise.transactions import in_transaction
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from ..filtering import _compile_filter_plan, FilterPlan
+from .ticket_helpers import DATE_FIELDS, ALLOWED_AND_FILTER_FIELDS
+from .ticket_search import TICKET_FULLTEXT_LIKE_COLUMNS, _fulltext_search_enabled, _fulltext_term
+import json
+import logging
+import os
+
+# --- Custo dos filtros das listagens de tickets ---
+# Cada combinação de filtros (and_filters) e pesquisa é avaliada antes de chegar à base de dados:
+# os LIKE '%...%' em colunas TextField (request, response, internal_comment) obrigam a ler o texto de
+# todas as linhas candidatas, os LIKE em colunas curtas custam menos e cada tabela relacionada é mais
+# um join. Um intervalo de datas (created_at_after, ...) limita as linhas lidas pelos índices da
+# migração 0004.
+# Cada palavra da pesquisa custa uma vez (SEARCH_WORD_COST, ou o MATCH no índice FULLTEXT), e não um
+# LIKE por coluna: as colunas são lidas na mesma passagem pela linha. A pesquisa normal (algumas
+# palavras, mesmo curtas) fica abaixo do limite.
+#   - custo <= FILTER_COST_LIMIT: a query corre normalmente;
+#   - custo acima do limite: corre com um tempo máximo de execução no servidor;
+#   - custo dos and_filters acima do limite, sem intervalo de datas: o pedido é rejeitado a pedir um
+#     intervalo de datas (só os filtros, não a pesquisa, obrigam ao intervalo);
+#   - custo acima de FILTER_COST_MAX: o pedido é sempre rejeitado.
+# Todos os custos e rejeições são registados (logger app.tickets.filter_cost) para afinar os limites.
+
+filter_cost_logger = logging.getLogger("app.tickets.filter_cost")
+
+FILTER_COST_MARKER = "ticket_filter_cost"
+
+# Acima deste custo é preciso um intervalo de datas (e a query corre com tempo máximo)
+FILTER_COST_LIMIT = int(os.getenv('FILTER_COST_LIMIT', 80))
+
+# Acima deste custo o pedido é sempre rejeitado
+FILTER_COST_MAX = int(os.getenv('FILTER_COST_MAX', 200))
+
+# Tempo máximo (ms) das queries acima de FILTER_COST_LIMIT (MAX_EXECUTION_TIME do MySQL)
+FILTER_COST_STATEMENT_TIMEOUT_MS = int(os.getenv('FILTER_COST_STATEMENT_TIMEOUT_MS', 5000))
+
+# Pesos do modelo de custo
+TEXT_LIKE_COST = 10
+LIKE_COST = 3
+JOIN_COST = 4
+FULLTEXT_MATCH_COST = 2
+# Palavra da pesquisa procurada com LIKE (todas as colunas de texto, na mesma passagem)
+SEARCH_WORD_COST = TEXT_LIKE_COST
+
+@dataclass(frozen=True)
+class FilterCost:
+  """Estimativa do custo de uma combinação de filtros e pesquisa."""
+  text_like_clauses: int = 0
+  like_clauses: int = 0
+  fulltext_matches: int = 0
+  search_like_words: int = 0
+  joins: int = 0
+  date_bounded: bool = False
+
+  @property
+  def filter_score(self) -> int:
+    """Custo dos and_filters (sem a pesquisa)."""
+    return (
+      self.text_like_clauses * TEXT_LIKE_COST
+      + self.like_clauses * LIKE_COST
+      + self.joins * JOIN_COST
+    )
+
+  @property
+  def score(self) -> int:
+    return (
+      self.filter_score
+      + self.fulltext_matches * (FULLTEXT_MATCH_COST + LIKE_COST * len(TICKET_FULLTEXT_LIKE_COLUMNS))
+      + self.search_like_words * SEARCH_WORD_COST
+    )
+
+  @property
+  def needs_timeout(self) -> bool:
+    return self.score > FILTER_COST_LIMIT
+
+  @property
+  def needs_date_range(self) -> bool:
+    return self.filter_score > FILTER_COST_LIMIT and not self.date_bounded
+
+def _is_text_field(field_name: str) -> bool:
+  return isinstance(Tickets._meta.fields_map.get(field_name), fields.TextField)
+
+def _estimate_filter_cost(plan: FilterPlan, search_words: list[str] | None = None, fulltext: bool = False) -> FilterCost:
+  """
+  Estima o custo do plano de filtros e das palavras da pesquisa.
+  Cada palavra custa um MATCH no índice FULLTEXT (MySQL) ou, se não puder usar o índice, um
+  SEARCH_WORD_COST. Os nomes das relações são resolvidos em memória e não entram no custo.
+  """
+  text_like_clauses = like_clauses = 0
+  joined_relations = set()
+  date_bounded = False
+  for condition in plan.conditions:
+    for lookup, _ in condition:
+      field_name, *operators = lookup.split('__')
+      if field_name not in Tickets._meta.fields_db_projection:
+        joined_relations.add(field_name)
+      if 'icontains' in operators:
+        if _is_text_field(field_name):
+          text_like_clauses += 1
+        else:
+          like_clauses += 1
+      elif field_name in DATE_FIELDS and operators and operators[0] in ('gte', 'lt'):
+        date_bounded = True
+
+  fulltext_matches = search_like_words = 0
+  for word in search_words or ():
+    if fulltext and _fulltext_term(word) is not None:
+      fulltext_matches += 1
+    else:
+      search_like_words += 1
+
+  return FilterCost(
+    text_like_clauses=text_like_clauses,
+    like_clauses=like_clauses,
+    fulltext_matches=fulltext_matches,
+    search_like_words=search_like_words,
+    joins=len(joined_relations),
+    date_bounded=date_bounded,
+  )
+
+def _log_filter_cost(cost: FilterCost, decision: str, context: str):
+  filter_cost_logger.info(f"{FILTER_COST_MARKER} " + json.dumps({
+    "context": context,
+    "decision": decision,
+    "score": cost.score,
+    "text_like_clauses": cost.text_like_clauses,
+    "like_clauses": cost.like_clauses,
+    "fulltext_matches": cost.fulltext_matches,
+    "search_like_words": cost.search_like_words,
+    "joins": cost.joins,
+    "date_bounded": cost.date_bounded,
+  }, sort_keys=True))
+
+def _check_ticket_filter_cost(
+  queryset: QuerySet,
+  and_filters: dict[str, any] | str | None,
+  search: str | None,
+  context: str = "tickets"
+) -> FilterCost:
+  """
+  Estima o custo dos filtros e da pesquisa de um pedido e aplica os limites.
+
+  Returns:
+    O custo estimado. Se `needs_timeout`, a query deve correr dentro de `_ticket_statement_timeout`.
+
+  Raises:
+    CustomError: Se o custo estiver acima de FILTER_COST_MAX, ou se o custo dos and_filters estiver acima
+      de FILTER_COST_LIMIT sem intervalo de datas.
+  """
+  plan = _compile_filter_plan(and_filters, DATE_FIELDS, ALLOWED_AND_FILTER_FIELDS)
+  search_words = search.split() if search else []
+  cost = _estimate_filter_cost(plan, search_words, _fulltext_search_enabled(queryset))
+
+  if cost.score > FILTER_COST_MAX:
+    _log_filter_cost(cost, "rejected", context)
+    raise CustomError(
+      400,
+      "Filtro demasiado pesado",
+      f"A combinação de filtros e pesquisa é demasiado pesada (custo {cost.score}, máximo {FILTER_COST_MAX}). "
+      "Reduza o número de termos de texto pesquisados."
+    )
+  if cost.needs_date_range:
+    _log_filter_cost(cost, "date_range_required", context)
+    raise CustomError(
+      400,
+      "Filtro demasiado pesado",
+      f"A combinação de filtros é demasiado pesada (custo {cost.filter_score}, limite {FILTER_COST_LIMIT}) "
+      "para ser feita sobre todos os tickets. Indique um intervalo de datas (ex: created_at_after / created_at_before)."
+    )
+
+  _log_filter_cost(cost, "timeout" if cost.needs_timeout else "ok", context)
+  return cost
+
+@asynccontextmanager
+async def _ticket_statement_timeout(queryset: QuerySet, cost: FilterCost):
+  """
+  Para os filtros acima de FILTER_COST_LIMIT, corre as queries do queryset numa ligação dedicada
+  com MAX_EXECUTION_TIME (só em MySQL). Devolve o queryset a usar dentro do bloco.
+
+  Raises:
+    CustomError: Se uma query exceder o tempo máximo.
+  """
+  if not cost.needs_timeout or queryset.model._meta.db.capabilities.dialect != "mysql":
+    yield queryset
+    return
+
+  async with in_transaction() as connection:
+    await connection.execute_script(f"SET SESSION MAX_EXECUTION_TIME = {FILTER_COST_STATEMENT_TIMEOUT_MS}")
+    try:
+      yield queryset.using_db(connection)
+    except OperationalError as e:
+      # ER_QUERY_TIMEOUT (3024): "maximum statement execution time exceeded"
+      if "execution time exceeded" not in str(e):
+        raise
+      _log_filter_cost(cost, "timed_out", "statement_timeout")
+      raise CustomError(
+        400,
+        "Filtro demasiado pesado",
+        f"A pesquisa excedeu o tempo máximo de {FILTER_COST_STATEMENT_TIMEOUT_MS} ms. Reduza o intervalo de datas ou os termos pesquisados."
+      ) from e
+    finally:
+      # A ligação volta para a pool: repõe o valor por defeito
+      await connection.execute_script("SET SESSION MAX_EXECUTION_TIME = 0")
+
+# --- Fim do custo dos filtros das listagens de tickets ---
@@ -0,0 +1,64 @@
+from datetime import date
+import json
+import logging
+import re
+
+# --- Formas dos filtros das listagens de tickets ---
+# Cada pedido a GET /tickets regista a "forma" dos filtros usados (só os nomes dos campos, a ordenação
+# e se há pesquisa/own, nunca os valores). O comando app.commands.ticket_index_advisor lê estas linhas
+# dos logs de produção e passa cada forma pelo EXPLAIN, para encontrar as que ainda fazem full scan.
+
+filter_shape_logger = logging.getLogger("app.tickets.filter_shapes")
+
+FILTER_SHAPE_MARKER = "ticket_filter_shape"
+
+_FILTER_SHAPE_PATTERN = re.compile(rf"{FILTER_SHAPE_MARKER} (\{{.*\}})")
+
+def _ticket_filter_shape(
+  and_filters: dict[str, any] | None,
+  search: str | None,
+  order_by: str | None,
+  own: bool | None
+) -> dict[str, any]:
+  return {
+    "filters": sorted(and_filters or {}),
+    "search": bool(search and search.strip()),
+    "order_by": order_by,
+    "own": bool(own),
+  }
+
+def _log_ticket_filter_shape(
+  and_filters: dict[str, any] | None,
+  search: str | None,
+  order_by: str | None,
+  own: bool | None
+):
+  shape = _ticket_filter_shape(and_filters, search, order_by, own)
+  filter_shape_logger.info(f"{FILTER_SHAPE_MARKER} {json.dumps(shape, sort_keys=True)}")
+
+def _parse_ticket_filter_shape(line: str) -> dict[str, any] | None:
+  """Extrai a forma dos filtros de uma linha de log. Devolve None se a linha não tiver nenhuma."""
+  match = _FILTER_SHAPE_PATTERN.search(line)
+  if not match:
+    return None
+  try:
+    shape = json.loads(match.group(1))
+  except json.JSONDecodeError:
+    return None
+  return shape if isinstance(shape, dict) else None
+
+def _sample_filters(filter_fields: list[str]) -> dict[str, str]:
+  """Valores de exemplo para reproduzir uma forma de filtros (o EXPLAIN só depende dos campos)."""
+  sample = {}
+  for field in filter_fields:
+    if field.endswith('_after') or field.endswith('_before'):
+      sample[field] = date.today().isoformat()
+    elif field.endswith('_isnull'):
+      sample[field] = "0"
+    elif field == "id" or field.endswith('_id'):
+      sample[field] = "1"
+    else:
+      sample[field] = "x"
+  return sample
+
+# --- Fim das formas dos filtros das listagens de tickets ---
@@ -1,43 +1,82 @@
-from app.database.models.helpdesk import Tickets, TicketLogs, TicketAttachments, Employees
+from app.database.models.helpdesk import Tickets, TicketLogs, TicketAttachments, TicketAttachmentsWithArchive, Employees
 from app.services.users import get_users_by_ids, get_employee_basic_info
 from app.services.emails.emails import ticket_email
 from app.utils.errors.exceptions import CustomError
+from app.utils.helpers.identity_map import _load_related
 from tortoise.queryset import QuerySet
+from tortoise.expressions import F
+from pypika_tortoise import Table
 from datetime import datetime, timezone
 from app.services.logs import LogService
 from fastapi import UploadFile
 from pathlib import Path
+from collections import Counter
 import aiofiles
 import os
 import uuid
 from ..filtering import (
   _apply_and_filters,
-  _apply_or_search,
   _apply_ordering, 
 )
+from .ticket_search import _apply_ticket_search
 import logging
 import mimetypes
 
 logger = logging.getLogger(__name__)
 
-# --- Helper para adicionar ccs na criação do ticket ---
-async def _handle_ticket_creation_ccs(ccs_ids: list[int], new_ticket: Tickets):
-  if not ccs_ids:
+# --- Helpers dos CCS dos tickets ---
+# As associações na tabela tickets_ccs são escritas diretamente: um único INSERT de várias linhas
+# para os CCS adicionados e um único DELETE ... IN para os removidos (sem o SELECT prévio do
+# `ticket.ccs.add` nem o `clear` seguido de novo INSERT de todos os CCS).
+
+def _ticket_ccs_table() -> tuple[Table, any, any]:
+  """Tabela tickets_ccs e as colunas do ticket e do colaborador."""
+  ccs_field = Tickets._meta.fields_map['ccs']
+  table = Table(ccs_field.through)
+  return table, table[ccs_field.backward_key], table[ccs_field.forward_key]
+
+async def _insert_ticket_ccs(ticket_id: int, employee_ids: list[int]):
+  """Associa os colaboradores (que ainda não são CCS) ao ticket, num único INSERT."""
+  if not employee_ids:
     return
+  table, ticket_column, employee_column = _ticket_ccs_table()
+  db = Tickets._meta.db
+  query = db.query_class.into(table).columns(employee_column, ticket_column)
+  for employee_id in employee_ids:
+    query = query.insert(employee_id, ticket_id)
+  await db.execute_query(*query.get_parameterized_sql())
+
+async def _delete_ticket_ccs(ticket_id: int, employee_ids: list[int]):
+  """Remove os colaboradores dos CCS do ticket, num único DELETE."""
+  if not employee_ids:
+    return
+  table, ticket_column, employee_column = _ticket_ccs_table()
+  db = Tickets._meta.db
+  query = db.query_class.from_(table).where(ticket_column == ticket_id).where(employee_column.isin(employee_ids)).delete()
+  await db.execute_query(*query.get_parameterized_sql())
+
+async def _handle_ticket_creation_ccs(ccs_ids: list[int], new_ticket: Tickets) -> bool:
+  """
+  Associa os CCS ao ticket criado. Devolve se foi adicionado algum CCS.
+  A versão do ticket (updated_at) é a da criação, na mesma transação.
+  """
+  if not ccs_ids:
+    return False
 
   try:
-    # Obtem os objetos dos colaboradores para os ids inseridos, using the transaction connection
+    # Obtem os objetos dos colaboradores (ativos) para os ids inseridos, using the transaction connection
     ccs_employees_to_add = await get_users_by_ids(ccs_ids)
 
     # Adiciona os colaboradores obtidos na many-to-many
     if ccs_employees_to_add:
-      # This operation uses the connection implicitly via the new_ticket object
-      await new_ticket.ccs.add(*ccs_employees_to_add)
+      await _insert_ticket_ccs(new_ticket.id, [employee.id for employee in ccs_employees_to_add])
+      return True
+    return False
 
   except Exception as e:
     raise CustomError(500, f"Ocorreu um erro ao adicionar CCS ao ticket {new_ticket.id}", str(e)) from e
   
-# --- Fim do Helper para adicionar ccs na criação do ticket ---
+# --- Fim dos Helpers dos CCS dos tickets ---
 
 # --- Helper de Upload de Ficheiros ---
 # --- Configurações para adicionar ficheiros ---
@@ -95,12 +134,20 @@ def _prepare_attachment_data(ticket: Tickets, unique_filename: str, original_fil
   }
 
 async def _bulk_create_attachments(attachment_records_data: list[dict]):
-  """Executa um bulk create nos TicketAttachment."""
+  """
+  Executa um bulk create nos TicketAttachment e incrementa o attachments_count de cada ticket.
+  Deve ser chamado dentro da transação, para que os anexos e o contador fiquem consistentes.
+  """
   if not attachment_records_data:
     return # Não há nada para criar
 
   try:
     await TicketAttachments.bulk_create([TicketAttachments(**data) for data in attachment_records_data])
+
+    # Incrementa o contador de anexos de cada ticket
+    added_per_ticket = Counter(data['ticket_id'] for data in attachment_records_data)
+    for ticket_id, added in added_per_ticket.items():
+      await Tickets.filter(id=ticket_id).update(attachments_count=F('attachments_count') + added)
   except Exception as db_error:
     raise CustomError(500, "Erro ao guardar anexos na base de dados", str(db_error)) from db_error
 
@@ -138,14 +185,15 @@ async def _log_file_addition(ticket: Tickets, attachment_records_data: list[dict
 
 # --- Handler de Upload de Ficheiros  ---
 
-async def _handle_file_uploads(ticket: Tickets, files: list[UploadFile], current_user: dict | None = None):
+async def _handle_file_uploads(ticket: Tickets, files: list[UploadFile], current_user: dict | None = None) -> bool:
   """
     Lida com a validação, armazenamento, e registo de uploads de ficheiros para um ticket.
     Esta função está implementada para ser chamada dentro de uma transação.
     Se ocorrer algum erro durante a operação, cancela a transação, revertendo todas os passos anteriores.
+    Devolve se foi adicionado algum anexo (a versão do ticket é atualizada por quem chama).
   """
   if not files:
-    return
+    return False
 
   attachment_records_data = []
   saved_file_paths = []
@@ -168,10 +216,15 @@ async def _handle_file_uploads(ticket: Tickets, files: list[UploadFile], current
 
     # Bulk create dos registos de ficheiros
     await _bulk_create_attachments(attachment_records_data)
+    # Atualiza o contador na instância (usado na resposta; o save() do update não escreve esta coluna)
+    if attachment_records_data:
+      await ticket.refresh_from_db(fields=['attachments_count'])
 
     # Cria um Log
     await _log_file_addition(ticket, attachment_records_data, current_user)
 
+    return bool(attachment_records_data)
+
   except CustomError as e:
     # Tenta fazer um cleanup em qualquer ficheiro inserido durante o processo.
     _cleanup_saved_files(saved_file_paths)
@@ -214,65 +267,116 @@ def _prepare_update_data(ticket_data: dict) -> tuple[dict, list[int] | None]:
   # Se for preciso adicionar fk, é preciso fazer pop e devolver no return para a função mãe 
   # Para poder ser tratado posteriormente
   if 'prevention_date' in update_data:
-    update_data['prevention_date'] = update_data['prevention_date'].astimezone(timezone.utc).isoformat()
+    # Fica como datetime: o ticket em memória é serializado (to_dict_log / to_dict_details) sem ser relido
+    update_data['prevention_date'] = update_data['prevention_date'].astimezone(timezone.utc)
   # Previne alterar campos que não devem ser alterados via update
-  protected_fields = ['id', 'uid', 'created_at', 'created_by_id']
+  protected_fields = ['id', 'uid', 'created_at', 'updated_at', 'created_by_id']
   for field in protected_fields:
     update_data.pop(field, None) # Remove o campo se existir
 
   return update_data, ccs_ids_to_update
 
-def _apply_direct_updates(ticket: Tickets, update_data: dict):
-  """Aplica updates nos campos diretos apartir do dict preparado anteriormente "_prepare_update_data"."""
+# Colunas que o save() do update não escreve: o contador de anexos é incrementado atomicamente com F()
+# (ver _bulk_create_attachments) e o valor lido antes da transação reporia o de um upload concorrente
+TICKET_SAVE_EXCLUDED_FIELDS: tuple[str, ...] = ('attachments_count',)
+
+def _ticket_save_fields() -> list[str]:
+  """Campos escritos pelo save() do update de um ticket (todos exceto a chave e TICKET_SAVE_EXCLUDED_FIELDS)."""
+  return [
+    field for field in Tickets._meta.fields_db_projection
+    if field != Tickets._meta.pk_attr and field not in TICKET_SAVE_EXCLUDED_FIELDS
+  ]
+
+def _apply_direct_updates(ticket: Tickets, update_data: dict) -> bool:
+  """
+  Aplica updates nos campos diretos apartir do dict preparado anteriormente "_prepare_update_data".
+  Devolve se algum campo foi alterado.
+  """
+  changed = False
   for key, value in update_data.items():
     if hasattr(ticket, key):
-      setattr(ticket, key, value)
+      if getattr(ticket, key) != value:
+        setattr(ticket, key, value)
+        changed = True
     else:
       # Log or handle the warning appropriately
       print(f"Warning: Attempted to update non-existent field '{key}' on ticket {ticket.uid}")
+  return changed
 
-def _handle_automatic_status_update(ticket: Tickets, update_data: dict, original_agent_id_value: int | None):
+def _handle_automatic_status_update(ticket: Tickets, update_data: dict, original_agent_id_value: int | None) -> bool:
   """
-  Atribui o estado 'In Progress' (ID 2) se um agente for atribuído
-  e o ticket não tinha um agente anteriormente.
+  Atribui o estado 'In Progress' (ID 2) se um agente for atribuído, o ticket não tinha um agente
+  anteriormente e o estado não foi enviado no update (a mesma regra do update em massa).
+  Devolve se o agente do ticket foi alterado.
   """
-  agent_id_in_update = 'agent_id' in update_data
   new_agent_id_value = update_data.get('agent_id', None)
+  if new_agent_id_value is None or new_agent_id_value == original_agent_id_value:
+    return False
 
-  if agent_id_in_update and new_agent_id_value is not None and original_agent_id_value is None and not update_data['status_id']:
+  if original_agent_id_value is None and not update_data.get('status_id') and ticket.status_id != 2:
     # Agente passou de None -> Atribuido altera o estado para "In Progress" (2)
     ticket.status_id = 2
-    
-  if original_agent_id_value != update_data['agent_id']:
-    return True
-  return False
+  return True
 
-def _handle_closed_at_update(ticket: Tickets, old_ticket_details: dict):
+def _handle_closed_at_update(ticket: Tickets, original_status_id: int | None):
   """Atribui ou limpa o timestamp fechado com base no estado."""
   final_status_id = ticket.status_id # Estado depois das alterações diretas e automáticas
-  original_status_id = old_ticket_details.get('status_id')
 
   # Alteração do estado para "Closed" (7)
   if final_status_id == 7 and original_status_id != 7:
     if not ticket.closed_at: # Insere "closed_at" apenas se já não estiver inserido
-      ticket.closed_at = datetime.now(timezone.utc).isoformat()
+      ticket.closed_at = datetime.now(timezone.utc)
   # Alteração de estado de "Closed" (7) para "Reopen" (8)
   elif final_status_id != 7 and original_status_id == 7:
     ticket.closed_at = None # Limpa o "closed_at"
 
-async def _handle_ccs_update(ticket: Tickets, ccs_ids_to_update: list[int] | None):
-  """Atualiza a lista de CCS para o ticket."""
-  if ccs_ids_to_update is not None: # Permite lista vazia para limpar os ccs
-    await ticket.ccs.clear() # Remove relações existentes de CCS
-    if ccs_ids_to_update: # Se a lista não estiver vazia, obtem e adiciona novos
-      ccs_employees = await get_users_by_ids(ccs_ids_to_update)
-      if ccs_employees:
-        await ticket.ccs.add(*ccs_employees)
-
-async def _handle_update_logging(ticket: Tickets, old_ticket_details: dict, ccs_ids_to_update: list[int] | None, current_user_id: int):
-    """Regista as alterações feitas no ticket."""
-    new_ticket_details = await ticket.to_dict_log()
+async def _handle_ccs_update(
+  ticket: Tickets,
+  ccs_ids_to_update: list[int] | None,
+  current_ccs: list[Employees]
+) -> list[Employees] | None:
+  """
+  Sincroniza os CCS do ticket com a lista pedida, comparando com os CCS atuais (preobtidos):
+  só os CCS removidos e adicionados são escritos e, se a lista não mudou, não é feita nenhuma query.
+  Devolve os novos CCS, ou None se os CCS não foram pedidos no update ou não mudaram.
+  """
+  if ccs_ids_to_update is None: # Permite lista vazia para limpar os ccs
+    return None
+
+  current_ids = {cc.id for cc in current_ccs}
+  target_ids = set(ccs_ids_to_update)
+  ids_to_remove = current_ids - target_ids
+  ids_to_add = target_ids - current_ids
+  if not ids_to_remove and not ids_to_add:
+    return None
+
+  # Só são adicionados os colaboradores ativos
+  employees_to_add = list(await get_users_by_ids(list(ids_to_add))) if ids_to_add else []
+  await _delete_ticket_ccs(ticket.id, sorted(ids_to_remove))
+  await _insert_ticket_ccs(ticket.id, [employee.id for employee in employees_to_add])
+  # A versão do ticket (updated_at) é atualizada pelo save() do update
+
+  return sorted(
+    [cc for cc in current_ccs if cc.id not in ids_to_remove] + employees_to_add,
+    key=lambda cc: cc.id
+  )
 
+async def _refresh_changed_relations(ticket: Tickets):
+  """
+  Atualiza, no ticket em memória, as relações (FKs) preobtidas cujo id foi alterado no update.
+  Só as relações alteradas são obtidas (pelo identity map do pedido); as restantes continuam as preobtidas.
+  """
+  for field_name in Tickets._meta.fk_fields:
+    await _load_related(ticket, field_name)
+
+async def _handle_update_logging(
+  ticket_id: int,
+  old_ticket_details: dict,
+  new_ticket_details: dict,
+  ccs_ids_to_update: list[int] | None,
+  current_user_id: int
+):
+    """Regista as alterações feitas no ticket, comparando o estado antes e depois do update."""
     # Filter details to only include changed fields for the log description
     changed_details = {
       k: new_ticket_details[k]
@@ -297,20 +401,22 @@ async def _handle_update_logging(ticket: Tickets, old_ticket_details: dict, ccs_
         "Atualizado",
         current_user_id,
         TicketLogs,
-        ticket.id,
+        ticket_id,
         old_details,
         changed_details
       )
     # return changed_details # Return changed_details for potential use in notifications
 
-async def _handle_update_notifications(ticket: Tickets, assigned: bool = False):
-  """Envia notificações, via email se o estado for alterado para fechado, reaberto ou se o agente for alterado."""
+async def _handle_update_notifications(ticket: Tickets, final_details: dict, assigned: bool = False):
+  """
+  Envia notificações, via email se o estado for alterado para fechado, reaberto ou se o agente for alterado.
+  `final_details`: detalhes do ticket depois do update (to_dict_details), os mesmos devolvidos na resposta.
+  """
   
   if assigned:
     print("Assigned")
     try:
       # Se um agente foi alocado envia email
-      final_details = await ticket.to_dict_details()
       await _handle_ticket_emails(ticket, final_details, "assigned")
     except Exception as email_error:
       print(f"Failed to send assigned email for ticket UID {ticket.uid}: {email_error}")
@@ -318,7 +424,6 @@ async def _handle_update_notifications(ticket: Tickets, assigned: bool = False):
     print("Closed")
     try:
       # Se o estado foi alterado para 7 (Fechado) enviar email
-      final_details = await ticket.to_dict_details()
       await _handle_ticket_emails(ticket, final_details, "closed")
     except Exception as email_error:
       print(f"Failed to send status change email for ticket UID {ticket.uid}: {email_error}")
@@ -326,7 +431,6 @@ async def _handle_update_notifications(ticket: Tickets, assigned: bool = False):
     print("Reopened")
     try:
       # Se o estado for alterado para 8 (Reaberto) enviar email
-      final_details = await ticket.to_dict_details()
       await _handle_ticket_emails(ticket, final_details, "reopened")
     except Exception as email_error:
       print(f"Failed to send status change email for ticket UID {ticket.uid}: {email_error}")
@@ -412,25 +516,6 @@ ALLOWED_AND_FILTER_FIELDS: set[str] = {
   'agent__full_name',
 }
 
-# Campos permitidos para a pesquisa geral 'search' (OR) (É uma lista devido a uma iteração que tem de ser feita no search de or)
-DEFAULT_OR_SEARCH_FIELDS: list[str] = [
-  'id',
-  'subject',
-  'request',
-  'response',
-  'internal_comment',
-  'supplier_reference',
-  'requester__first_name',
-  'requester__last_name',
-  'requester__full_name',
-  'agent__first_name',
-  'agent__last_name',
-  'agent__full_name',
-  'company__name',
-  'category__name',
-  'subcategory__name',
-]
-
 # Campos permitidos para order
 ALLOWED_ORDER_FIELDS: set[str] = {
   # Campos diretos
@@ -461,11 +546,14 @@ ALLOWED_ORDER_FIELDS: set[str] = {
   'requester__full_name',
   'agent__full_name',
 }
+
+# Ordenação padrão da lista de tickets
+DEFAULT_ORDER_BY: str = "-created_at"
 # --- Fim da configuração ---
 
 def _apply_filters(
   queryset: QuerySet,
-  filters_dict: dict[str, any] | None = None,
+  filters_dict: dict[str, any] | str | None = None,
   search: str | None = None,
   order_by: str | None = None
 ) -> QuerySet:
@@ -474,9 +562,10 @@ def _apply_filters(
     queryset = _apply_and_filters(queryset, DATE_FIELDS, ALLOWED_AND_FILTER_FIELDS, filters_dict)
   
   if search:
-    queryset = _apply_or_search(queryset, DEFAULT_OR_SEARCH_FIELDS, search)
+    # O índice de nomes deve ser carregado antes com _ensure_search_name_index (ver ticket_search.py)
+    queryset = _apply_ticket_search(queryset, search)
 
-  queryset = _apply_ordering(queryset, ALLOWED_ORDER_FIELDS, "-created_at", order_by)
+  queryset = _apply_ordering(queryset, ALLOWED_ORDER_FIELDS, DEFAULT_ORDER_BY, order_by)
   
   return queryset
 
@@ -503,6 +592,9 @@ async def _fetch_attachment(uid: str, filename: str) -> TicketAttachments:
       ticket__uid=uid,
       filename=filename  # This 'filename' is the one stored on disk
     ).first()
+    if not attachment:
+      # O ticket pode ter sido arquivado (ver ticket_archive.py)
+      attachment = await TicketAttachmentsWithArchive.filter(ticket__uid=uid, filename=filename).first()
 
     if not attachment:
       logger.warning(f"Attachment '{filename}' not found for ticket UID '{uid}'.")
@@ -0,0 +1,195 @@
+from app.database.models.helpdesk import EmployeeContacts
+from app.utils.errors.exceptions import CustomError
+from app.utils.helpers.cache import LRUCache, _canonical_hash
+from app.utils.helpers.responses import _dumps
+from .ticket_events import _on_ticket_change
+from tortoise.queryset import QuerySet
+from typing import Callable
+import os
+
+# --- Motor da listagem de tickets ---
+# A página é construída a partir de uma única projeção values() com joins,
+# mais uma pesquisa agrupada das extensões dos requerentes.
+# O formato de cada linha é igual ao de Tickets.to_dict_pagination().
+
+# Colunas da projeção necessárias para cada campo da resposta
+TICKET_LIST_COLUMNS: dict[str, tuple[str, ...]] = {
+  "id": ("id",),
+  "uid": ("uid",),
+  "subject": ("subject",),
+  "request": ("request",),
+  "response": ("response",),
+  "closed_at": ("closed_at",),
+  "created_at": ("created_at",),
+  "status": ("status__id", "status__name", "status__color", "status__text_color"),
+  "priority": ("priority__id", "priority__name", "priority__description", "priority__level", "priority__color"),
+  "category": ("category__id", "category__name", "category__description", "category__active"),
+  "subcategory": ("subcategory__id", "subcategory__name", "subcategory__active", "subcategory__category_id"),
+  "requester": (
+    "requester__id", "requester__first_name", "requester__last_name", "requester__full_name",
+    "requester__department__id", "requester__department__name",
+    "requester__company__id", "requester__company__name", "requester__company__acronym",
+    "requester__local__id", "requester__local__name", "requester__local__short",
+    "requester__local__background", "requester__local__text",
+  ),
+  "agent": ("agent__id", "agent__first_name", "agent__last_name", "agent__full_name"),
+  "attachments": ("attachments_count",),
+}
+
+# Campos devolvidos sempre, mesmo que não sejam pedidos (o id é usado no cursor)
+TICKET_REQUIRED_FIELDS: tuple[str, ...] = ("id",)
+
+def _resolve_sparse_fields(
+  fields: str | None,
+  exclude: str | None,
+  allowed: tuple[str, ...],
+  required: tuple[str, ...] = TICKET_REQUIRED_FIELDS
+) -> tuple[str, ...] | None:
+  """
+  Resolve os parâmetros `fields` e `exclude` (nomes separados por vírgula) nos campos a devolver.
+
+  Returns:
+    Os campos selecionados, pela ordem de `allowed`, ou None se nenhum dos parâmetros for enviado
+    (todos os campos).
+
+  Raises:
+    CustomError: Se algum dos campos não for permitido.
+  """
+  if not fields and not exclude:
+    return None
+
+  requested = {field.strip() for field in fields.split(",") if field.strip()} if fields else set(allowed)
+  excluded = {field.strip() for field in exclude.split(",") if field.strip()} if exclude else set()
+
+  invalid = (requested | excluded) - set(allowed)
+  if invalid:
+    raise CustomError(
+      400,
+      "Campos inválidos",
+      f"Os campos {', '.join(sorted(invalid))} não são permitidos. Usar: {', '.join(allowed)}."
+    )
+
+  selected = (requested - excluded) | set(required)
+  return tuple(field for field in allowed if field in selected)
+
+def _nested(row: dict, prefix: str, fields: tuple[str, ...]) -> dict | None:
+  """Agrupa as colunas '<prefix>__<campo>' num dicionário, ou None se a relação não existir."""
+  if row.get(f"{prefix}__id") is None:
+    return None
+  return {field: row.get(f"{prefix}__{field}") for field in fields}
+
+async def _fetch_requester_extensions(employee_ids: set[int]) -> dict[int, str]:
+  """Obtém, numa única query, a extensão pública (contact_type_id=4) de cada colaborador."""
+  if not employee_ids:
+    return {}
+
+  contacts = await EmployeeContacts.filter(
+    employee_id__in=list(employee_ids),
+    public=True,
+    contact_type_id=4
+  ).order_by('id').values('employee_id', 'contact')
+
+  extensions = {}
+  for contact in contacts:
+    # Mantém o primeiro contacto de cada colaborador, tal como o .first() do serializer
+    extensions.setdefault(contact['employee_id'], contact['contact'])
+  return extensions
+
+def _build_list_requester(row: dict, extensions: dict[int, str]) -> dict | None:
+  if row.get("requester__id") is None:
+    return None
+  return {
+    "id": row["requester__id"],
+    "first_name": row["requester__first_name"],
+    "last_name": row["requester__last_name"],
+    "full_name": row["requester__full_name"],
+    "department": _nested(row, "requester__department", ("id", "name")),
+    "company": _nested(row, "requester__company", ("id", "name", "acronym")),
+    "local": _nested(row, "requester__local", ("id", "name", "short", "background", "text")),
+    "extension": extensions.get(row["requester__id"]),
+  }
+
+# Construção de cada campo da resposta a partir da linha da projeção
+_TICKET_LIST_BUILDERS: dict[str, Callable[[dict, dict[int, str]], any]] = {
+  "id": lambda row, extensions: row["id"],
+  "uid": lambda row, extensions: row["uid"],
+  "subject": lambda row, extensions: row["subject"],
+  "request": lambda row, extensions: row["request"],
+  "response": lambda row, extensions: row["response"],
+  "closed_at": lambda row, extensions: row["closed_at"].isoformat() if row["closed_at"] else None,
+  "created_at": lambda row, extensions: row["created_at"].isoformat(),
+  "status": lambda row, extensions: _nested(row, "status", ("id", "name", "color", "text_color")),
+  "priority": lambda row, extensions: _nested(row, "priority", ("id", "name", "description", "level", "color")),
+  "category": lambda row, extensions: _nested(row, "category", ("id", "name", "description", "active")),
+  "subcategory": lambda row, extensions: _nested(row, "subcategory", ("id", "name", "active", "category_id")),
+  "requester": _build_list_requester,
+  "agent": lambda row, extensions: _nested(row, "agent", ("id", "first_name", "last_name", "full_name")),
+  "attachments": lambda row, extensions: row["attachments_count"],
+}
+
+def _build_ticket_list_row(row: dict, extensions: dict[int, str], selected: tuple[str, ...] | None = None) -> dict:
+  """Converte uma linha da projeção no formato de Tickets.to_dict_pagination(), apenas com os campos selecionados."""
+  return {
+    field: _TICKET_LIST_BUILDERS[field](row, extensions)
+    for field in (selected or TICKET_LIST_COLUMNS)
+  }
+
+async def _fetch_ticket_list_page(queryset: QuerySet, selected: tuple[str, ...] | None = None) -> list[dict]:
+  """
+  Obtém e serializa uma página de tickets com um número fixo de queries:
+  uma projeção values() com joins e uma pesquisa agrupada das extensões dos requerentes.
+
+  Args:
+    queryset: O queryset já filtrado, ordenado e com limit/offset aplicados.
+    selected: Os campos a devolver (ver `_resolve_sparse_fields`). None devolve todos.
+              Só as colunas desses campos são lidas da base de dados.
+
+  Returns:
+    Uma lista de dicionários no mesmo formato de Tickets.to_dict_pagination().
+  """
+  fields = selected or tuple(TICKET_LIST_COLUMNS)
+  projection = tuple(column for field in fields for column in TICKET_LIST_COLUMNS[field])
+  rows = await queryset.values(*projection)
+
+  extensions = {}
+  if "requester" in fields:
+    requester_ids = {row["requester__id"] for row in rows if row.get("requester__id") is not None}
+    extensions = await _fetch_requester_extensions(requester_ids)
+  return [_build_ticket_list_row(row, extensions, fields) for row in rows]
+
+# --- Fim do motor da listagem de tickets ---
+
+# --- Cache das páginas da listagem ---
+# Guarda as páginas já serializadas das listagens mais usadas (ordenação por defeito, presets, own).
+# É limpa sempre que um ticket é criado ou alterado (ver ticket_events).
+
+# Limite de memória (bytes do JSON) e de entradas da cache
+TICKET_LIST_CACHE_MAX_BYTES = int(os.getenv('TICKET_LIST_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+TICKET_LIST_CACHE_MAX_ENTRIES = int(os.getenv('TICKET_LIST_CACHE_MAX_ENTRIES', 512))
+# Tempo de vida (segundos), limita o tempo em que outro processo pode servir uma página desatualizada
+TICKET_LIST_CACHE_TTL = float(os.getenv('TICKET_LIST_CACHE_TTL', 30))
+
+_ticket_list_cache = LRUCache(
+  max_entries=TICKET_LIST_CACHE_MAX_ENTRIES,
+  ttl=TICKET_LIST_CACHE_TTL,
+  max_bytes=TICKET_LIST_CACHE_MAX_BYTES
+)
+
+def _ticket_list_cache_key(**query: any) -> str:
+  """Chave normalizada de uma página (filtros, pesquisa, ordenação, página, utilizador, ...)."""
+  return _canonical_hash(query)
+
+def _get_cached_ticket_list(cache_key: str) -> dict | None:
+  return _ticket_list_cache.get(cache_key)
+
+def _cache_ticket_list(cache_key: str, page: dict):
+  _ticket_list_cache.set(cache_key, page, size=len(_dumps(page)))
+
+def ticket_list_cache_stats() -> dict[str, any]:
+  return _ticket_list_cache.stats()
+
+@_on_ticket_change
+def _invalidate_ticket_list_cache(ticket_ids: list[int]):
+  _ticket_list_cache.clear()
+
+# --- Fim da cache das páginas da listagem ---
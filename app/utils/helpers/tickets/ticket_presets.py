@@ -0,0 +1,108 @@
+from app.database.models.helpdesk import Tickets, TicketPresets
+from app.utils.errors.exceptions import CustomError
+from tortoise.expressions import Case, When
+from tortoise.functions import Sum, Count
+from tortoise.queryset import QuerySet
+from functools import reduce
+from operator import and_
+from ..filtering import _compile_filter_plan, FilterPlan
+from .ticket_helpers import DATE_FIELDS, ALLOWED_AND_FILTER_FIELDS
+from .ticket_filter_cost import _estimate_filter_cost, _log_filter_cost, FILTER_COST_MAX
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --- Contagem dos presets ---
+# Os filtros de todos os presets são compilados em colunas SUM(CASE WHEN <filtro> THEN 1 ELSE 0 END)
+# de uma única query sobre o queryset base (own/search), em vez de um COUNT por preset.
+# Os filtros que usam campos de tabelas relacionadas (ex: category__name) precisam de joins, que o
+# CASE não inclui: esses presets continuam a ser contados com a sua própria query.
+
+def _compile_preset_plan(preset: TicketPresets) -> FilterPlan | None:
+  """
+  Devolve o plano do filtro do preset, ou None se o preset não tiver filtro ou o filtro for inválido
+  (nesse caso, o preset conta todos os tickets do queryset base).
+  """
+  if not preset.filter:
+    return None
+  try:
+    return _compile_filter_plan(preset.filter, DATE_FIELDS, ALLOWED_AND_FILTER_FIELDS)
+  except CustomError as e:
+    logger.warning(f"Warning: Invalid filter found in preset '{preset.name}' (ID: {preset.id}): {e}. Skipping preset filters.")
+    return None
+
+def _plan_uses_only_ticket_columns(plan: FilterPlan) -> bool:
+  """Indica se todos os lookups do plano usam só colunas da tabela tickets (sem joins)."""
+  columns = Tickets._meta.fields_db_projection
+  for condition in plan.conditions:
+    for lookup, _ in condition:
+      field, *operators = lookup.split('__')
+      if field not in columns or len(operators) > 1:
+        return False
+  return True
+
+async def _count_presets(base_queryset: QuerySet, presets: list[TicketPresets]) -> dict[int, int | str]:
+  """
+  Conta os tickets de cada preset sobre o queryset base.
+  Os presets compiláveis (e os sem filtro) são contados numa única query; os restantes um a um.
+
+  Returns:
+    Um dicionário {id do preset: contagem}, ou "Error" se a contagem de um preset falhar
+    ou se o filtro do preset for demasiado pesado (FILTER_COST_MAX).
+  """
+  # A ordenação não se aplica a uma query de agregação (e o MySQL rejeita-a com ONLY_FULL_GROUP_BY)
+  base_queryset = base_queryset.order_by()
+
+  aggregates = {"preset_total": Count("id")}
+  aggregated: dict[int, str] = {}
+  separate: dict[int, FilterPlan] = {}
+  counts: dict[int, int | str] = {}
+  for preset in presets:
+    plan = _compile_preset_plan(preset)
+    cost = _estimate_filter_cost(plan) if plan is not None else None
+    if cost is not None and cost.score > FILTER_COST_MAX:
+      # Um preset com um filtro demasiado pesado não é contado (ver ticket_filter_cost.py)
+      _log_filter_cost(cost, "rejected", f"preset:{preset.id}")
+      counts[preset.id] = "Error"
+    elif plan is None or not plan.conditions:
+      aggregated[preset.id] = "preset_total"
+    elif _plan_uses_only_ticket_columns(plan):
+      annotation = f"preset_{preset.id}"
+      condition = reduce(and_, plan.q_objects())
+      aggregates[annotation] = Sum(Case(When(condition, then=1), default=0))
+      aggregated[preset.id] = annotation
+    else:
+      separate[preset.id] = plan
+
+  try:
+    row = (await base_queryset.annotate(**aggregates).values(*aggregates))[0]
+    for preset_id, annotation in aggregated.items():
+      # SUM devolve NULL quando não há tickets
+      counts[preset_id] = int(row[annotation] or 0)
+  except Exception as e:
+    logger.error(f"Error counting tickets for presets {list(aggregated)}: {e}", exc_info=True)
+    counts.update({preset_id: "Error" for preset_id in aggregated})
+
+  for preset_id, plan in separate.items():
+    try:
+      counts[preset_id] = await plan.apply(base_queryset).count()
+    except Exception as e:
+      logger.error(f"Error counting tickets for preset (ID: {preset_id}): {e}", exc_info=True)
+      counts[preset_id] = "Error"
+
+  return counts
+
+def _preset_result_filter(preset: TicketPresets, count: int | str) -> str | dict | None:
+  """
+  Filtro do preset na resposta: o texto guardado, ou o filtro já convertido (dicionário) quando a
+  contagem falhou ("Error"), como o frontend sempre o recebeu nesse caso.
+  """
+  if count != "Error" or not preset.filter:
+    return preset.filter
+  try:
+    return json.loads(preset.filter)
+  except json.JSONDecodeError:
+    return preset.filter
+
+# --- Fim da contagem dos presets ---
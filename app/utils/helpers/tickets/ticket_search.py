@@ -0,0 +1,140 @@
+from tortoise.contrib.mysql.search import SearchCriterion, Mode
+from tortoise.expressions import Q
+from tortoise.queryset import QuerySet
+from pypika_tortoise.terms import Field, ValueWrapper
+from app.database.models.helpdesk import Tickets
+from app.utils.helpers.name_index import SearchNameIndex, _get_search_name_index
+from functools import reduce
+from operator import or_
+import os
+import re
+
+# --- Pesquisa geral dos tickets ---
+# Cada palavra do parâmetro `search` tem de ser encontrada (AND entre palavras) no id, nas colunas de
+# texto do ticket ou nos nomes das entidades relacionadas (OR entre campos).
+#
+# Colunas de texto: com TICKET_FULLTEXT_SEARCH=1, em MySQL, são procuradas no índice FULLTEXT
+# ft_tickets_search (migração 0003), em vez de um LIKE '%palavra%' por coluna. O índice é mantido pelo
+# próprio MySQL em cada INSERT/UPDATE, pelo que a criação e a edição de tickets ficam logo pesquisáveis.
+# Noutros motores (ex: sqlite nos testes locais), ou com a opção desligada (por defeito), é usado o LIKE.
+# O índice só encontra palavras inteiras ou prefixos ("impres" -> "impressora"), não o meio ou o fim
+# das palavras ("press" deixa de encontrar "impressora"): é uma mudança de comportamento da pesquisa,
+# por isso a opção está desligada por defeito. As referências dos fornecedores continuam a ser
+# procuradas também com LIKE (um fragmento do número no meio da referência).
+#
+# Entidades relacionadas: cada palavra é primeiro resolvida nos ids dos colaboradores, empresas,
+# categorias e subcategorias cujo nome a contém, a partir do índice de nomes em memória
+# (name_index.py). A query dos tickets fica só com colunas da própria tabela
+# (requester_id IN (...) OR agent_id IN (...)), sem os joins que impediam o uso dos índices.
+
+# Colunas do índice FULLTEXT (têm de coincidir com as da migração, pela mesma ordem)
+TICKET_FULLTEXT_COLUMNS: tuple[str, ...] = (
+  'subject',
+  'request',
+  'response',
+  'internal_comment',
+  'supplier_reference',
+)
+
+# Colunas também procuradas com LIKE '%palavra%' quando é usado o índice FULLTEXT
+TICKET_FULLTEXT_LIKE_COLUMNS: tuple[str, ...] = (
+  'supplier_reference',
+)
+
+# Relações pesquisadas pelo nome: (coluna do ticket, tabela do índice de nomes, campos com join equivalentes)
+# Os campos com join só são usados se o índice de nomes não estiver carregado ou se a palavra
+# corresponder a demasiados registos. Uma palavra sem nenhum nome correspondente (o caso normal das
+# palavras do assunto ou do pedido) não acrescenta condições das relações. Os nomes criados ou
+# alterados noutro processo chegam ao índice pela verificação da versão (ver name_index.py).
+TICKET_SEARCH_RELATIONS: tuple[tuple[str, str, tuple[str, ...]], ...] = (
+  ('requester_id', 'employees', ('requester__first_name', 'requester__last_name', 'requester__full_name')),
+  ('agent_id', 'employees', ('agent__first_name', 'agent__last_name', 'agent__full_name')),
+  ('company_id', 'companies', ('company__name',)),
+  ('category_id', 'categories', ('category__name',)),
+  ('subcategory_id', 'subcategories', ('subcategory__name',)),
+)
+
+# Liga a pesquisa full-text (depois de aplicar a migração 0003). Desligada por defeito: perde a
+# pesquisa no meio das palavras (ver acima)
+TICKET_FULLTEXT_SEARCH = os.getenv('TICKET_FULLTEXT_SEARCH', '0') != '0'
+
+# Palavras mais curtas do que o innodb_ft_min_token_size (3 por defeito) não estão no índice
+FULLTEXT_MIN_WORD_LENGTH = int(os.getenv('FULLTEXT_MIN_WORD_LENGTH', 3))
+
+# Acima deste número de ids para uma relação, a palavra é pesquisada com o join
+SEARCH_MAX_RELATED_IDS = int(os.getenv('SEARCH_MAX_RELATED_IDS', 1000))
+
+# Operadores da pesquisa booleana do MySQL, removidos das palavras pesquisadas
+_BOOLEAN_MODE_OPERATORS = re.compile(r'[+\-<>()~*"@]')
+
+def _fulltext_search_enabled(queryset: QuerySet) -> bool:
+  """A pesquisa full-text só está disponível em MySQL, na tabela tickets (não nas views com o arquivo)."""
+  return (
+    TICKET_FULLTEXT_SEARCH
+    and queryset.model is Tickets
+    and queryset.model._meta.db.capabilities.dialect == "mysql"
+  )
+
+def _fulltext_term(word: str) -> str | None:
+  """
+  Converte uma palavra num termo da pesquisa booleana (pesquisa por prefixo: "impres" -> "impres*").
+  Devolve None se a palavra for demasiado curta para estar no índice.
+  """
+  clean_word = _BOOLEAN_MODE_OPERATORS.sub(' ', word).strip()
+  if len(clean_word) < FULLTEXT_MIN_WORD_LENGTH or ' ' in clean_word:
+    return None
+  return f"{clean_word}*"
+
+def _related_conditions(word: str, name_index: SearchNameIndex | None) -> list[Q]:
+  """Condições das entidades relacionadas para a palavra: ids resolvidos ou, em alternativa, o join."""
+  resolved_ids = name_index.resolve(word) if name_index is not None else None
+  conditions = []
+  for column, source, join_fields in TICKET_SEARCH_RELATIONS:
+    ids = resolved_ids[source] if resolved_ids is not None else None
+    if ids is None or len(ids) > SEARCH_MAX_RELATED_IDS:
+      conditions.extend(Q(**{f"{field}__icontains": word}) for field in join_fields)
+    elif ids:
+      conditions.append(Q(**{f"{column}__in": ids}))
+  return conditions
+
+def _apply_ticket_search(queryset: QuerySet, search: str | None) -> QuerySet:
+  """
+  Aplica a pesquisa geral aos tickets.
+  As colunas de texto usam o índice FULLTEXT (em MySQL) e as entidades relacionadas os ids resolvidos
+  no índice de nomes (ver `_ensure_search_name_index`).
+
+  As palavras que não podem ser procuradas no índice FULLTEXT (demasiado curtas, ou com pontuação
+  no meio) continuam a ser procuradas com __icontains nas colunas de texto.
+  """
+  if not search or not search.strip():
+    return queryset
+
+  use_fulltext = _fulltext_search_enabled(queryset)
+  name_index = _get_search_name_index()
+  basetable = queryset.model._meta.basetable
+  fulltext_columns = [Field(column, table=basetable) for column in TICKET_FULLTEXT_COLUMNS]
+
+  for index, word in enumerate(search.split()):
+    word_conditions = []
+    if word.isdigit():
+      word_conditions.append(Q(id=int(word)))
+
+    term = _fulltext_term(word) if use_fulltext else None
+    if term:
+      # MATCH ... AGAINST em modo booleano devolve um valor > 0 para os tickets que contêm o termo
+      annotation = f"_search_{index}"
+      queryset = queryset.annotate(**{
+        annotation: SearchCriterion(*fulltext_columns, expr=ValueWrapper(term), mode=Mode.BOOL_MODE)
+      })
+      word_conditions.append(Q(**{f"{annotation}__gt": 0}))
+      word_conditions.extend(Q(**{f"{column}__icontains": word}) for column in TICKET_FULLTEXT_LIKE_COLUMNS)
+    else:
+      word_conditions.extend(Q(**{f"{column}__icontains": word}) for column in TICKET_FULLTEXT_COLUMNS)
+
+    word_conditions.extend(_related_conditions(word, name_index))
+    # Para esta palavra, ela deve ser encontrada em qualquer um dos campos (OR); as palavras são combinadas com AND
+    queryset = queryset.filter(reduce(or_, word_conditions))
+
+  return queryset
+
+# --- Fim da pesquisa geral dos tickets ---
@@ -0,0 +1,214 @@
+from app.database.models.helpdesk import Tickets
+from app.utils.helpers.name_index import _fold
+from .ticket_events import _on_ticket_change
+from bisect import bisect_left, insort
+from heapq import merge
+import asyncio
+import logging
+import os
+import re
+import sys
+
+logger = logging.getLogger(__name__)
+
+# --- Sugestões da pesquisa (search-as-you-type) ---
+# Índice de prefixos em memória para GET /tickets/suggest: a lista ordenada dos tokens (o id, as palavras
+# do assunto e os nomes do requerente e do técnico dos tickets mais recentes) e, por token, a lista dos
+# tickets que o contêm, do mais recente para o mais antigo (ids negativos por ordem crescente).
+# Os tokens com um prefixo são encontrados com bisect e as suas listas são percorridas em conjunto por
+# ordem de recência, sem queries: os tickets mais recentes aparecem sempre primeiro, qualquer que seja
+# a ordem alfabética dos tokens.
+# O índice é construído no arranque, atualizado em cada criação/alteração de ticket neste processo
+# (hook _on_ticket_change) e reconstruído a cada SUGGEST_INDEX_REBUILD_SECONDS segundos, o que limita
+# o tempo em que as alterações feitas noutros processos (tickets novos, assuntos e nomes alterados)
+# ficam por refletir.
+# A memória é limitada ao número de tickets (os mais antigos saem do índice) e de tokens por ticket.
+
+# Número máximo de tickets (os mais recentes) no índice
+SUGGEST_INDEX_MAX_TICKETS = int(os.getenv('SUGGEST_INDEX_MAX_TICKETS', 20000))
+
+# Intervalo (segundos) entre reconstruções do índice a partir da base de dados
+SUGGEST_INDEX_REBUILD_SECONDS = float(os.getenv('SUGGEST_INDEX_REBUILD_SECONDS', 300))
+
+# Acima deste número de tickets alterados de uma vez, o índice é reconstruído em vez de atualizado
+SUGGEST_INDEX_MAX_UPSERTS = 1000
+
+# Número máximo de tokens indexados por ticket
+SUGGEST_MAX_TOKENS_PER_TICKET = 24
+
+# Tamanho mínimo dos tokens e do prefixo pesquisado
+SUGGEST_MIN_TOKEN_LENGTH = 2
+
+# Número máximo de tickets candidatos verificados por pedido (mantém o tempo de resposta limitado)
+SUGGEST_MAX_SCAN = 2000
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+SUGGEST_COLUMNS = ('id', 'uid', 'subject', 'requester__full_name', 'agent__full_name')
+
+def _tokenize(*texts: str | None) -> list[str]:
+  """Tokens normalizados (sem acentos nem maiúsculas), sem repetições, pela ordem em que aparecem."""
+  tokens = {}
+  for text in texts:
+    for token in _TOKEN_PATTERN.findall(_fold(text or '')):
+      if len(token) >= SUGGEST_MIN_TOKEN_LENGTH:
+        # Os tokens repetem-se entre tickets (palavras e nomes comuns): partilha as strings
+        tokens[sys.intern(token)] = None
+  return list(tokens)[:SUGGEST_MAX_TOKENS_PER_TICKET]
+
+def _row_tokens(row: dict) -> tuple[str, ...]:
+  return (str(row['id']), *_tokenize(row['subject'], row['requester__full_name'], row['agent__full_name']))
+
+class TicketSuggestIndex:
+  """Tokens ordenados e, por token, os ids negativos dos tickets (do mais recente para o mais antigo)."""
+
+  def __init__(self):
+    self._tokens: list[str] = []
+    self._postings: dict[str, list[int]] = {}
+    self._tickets: dict[int, tuple[str | None, str | None, tuple[str, ...]]] = {}
+    self.ready = False
+
+  def __len__(self) -> int:
+    return len(self._tickets)
+
+  def build(self, rows: list[dict]):
+    """Reconstrói o índice a partir das linhas (SUGGEST_COLUMNS) dos tickets mais recentes."""
+    postings: dict[str, list[int]] = {}
+    tickets = {}
+    for row in rows[:SUGGEST_INDEX_MAX_TICKETS]:
+      tokens = _row_tokens(row)
+      tickets[row['id']] = (row['uid'], row['subject'], tokens)
+      for token in tokens:
+        postings.setdefault(token, []).append(-row['id'])
+    for ticket_ids in postings.values():
+      ticket_ids.sort()
+    self._tokens = sorted(postings)
+    self._postings = postings
+    self._tickets = tickets
+    self.ready = True
+
+  def upsert(self, row: dict):
+    """Indexa (ou volta a indexar) um ticket."""
+    self.remove(row['id'])
+    tokens = _row_tokens(row)
+    self._tickets[row['id']] = (row['uid'], row['subject'], tokens)
+    for token in tokens:
+      ticket_ids = self._postings.get(token)
+      if ticket_ids is None:
+        self._postings[token] = [-row['id']]
+        insort(self._tokens, token)
+      else:
+        insort(ticket_ids, -row['id'])
+    # Mantém apenas os tickets mais recentes (maiores ids)
+    while len(self._tickets) > SUGGEST_INDEX_MAX_TICKETS:
+      self.remove(min(self._tickets))
+
+  def remove(self, ticket_id: int):
+    ticket = self._tickets.pop(ticket_id, None)
+    if ticket is None:
+      return
+    for token in ticket[2]:
+      ticket_ids = self._postings.get(token)
+      if ticket_ids is None:
+        continue
+      position = bisect_left(ticket_ids, -ticket_id)
+      if position < len(ticket_ids) and ticket_ids[position] == -ticket_id:
+        del ticket_ids[position]
+      if not ticket_ids:
+        del self._postings[token]
+        del self._tokens[bisect_left(self._tokens, token)]
+
+  def _prefix_postings(self, prefix: str) -> list[list[int]]:
+    """Listas de tickets dos tokens que começam pelo prefixo."""
+    postings = []
+    position = bisect_left(self._tokens, prefix)
+    while position < len(self._tokens) and self._tokens[position].startswith(prefix):
+      postings.append(self._postings[self._tokens[position]])
+      position += 1
+    return postings
+
+  def suggest(self, query: str, limit: int = 10) -> list[dict]:
+    """
+    Devolve os tickets mais recentes em que cada palavra da pesquisa é prefixo de algum token
+    (id, palavra do assunto, nome do requerente ou do técnico).
+    """
+    words = [
+      word for word in _TOKEN_PATTERN.findall(_fold(query or ''))
+      if len(word) >= SUGGEST_MIN_TOKEN_LENGTH or word.isdigit()
+    ]
+    if not words:
+      return []
+
+    postings_by_word = [self._prefix_postings(word) for word in dict.fromkeys(words)]
+    if not all(postings_by_word):
+      return []
+
+    # A palavra com menos tickets conduz a pesquisa (por ordem de recência); as restantes são
+    # verificadas nos tokens de cada ticket candidato
+    driver = min(range(len(postings_by_word)), key=lambda index: sum(map(len, postings_by_word[index])))
+    other_words = [word for index, word in enumerate(dict.fromkeys(words)) if index != driver]
+
+    results = []
+    previous_id = None
+    for scanned, negative_id in enumerate(merge(*postings_by_word[driver])):
+      if scanned >= SUGGEST_MAX_SCAN or len(results) >= limit:
+        break
+      if negative_id == previous_id:
+        # O mesmo ticket tem vários tokens com o prefixo
+        continue
+      previous_id = negative_id
+      uid, subject, tokens = self._tickets[-negative_id]
+      if all(any(token.startswith(word) for token in tokens) for word in other_words):
+        results.append({"id": -negative_id, "uid": uid, "subject": subject})
+    return results
+
+_ticket_suggest_index = TicketSuggestIndex()
+
+# Tickets alterados durante uma reconstrução (as linhas lidas podem ser anteriores à alteração)
+_changes_during_build: set[int] | None = None
+
+async def _build_ticket_suggest_index():
+  """Constrói (ou reconstrói) o índice com os tickets mais recentes."""
+  global _changes_during_build
+  _changes_during_build = set()
+  try:
+    rows = await Tickets.all().order_by('-id').limit(SUGGEST_INDEX_MAX_TICKETS).values(*SUGGEST_COLUMNS)
+    _ticket_suggest_index.build(rows)
+    logger.info(f"Índice de sugestões construído com {len(_ticket_suggest_index)} tickets.")
+  except Exception as e:
+    # Sem índice, o endpoint de sugestões devolve uma lista vazia
+    logger.error(f"Error building ticket suggest index: {e}", exc_info=True)
+  finally:
+    changed_ids, _changes_during_build = _changes_during_build, None
+  if changed_ids and _ticket_suggest_index.ready:
+    await _update_ticket_suggest_index(list(changed_ids))
+
+async def rebuild_ticket_suggest_index_periodically():
+  """Tarefa de fundo: reconstrói o índice a partir da base de dados (inclui as alterações dos outros processos)."""
+  while True:
+    await asyncio.sleep(SUGGEST_INDEX_REBUILD_SECONDS)
+    await _build_ticket_suggest_index()
+
+def _suggest_tickets(query: str, limit: int = 10) -> list[dict]:
+  return _ticket_suggest_index.suggest(query, limit)
+
+@_on_ticket_change
+async def _update_ticket_suggest_index(ticket_ids: list[int]):
+  if _changes_during_build is not None:
+    # Aplicadas no fim da reconstrução em curso
+    _changes_during_build.update(ticket_ids)
+    return
+  if not _ticket_suggest_index.ready:
+    return
+  if len(ticket_ids) > SUGGEST_INDEX_MAX_UPSERTS:
+    # Ex: um colaborador renomeado que aparece em milhares de tickets
+    await _build_ticket_suggest_index()
+    return
+  rows = await Tickets.filter(id__in=ticket_ids).values(*SUGGEST_COLUMNS)
+  for row in rows:
+    _ticket_suggest_index.upsert(row)
+  # Tickets que deixaram de existir saem do índice
+  for ticket_id in set(ticket_ids) - {row['id'] for row in rows}:
+    _ticket_suggest_index.remove(ticket_id)
+
+# --- Fim das sugestões da pesquisa ---
@@ -0,0 +1,92 @@
+from app.database.models.helpdesk import Tickets, TicketsWithArchive, TicketEntityVersions
+from app.utils.helpers.responses import _weak_etag
+from tortoise.backends.base.client import BaseDBAsyncClient
+from datetime import datetime, timezone
+
+# --- Versões e ETags dos tickets ---
+# A versão de um ticket é a sua coluna updated_at (atualizada no save() final de `update_ticket_details`).
+# Os ETags permitem responder 304 aos pedidos de polling sem reconstruir a resposta.
+# As respostas incluem entidades relacionadas (nomes dos colaboradores, departamento, empresa,
+# categoria, ...). Em vez de alterar os tickets que as incluem, cada tipo de entidade tem uma versão
+# (tabela ticket_entity_versions), atualizada quando uma entidade desse tipo é alterada
+# (`_bump_entity_version`) e incluída em todos os ETags dos tickets, ativos e arquivados.
+# O arquivo (app.commands.archive_tickets) também tem uma versão, incluída só no ETag da listagem:
+# os tickets arquivados saem da listagem por omissão sem que nenhum updated_at mude.
+
+# Tipos de entidade incluídos nas respostas dos tickets
+TICKET_ENTITY_VERSION_NAMES: tuple[str, ...] = (
+  "Employees", "Departments", "Companies", "TicketCategories", "TicketSubcategories"
+)
+
+# Versão do arquivo dos tickets, atualizada a cada lote arquivado
+TICKET_ARCHIVE_VERSION_NAME = "TicketsArchive"
+
+# Campos dos colaboradores incluídos nas respostas dos tickets (além dos contactos):
+# alterar outros campos (password, permissões, ...) não muda a versão
+TICKET_EMBEDDED_EMPLOYEE_FIELDS: tuple[str, ...] = (
+  "first_name", "last_name", "full_name", "department_id", "company_id", "local_id"
+)
+
+async def _bump_entity_version(*names: str, connection: BaseDBAsyncClient | None = None):
+  """
+  Atualiza a versão dos tipos de entidade indicados (ex: "Employees"), o que muda os ETags de todos os tickets.
+  Deve ser chamado depois do commit da alteração da entidade, ou dentro da sua transação (`connection`).
+  """
+  now = datetime.now(timezone.utc)
+  for name in names:
+    if not await TicketEntityVersions.filter(name=name).using_db(connection).update(version=now):
+      await TicketEntityVersions.get_or_create(name=name, defaults={"version": now}, using_db=connection)
+
+async def _entity_versions(*names: str) -> list[tuple[str, datetime]]:
+  """Versões dos tipos de entidade indicados (por omissão, TICKET_ENTITY_VERSION_NAMES), numa única query."""
+  return await TicketEntityVersions.filter(
+    name__in=names or TICKET_ENTITY_VERSION_NAMES
+  ).order_by('name').values_list('name', 'version')
+
+async def _latest_ticket_version() -> datetime | None:
+  """Devolve a versão mais recente de todos os tickets (usa o índice de updated_at)."""
+  return await Tickets.all().order_by('-updated_at').first().values_list('updated_at', flat=True)
+
+async def _ticket_details_version(uid: str) -> tuple | None:
+  """
+  Versão dos detalhes de um ticket: id, updated_at e versões das entidades incluídas.
+  É usada no ETag e para validar os detalhes em cache (ver ticket_details_cache.py).
+
+  Returns:
+    A versão, ou None se o ticket não existir.
+  """
+  row = await Tickets.filter(uid=uid).first().values('id', 'created_at', 'updated_at')
+  if not row:
+    # Ticket arquivado (ver ticket_archive.py)
+    row = await TicketsWithArchive.filter(uid=uid).first().values('id', 'created_at', 'updated_at')
+  if not row:
+    return None
+  # Tickets anteriores à coluna updated_at usam a data de criação
+  return row['id'], row['updated_at'] or row['created_at'], await _entity_versions()
+
+def _ticket_details_etag(version: tuple | None, fields: str | None = None, exclude: str | None = None) -> str | None:
+  """ETag dos detalhes de um ticket: versão (`_ticket_details_version`) e campos pedidos, ou None se o ticket não existir."""
+  if version is None:
+    return None
+  return _weak_etag("ticket", *version, fields, exclude)
+
+async def _ticket_list_version() -> tuple:
+  """
+  Versão da listagem: a versão mais recente de todos os tickets, as versões das entidades incluídas
+  e a do arquivo.
+  É usada no ETag e na chave da cache das páginas, para que uma página em cache nunca seja
+  devolvida com o ETag de uma versão mais recente (a cache de cada processo só é limpa pelas
+  alterações feitas nesse processo).
+  """
+  return await _latest_ticket_version(), await _entity_versions(*TICKET_ENTITY_VERSION_NAMES, TICKET_ARCHIVE_VERSION_NAME)
+
+def _ticket_list_etag(version: any, query_params: dict | None, own_user_id: int | None = None) -> str:
+  """
+  ETag de uma página da listagem: versão da listagem (`_ticket_list_version`) mais o hash dos
+  parâmetros do pedido (filtros, pesquisa, ordenação, página, ...).
+  É usada a versão global e não a das linhas filtradas, porque um ticket alterado pode sair
+  (ou entrar) no filtro.
+  """
+  return _weak_etag("tickets", version, query_params or {}, own_user_id)
+
+# --- Fim das versões e ETags dos tickets ---
@@ -0,0 +1,129 @@
+"""
+Micro-benchmark da codificação JSON de uma página de 100 tickets.
+
+Compara o caminho por defeito do FastAPI (jsonable_encoder + JSONResponse) com a
+FastJSONResponse (orjson), para:
+  - uma página no formato de Tickets.to_dict_pagination(), com os modelos relacionados;
+  - uma página da listagem atual (linhas já primitivas da projeção values()).
+
+Não precisa de base de dados: os modelos são inicializados com sqlite em memória apenas
+para criar as instâncias.
+
+Uso (na raiz do projeto):
+  python -m benchmarks.ticket_page_encoding [--rows 100] [--repeat 200]
+"""
+from datetime import datetime, timedelta, timezone
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from tortoise import Tortoise
+import argparse
+import asyncio
+import timeit
+
+async def _init_models():
+  await Tortoise.init(
+    db_url="sqlite://:memory:",
+    modules={"helpdesk_models": ["app.database.models.helpdesk"]},
+  )
+
+def _model_page(rows: int) -> list[dict]:
+  """Página no formato de Tickets.to_dict_pagination(), com instâncias dos modelos."""
+  from app.database.models.helpdesk import TicketStatuses, TicketPriorities, TicketCategories, TicketSubcategories
+
+  status = TicketStatuses(id=1, name="Aberto", color="#fff", text_color="#000")
+  priority = TicketPriorities(id=2, name="Normal", description="Prioridade normal", level=2, color="#0f0")
+  category = TicketCategories(id=3, name="Hardware", description="Equipamentos", active=True)
+  subcategory = TicketSubcategories(id=4, name="Impressoras", active=True, category_id=3)
+  created_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+  return [
+    {
+      "id": index,
+      "uid": f"{index:064x}",
+      "subject": f"[TICKET #{index}] - Pedido de teste",
+      "request": "Descrição do pedido " * 20,
+      "response": "Resposta do técnico " * 10,
+      "closed_at": None,
+      "created_at": (created_at + timedelta(minutes=index)).isoformat(),
+      "status": status,
+      "priority": priority,
+      "category": category,
+      "subcategory": subcategory,
+      "requester": {
+        "id": 10,
+        "first_name": "Ana",
+        "last_name": "Silva",
+        "full_name": "Ana Silva",
+        "department": {"id": 1, "name": "DTI"},
+        "company": {"id": 1, "name": "Empresa", "acronym": "EMP"},
+        "local": {"id": 1, "name": "Sede", "short": "SD", "background": "#000", "text": "#fff"},
+        "extension": "1234",
+      },
+      "agent": {"id": 11, "first_name": "Rui", "last_name": "Costa", "full_name": "Rui Costa"},
+      "attachments": 2,
+    }
+    for index in range(rows)
+  ]
+
+def _projection_page(rows: int) -> list[dict]:
+  """Página da listagem atual, construída a partir de linhas da projeção values()."""
+  from app.utils.helpers.tickets.ticket_list import TICKET_LIST_COLUMNS, _build_ticket_list_row
+
+  created_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+  page = []
+  for index in range(rows):
+    row = {column: None for columns in TICKET_LIST_COLUMNS.values() for column in columns}
+    row.update({
+      "id": index,
+      "uid": f"{index:064x}",
+      "subject": f"[TICKET #{index}] - Pedido de teste",
+      "request": "Descrição do pedido " * 20,
+      "response": "Resposta do técnico " * 10,
+      "created_at": created_at + timedelta(minutes=index),
+      "status__id": 1, "status__name": "Aberto", "status__color": "#fff", "status__text_color": "#000",
+      "requester__id": 10, "requester__first_name": "Ana", "requester__last_name": "Silva",
+      "requester__full_name": "Ana Silva",
+      "attachments_count": 2,
+    })
+    page.append(_build_ticket_list_row(row, {10: "1234"}))
+  return page
+
+def _paginated(data: list[dict]) -> dict:
+  return {
+    "data": data,
+    "total_count": 1000,
+    "page": 1,
+    "page_size": len(data),
+    "total_pages": 10,
+    "next_cursor": None,
+    "next_page": "/tickets?page=2",
+    "previous_page": None,
+  }
+
+def _measure(label: str, function, repeat: int) -> float:
+  seconds = min(timeit.repeat(function, number=repeat, repeat=5)) / repeat
+  print(f"  {label:<34} {seconds * 1000:8.3f} ms/página")
+  return seconds
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--rows", type=int, default=100)
+  parser.add_argument("--repeat", type=int, default=200)
+  args = parser.parse_args()
+
+  asyncio.run(_init_models())
+  from app.utils.helpers.responses import FastJSONResponse
+
+  for title, page in (
+    ("Página com modelos (to_dict_pagination)", _paginated(_model_page(args.rows))),
+    ("Página da projeção (listagem atual)", _paginated(_projection_page(args.rows))),
+  ):
+    print(f"{title}, {args.rows} tickets:")
+    before = _measure("jsonable_encoder + JSONResponse", lambda: JSONResponse(jsonable_encoder(page)), args.repeat)
+    after = _measure("FastJSONResponse (orjson)", lambda: FastJSONResponse(page), args.repeat)
+    print(f"  {'ganho':<34} {before / after:8.1f}x")
+
+  asyncio.run(Tortoise.close_connections())
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,44 @@
+"""
+Estado automático "In Progress" (2) ao atribuir um técnico: o update de um ticket
+(_handle_automatic_status_update) e o update em massa (_plan_bulk_ticket_update) seguem a mesma regra.
+
+Uso (na raiz do projeto):
+  python -m pytest tests
+"""
+import os
+import tempfile
+
+# Os anexos são guardados em TICKET_FILES_PATH (lido quando os helpers dos tickets são importados)
+os.environ.setdefault('TICKET_FILES_PATH', tempfile.mkdtemp(prefix="helpdesk_tests_"))
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import pytest
+
+from app.utils.helpers.tickets.ticket_helpers import _handle_automatic_status_update
+from app.utils.helpers.tickets.ticket_bulk import _plan_bulk_ticket_update
+
+# (técnico atual, estado atual, alterações pedidas, estado final esperado)
+AUTO_STATUS_CASES = [
+  (None, 1, {"agent_id": 3}, 2), # Primeira atribuição sem estado: passa a "In Progress"
+  (None, 1, {"agent_id": 3, "status_id": 3}, 3), # O estado enviado prevalece
+  (2, 1, {"agent_id": 3}, 1), # Reatribuição: o estado não muda
+  (None, 1, {"status_id": 3}, 3), # Sem técnico: o estado não muda automaticamente
+]
+
+def _ticket(agent_id: int | None, status_id: int) -> SimpleNamespace:
+  return SimpleNamespace(uid="ticket-uid", agent_id=agent_id, status_id=status_id, closed_at=None)
+
+@pytest.mark.parametrize("agent_id, status_id, changes, expected_status_id", AUTO_STATUS_CASES)
+def test_single_and_bulk_auto_status_match(agent_id, status_id, changes, expected_status_id):
+  # Update de um ticket: as alterações diretas são aplicadas antes do estado automático
+  ticket = _ticket(agent_id, status_id)
+  for field, value in changes.items():
+    setattr(ticket, field, value)
+  assigned = _handle_automatic_status_update(ticket, changes, agent_id)
+  assert ticket.status_id == expected_status_id
+  assert assigned == (changes.get("agent_id") not in (None, agent_id))
+
+  # Update em massa
+  new_values = _plan_bulk_ticket_update(_ticket(agent_id, status_id), changes, datetime.now(timezone.utc))
+  assert new_values.get("status_id", status_id) == expected_status_id
@@ -0,0 +1,40 @@
+"""
+Seleção dos tickets do update em massa (PATCH /tickets/bulk): um and_filters vazio, ou só com valores
+em branco, abrangeria todos os tickets e é rejeitado.
+
+Uso (na raiz do projeto):
+  python -m pytest tests
+"""
+import os
+import tempfile
+
+# Os anexos são guardados em TICKET_FILES_PATH (lido quando os helpers dos tickets são importados)
+os.environ.setdefault('TICKET_FILES_PATH', tempfile.mkdtemp(prefix="helpdesk_tests_"))
+
+import asyncio
+import pytest
+
+from app.schemas.tickets import BaseBulkUpdateTickets
+from app.services.tickets import bulk_update_tickets
+from app.utils.errors.exceptions import CustomError
+from app.utils.helpers.tickets.ticket_bulk import _has_bulk_filter_conditions
+
+@pytest.mark.parametrize("and_filters, expected", [
+  ({}, False),
+  ({"subject": ""}, False),
+  ({"subject": "  ", "company__name": ["", " "]}, False),
+  ({"subject": ",,"}, False),
+  ({"status_id": [1, 2]}, True),
+  ({"subject": "", "agent_id": 3}, True),
+  ({"created_at_after": "2024-01-01"}, True),
+])
+def test_has_bulk_filter_conditions(and_filters, expected):
+  assert _has_bulk_filter_conditions(and_filters) is expected
+
+@pytest.mark.parametrize("and_filters", [{}, {"subject": " "}])
+def test_bulk_update_rejects_empty_and_filters(and_filters):
+  bulk_data = BaseBulkUpdateTickets(and_filters=and_filters, changes={"status_id": 2})
+  # Rejeitado antes de qualquer query
+  with pytest.raises(CustomError) as error:
+    asyncio.run(bulk_update_tickets(bulk_data, {"id": 1}))
+  assert error.value.status_code == 400
@@ -0,0 +1,131 @@
+"""
+Número de queries de uma edição típica de um ticket (PUT /tickets/details/{uid}): estado, técnico,
+resposta e CCS. Corre sobre sqlite em memória, sem MySQL.
+
+Uso (na raiz do projeto):
+  python -m pytest tests
+"""
+import os
+import tempfile
+
+# Os anexos são guardados em TICKET_FILES_PATH (lido quando os helpers dos tickets são importados)
+os.environ.setdefault('TICKET_FILES_PATH', tempfile.mkdtemp(prefix="helpdesk_tests_"))
+
+from tortoise import Tortoise
+from datetime import datetime, timezone
+import asyncio
+import logging
+import orjson
+
+# Mesma ligação ('helpdesk') e app que config.DATABASE_CONFIG, em sqlite
+TEST_DATABASE_CONFIG = {
+  "connections": {"helpdesk": "sqlite://:memory:"},
+  "apps": {"helpdesk_models": {"models": ["app.database.models.helpdesk"], "default_connection": "helpdesk"}},
+}
+
+# Queries de uma edição com estado, técnico, resposta e CCS (ver update_ticket_details):
+#   - 11 a ler o ticket: o ticket e um prefetch por relação (estado, prioridade, categoria, requerente,
+#     técnico, empresa, CCS, tipo, tipo de assistência, created_by);
+#   - 1 com os emails dos CCS anteriores (log);
+#   - 2 a validar e inserir o CC novo;
+#   - 1 UPDATE do ticket;
+#   - 2 com as relações alteradas (novo técnico e novo estado) e 1 com os emails do CC novo (log);
+#   - 1 INSERT do log;
+#   - 6 para a resposta: empresas e subcategorias da categoria, anexos, departamento, local e
+#     contactos do requerente.
+EXPECTED_UPDATE_QUERIES = 25
+
+class _QueryCounter(logging.Handler):
+  """Regista as queries enviadas à base de dados (logger tortoise.db_client)."""
+
+  def __init__(self):
+    super().__init__(level=logging.DEBUG)
+    self.queries: list[str] = []
+
+  def emit(self, record: logging.LogRecord):
+    self.queries.append(record.getMessage())
+
+async def _seed():
+  from app.database.models.helpdesk import (
+    Companies, Departments, Locals, Employees, EmployeeContacts, EmployeeContactTypes, TicketCategories,
+    TicketSubcategories, TicketStatuses, TicketPriorities, TicketTypes, TicketAssistanceTypes, Tickets,
+  )
+  company = await Companies.create(name="ACME", acronym="AC")
+  department = await Departments.create(name="IT")
+  local = await Locals.create(name="Lisboa", short="LX", company=company)
+  await EmployeeContactTypes.create(id=1, display_name="email", name="email")
+  employees = []
+  for index in range(4):
+    employee = await Employees.create(
+      first_name=f"Nome{index}", last_name=f"Apelido{index}", full_name=f"Nome{index} Apelido{index}",
+      department=department, company=company, local=local
+    )
+    await EmployeeContacts.create(
+      contact=f"colaborador{index}@example.com", name="email", main_contact=True, public=True,
+      contact_type_id=1, employee=employee
+    )
+    employees.append(employee)
+  category = await TicketCategories.create(name="Hardware")
+  await TicketSubcategories.create(name="Impressoras", category=category)
+  for status_id, name in enumerate(["Open", "In Progress", "Waiting", "x4", "x5", "x6", "Closed", "Reopened"], 1):
+    await TicketStatuses.create(id=status_id, name=name, color="#fff", text_color="#000")
+  for priority_id in (1, 2, 3):
+    await TicketPriorities.create(id=priority_id, name=f"P{priority_id}", description="", level=priority_id)
+  await TicketTypes.create(id=1, name="Incident", description="", color="#000")
+  await TicketAssistanceTypes.create(id=2, name="Remota", description="")
+  ticket = await Tickets.create(
+    uid="ticket-uid", subject="Impressora avariada", request="Não imprime", created_at=datetime.now(timezone.utc),
+    company=company, category=category, status_id=1, type_id=1, priority_id=2, assistance_type_id=2,
+    requester=employees[0], agent=employees[1], created_by=employees[0]
+  )
+  await ticket.ccs.add(employees[2])
+
+async def _count_update_queries(monkeypatch) -> list[str]:
+  await Tortoise.init(config=TEST_DATABASE_CONFIG)
+  try:
+    await Tortoise.generate_schemas()
+    await _seed()
+
+    import app.utils.helpers.tickets.ticket_helpers as ticket_helpers
+    from app.services.tickets import update_ticket_details
+    from app.schemas.tickets import BaseUpdateTicket
+    from app.utils.helpers.identity_map import _reset_identity_map
+    from app.utils.helpers.employees.contact_loader import _reset_employee_contacts_loader
+    from app.utils.helpers.responses import _dumps
+
+    async def _no_email(*args, **kwargs):
+      pass
+    # Os emails não são enviados nos testes
+    monkeypatch.setattr(ticket_helpers, "ticket_email", _no_email)
+
+    # Como no request_scope_middleware (app/main.py)
+    _reset_identity_map()
+    _reset_employee_contacts_loader()
+
+    counter = _QueryCounter()
+    db_logger = logging.getLogger("tortoise.db_client")
+    previous_level = db_logger.level
+    db_logger.setLevel(logging.DEBUG)
+    db_logger.addHandler(counter)
+    try:
+      details = await update_ticket_details(
+        "ticket-uid",
+        BaseUpdateTicket(status_id=3, agent_id=3, response="Toner substituído", ccs=[3, 4]),
+        {"id": 1},
+      )
+    finally:
+      db_logger.removeHandler(counter)
+      db_logger.setLevel(previous_level)
+
+    # Como é enviada na resposta
+    details = orjson.loads(_dumps(details))
+    assert details["status"]["id"] == 3
+    assert details["agent"]["id"] == 3
+    assert sorted(cc["id"] for cc in details["ccs"]) == [3, 4]
+    return counter.queries
+  finally:
+    await Tortoise.close_connections()
+
+def test_update_ticket_details_query_count(monkeypatch):
+  queries = asyncio.run(_count_update_queries(monkeypatch))
+  assert len(queries) == EXPECTED_UPDATE_QUERIES, "\n".join(queries)